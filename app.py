@@ -1,16 +1,32 @@
 # app.py
 
+import atexit
 import os
 import sys
 from datetime import datetime, timedelta
 # Importamos las clases clave de tu proyecto
 from src.task_manager import TaskManager, AuthenticationError, UsernameAlreadyExistsError, TaskNotFoundError
 from src.task_repository import TaskRepository
+from src.query_stats import QueryStats, LoggingSink
+from src.tracing import Tracer, trace_stack
 from src.clock_implementations import SystemClock # Usamos el reloj real para una app real
 from src.cli_facade import TaskManagerCliFacade
+from src.recurrence_engine import RecurrenceEngine
 
 # -- CONFIGURACIÓN GLOBAL --
 DB_NAME = 'elias_taskmanager.db'
+PAGE_SIZE = 20
+#Perfil de conexión (durable | balanced | fast), ver src/connection_profiles.py
+DB_PROFILE = os.environ.get('TASKMANAGER_DB_PROFILE', 'balanced')
+#Fechas como segundos epoch (opt-in; convierte la base existente al abrirla)
+DB_EPOCH_DUE_DATES = os.environ.get('TASKMANAGER_EPOCH_DUE_DATES') == '1'
+#Slow-query log (opt-in): umbral en ms a partir del cual se loguea la consulta con su plan
+SLOW_QUERY_MS = os.environ.get('TASKMANAGER_SLOW_QUERY_MS')
+QUERY_STATS = QueryStats(float(SLOW_QUERY_MS), [LoggingSink()]) if SLOW_QUERY_MS else None
+#Trazas de cada operación (opt-in): al salir se escribe el collapsed stack en este archivo
+TRACE_PATH = os.environ.get('TASKMANAGER_TRACE')
+#Contadores por usuario mantenidos por triggers (opt-in; el resumen del menú sale de una fila)
+DB_TASK_COUNTERS = os.environ.get('TASKMANAGER_TASK_COUNTERS') == '1'
 
 def setup_application():
     """Configura e inyecta todas las dependencias (Inyección de Dependencias)."""
@@ -18,20 +34,29 @@ def setup_application():
     # Dependencias de Infraestructura
     clock = SystemClock()
     # Conecta a la DB real (memory=False)
-    repository = TaskRepository(DB_NAME, clock, memory=False) 
+    repository = TaskRepository(DB_NAME, clock, memory=False, profile=DB_PROFILE, epoch_due_dates=DB_EPOCH_DUE_DATES, query_stats=QUERY_STATS, task_counters=DB_TASK_COUNTERS)
 
     # Capa de Dominio
-    manager = TaskManager(repository)
+    manager = TaskManager(repository, RecurrenceEngine(repository, clock))
+    #Recurrentes completadas mientras la app estaba cerrada (o con una versión sin motor)
+    manager.sweep_recurring_tasks()
 
     # Capa de Aplicación/Interfaz
     facade = TaskManagerCliFacade(manager)
+    if TRACE_PATH:
+        tracer = Tracer(enabled=True)
+        trace_stack(facade, tracer)
+        atexit.register(tracer.write_collapsed, TRACE_PATH)
     
     return facade, repository
 
-def display_menu(username):
+def display_menu(username, summary=None):
     """Muestra el menú principal de la sesión."""
     print("\n--- MENÚ PRINCIPAL ---")
     print(f"Sesión activa: **{username}**")
+    if summary is not None:
+        print(f"📊 Pendientes: {summary.pending} | Vencidas: {summary.overdue} | Prioritarias: {summary.priority} | "
+              f"Recurrentes: {summary.recurring} | Completadas: {summary.completed}")
     print("1. 📝 Crear nueva tarea")
     print("2. 📋 Ver mis tareas pendientes")
     print("3. ✅ Completar una tarea")
@@ -64,16 +89,23 @@ def handle_list_pending_tasks(facade, username):
     """Maneja el listado de tareas pendientes."""
     print(f"\n--- Tareas Pendientes de {username} ---")
     try:
-        # Aquí la Fachada impone la regla de que solo ves tus tareas
-        tasks = facade.list_pending_tasks(username)
+        # Aquí la Fachada impone la regla de que solo ves tus tareas.
+        # Paginamos por id: cada página arranca después de la última tarea mostrada
+        tasks = facade.list_pending_tasks_page(username, limit=PAGE_SIZE)
         
         if not tasks:
             print("🎉 ¡No tienes tareas pendientes! Estás al día.")
             return
 
-        for task in tasks:
-            due_date = task.get_due_date().strftime('%Y-%m-%d') if task.get_due_date() else 'N/A'
-            print(f"[ID: {task.get_id()}] | Vence: {due_date} | Descripción: {task.get_description()}")
+        while tasks:
+            for task in tasks:
+                due_date = task.get_due_date().strftime('%Y-%m-%d') if task.get_due_date() else 'N/A'
+                print(f"[ID: {task.get_id()}] | Vence: {due_date} | Descripción: {task.get_description()}")
+            if len(tasks) < PAGE_SIZE:
+                return
+            if input("Enter para ver más, 'q' para volver: ").strip().lower() == 'q':
+                return
+            tasks = facade.list_pending_tasks_page(username, after_id=tasks[-1].get_id(), limit=PAGE_SIZE)
             
     except Exception as e:
         print(f"❌ Error al listar tareas: {e}")
@@ -163,7 +195,7 @@ def handle_login_and_main_loop(facade):
             if choice == '1':
                 try:
                     # Intenta obtener el ID; si falla, el usuario no existe.
-                    facade.manager.get_user_id_by_username(username)
+                    facade.get_user_id(username)
                     current_user = username
                     print(f"🎉 Bienvenido de nuevo, {current_user}.")
                 except AuthenticationError:
@@ -184,7 +216,7 @@ def handle_login_and_main_loop(facade):
         
         else:
             # -- MENÚ PRINCIPAL DEL USUARIO LOGUEADO --
-            action = display_menu(current_user)
+            action = display_menu(current_user, facade.get_task_summary(current_user))
             
             if action == '1':
                 handle_create_task(facade, current_user)
@@ -0,0 +1,66 @@
+"""Async load test: many concurrent clients on AsyncTaskManager, p50/p99 latency per operation.
+
+Usage: python -m benchmarks.bench_async_load --clients 500 --ops 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from src.task_manager import TaskManager
+from src.pooled_task_repository import PooledTaskRepository
+from src.async_task_repository import AsyncTaskRepository
+from src.async_task_manager import AsyncTaskManager
+from benchmarks.common import temp_db_path, bench_clock, percentile, format_ms
+
+
+async def _client(manager, user_id, ops, rng, latencies):
+    task_ids = []
+    for _ in range(ops):
+        roll = rng.random()
+        start = time.perf_counter()
+        if roll < 0.4 or not task_ids:
+            kind = 'create'
+            task_ids.append(await manager.add_task_for_user('load task', user_id))
+        elif roll < 0.6:
+            kind = 'complete'
+            await manager.complete_task_for_user(task_ids.pop(), user_id)
+        else:
+            kind = 'list'
+            await manager.get_pending_tasks_page_for_user(user_id, limit=20)
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+
+
+async def _run(args):
+    repository = PooledTaskRepository(temp_db_path('bench_async'), bench_clock(), profile=args.profile)
+    async_repository = AsyncTaskRepository(repository, read_workers=args.read_workers, max_pending=args.max_pending)
+    manager = AsyncTaskManager(TaskManager(repository), async_repository)
+    user_ids = await asyncio.gather(*(manager.add_user(f'user{i}') for i in range(args.clients)))
+
+    latencies = {}
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(manager, user_id, args.ops, random.Random(rng.random()), latencies) for user_id in user_ids))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{args.clients} clients x {args.ops} ops: {total / elapsed:,.0f} ops/s, "
+          f"{async_repository.writes} writes in {async_repository.commits} commits")
+    for kind, samples in sorted(latencies.items()):
+        print(f"  {kind:9} n={len(samples):>6}  p50 {format_ms(percentile(samples, 50)):>12}  p99 {format_ms(percentile(samples, 99)):>12}")
+    await manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--ops', type=int, default=20)
+    parser.add_argument('--read-workers', type=int, default=4)
+    parser.add_argument('--max-pending', type=int, default=256)
+    parser.add_argument('--profile', default='balanced')
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Import throughput: one commit per task versus one bulk transaction.
+
+Usage: python -m benchmarks.bench_bulk_writes --tasks 100000
+"""
+import argparse
+import time
+
+from src.task_repository import TaskRepository
+from src.task_manager import TaskManager
+from src.cli_facade import TaskManagerCliFacade
+from benchmarks.common import temp_db_path, bench_clock
+
+
+def _new_facade():
+    repository = TaskRepository(temp_db_path('bench_bulk'), bench_clock())
+    facade = TaskManagerCliFacade(TaskManager(repository))
+    facade.create_user('importer')
+    return facade, repository
+
+
+def _report(label, count, elapsed):
+    print(f"{label:28} {count:>8} tasks in {elapsed:8.3f} s  ({count / elapsed:,.0f} tasks/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--per-call-tasks', type=int, default=2000,
+                        help='commit-per-call is slow; it is measured on a smaller sample')
+    args = parser.parse_args()
+
+    facade, repository = _new_facade()
+    start = time.perf_counter()
+    for i in range(args.per_call_tasks):
+        facade.create_task('importer', f'task {i}')
+    _report('create_task (commit/call)', args.per_call_tasks, time.perf_counter() - start)
+    repository.close()
+
+    facade, repository = _new_facade()
+    start = time.perf_counter()
+    facade.create_tasks_bulk('importer', ((f'task {i}',) for i in range(args.tasks)))
+    _report('create_tasks_bulk', args.tasks, time.perf_counter() - start)
+
+    task_ids = [task.get_id() for task in facade.list_pending_tasks('importer')]
+    start = time.perf_counter()
+    facade.complete_tasks_bulk('importer', task_ids)
+    _report('complete_tasks_bulk', len(task_ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    facade.delete_tasks_bulk('importer', task_ids)
+    _report('delete_tasks_bulk', len(task_ids), time.perf_counter() - start)
+    repository.close()
+
+
+if __name__ == '__main__':
+    main()
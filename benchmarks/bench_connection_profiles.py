@@ -0,0 +1,51 @@
+"""Throughput of each connection profile: commit-per-call writes and mixed reads.
+
+Usage: python -m benchmarks.bench_connection_profiles --writes 2000 --reads 2000
+"""
+import argparse
+import time
+
+from src.connection_profiles import PROFILES
+from src.task_repository import TaskRepository
+from src.task_manager import TaskManager
+from src.cli_facade import TaskManagerCliFacade
+from benchmarks.common import temp_db_path, bench_clock, seed_database
+
+
+def _run_profile(profile, args):
+    repository = TaskRepository(temp_db_path(f'bench_profile_{profile or "default"}'), bench_clock(), profile=profile)
+    seed_database(repository, users=args.users, tasks=args.seed_tasks)
+    facade = TaskManagerCliFacade(TaskManager(repository))
+    facade.create_user('writer')
+
+    #Escrituras: un commit por llamada, donde synchronous/journal_mode pesan más
+    start = time.perf_counter()
+    for i in range(args.writes):
+        facade.create_task('writer', f'task {i}')
+    writes_elapsed = time.perf_counter() - start
+
+    #Lecturas: listados de pendientes por usuario (cache_size/mmap)
+    start = time.perf_counter()
+    for i in range(args.reads):
+        repository.get_pending_tasks_page(1 + i % args.users, limit=50)
+    reads_elapsed = time.perf_counter() - start
+    repository.close()
+    return writes_elapsed, reads_elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writes', type=int, default=2000)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--seed-tasks', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'profile':10} {'writes/s':>12} {'reads/s':>12}")
+    for profile in [None] + list(PROFILES):
+        writes_elapsed, reads_elapsed = _run_profile(profile, args)
+        print(f"{profile or 'default':10} {args.writes / writes_elapsed:>12,.0f} {args.reads / reads_elapsed:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Listing cost with ISO text due dates versus integer epoch due dates.
+
+Usage: python -m benchmarks.bench_epoch_due_dates --tasks 200000
+"""
+import argparse
+import time
+
+from src.task_repository import TaskRepository
+from benchmarks.common import temp_db_path, bench_clock, seed_database
+
+
+def _best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'storage':8} {'list':>10} {'list+dates':>12} {'overdue':>10}")
+    for label, epoch_due_dates in (('iso', False), ('epoch', True)):
+        path = temp_db_path(f'bench_{label}')
+        repository = TaskRepository(path, bench_clock())
+        seed_database(repository, 1, args.tasks, completed_ratio=0.0)
+        repository.close()
+        #La conversión se hace al reabrir, igual que con una base existente
+        repository = TaskRepository(path, bench_clock(), epoch_due_dates=epoch_due_dates)
+        user_id = 1
+
+        listing = _best_of(lambda: repository.get_pending_tasks_by_user_id_global(user_id), args.repeat)
+        with_dates = _best_of(lambda: [task.get_due_date() for task in repository.get_pending_tasks_by_user_id_global(user_id)], args.repeat)
+        overdue = _best_of(lambda: repository.get_overdue_tasks_by_user_id_global(user_id), args.repeat)
+        print(f"{label:8} {listing * 1000:>8.1f}ms {with_dates * 1000:>10.1f}ms {overdue * 1000:>8.1f}ms")
+        repository.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Write throughput: one commit per call versus group commit with different windows.
+
+Usage: python -m benchmarks.bench_group_commit --writes 5000 --profile durable
+"""
+import argparse
+import time
+
+from src.task_manager import TaskManager
+from src.pooled_task_repository import PooledTaskRepository
+from src.group_commit_writer import GroupCommitWriter, GroupCommitTaskManager
+from benchmarks.common import temp_db_path, bench_clock
+
+
+def _new_manager(profile):
+    repository = PooledTaskRepository(temp_db_path('bench_group_commit'), bench_clock(), profile=profile)
+    manager = TaskManager(repository)
+    return manager, repository, manager.add_user('writer')
+
+
+def _report(label, writes, elapsed, commits):
+    print(f"{label:28} {writes / elapsed:>10,.0f} writes/s  {commits:>6} commits")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writes', type=int, default=5000)
+    parser.add_argument('--profile', default='durable')
+    parser.add_argument('--max-batch', type=int, default=100)
+    args = parser.parse_args()
+
+    manager, repository, user_id = _new_manager(args.profile)
+    start = time.perf_counter()
+    for i in range(args.writes):
+        manager.add_task_for_user(f'task {i}', user_id)
+    _report('commit per call', args.writes, time.perf_counter() - start, args.writes)
+    repository.close()
+
+    for max_delay_ms in (0, 1, 5, 20):
+        manager, repository, user_id = _new_manager(args.profile)
+        writer = GroupCommitWriter(repository, max_delay_ms, args.max_batch)
+        group_manager = GroupCommitTaskManager(manager, writer)
+        start = time.perf_counter()
+        futures = [group_manager.add_task_for_user(f'task {i}', user_id) for i in range(args.writes)]
+        for future in futures:
+            future.result()
+        _report(f'group commit ({max_delay_ms} ms window)', args.writes, time.perf_counter() - start, writer.commits)
+        writer.close()
+        repository.close()
+
+
+if __name__ == '__main__':
+    main()
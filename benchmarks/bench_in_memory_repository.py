@@ -0,0 +1,65 @@
+"""TaskRepository (SQLite) versus InMemoryTaskRepository on the same data.
+
+Usage: python -m benchmarks.bench_in_memory_repository --users 200 --tasks 50000 --ops 5000
+"""
+import argparse
+import random
+import time
+
+from src.task_repository import TaskRepository
+from src.in_memory_task_repository import InMemoryTaskRepository
+from benchmarks.common import temp_db_path, bench_clock, seed_database
+
+
+def _per_op(fn, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - start) / len(args_list)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=50000)
+    parser.add_argument('--ops', type=int, default=5000)
+    args = parser.parse_args()
+
+    clock = bench_clock()
+    db_path = temp_db_path('bench_in_memory')
+    sql_repository = TaskRepository(db_path, clock, profile='balanced')
+    user_ids = seed_database(sql_repository, args.users, args.tasks)
+    start = time.perf_counter()
+    memory_repository = InMemoryTaskRepository.load_snapshot(db_path, clock)
+    print(f"load_snapshot: {args.tasks} tasks in {time.perf_counter() - start:.3f} s")
+
+    rng = random.Random(1)
+    task_args = [(rng.randint(1, args.tasks), rng.choice(user_ids)) for _ in range(args.ops)]
+    user_args = [(rng.choice(user_ids),) for _ in range(args.ops // 10)]
+    reads = (
+        ('contains_task_by_user_id', task_args),
+        ('get_task_by_id_global', task_args),
+        ('task_is_completed_global', task_args),
+        ('get_pending_tasks_by_user_id_global', user_args),
+        ('get_overdue_tasks_by_user_id_global', user_args),
+        ('get_pending_tasks_page', user_args),
+        ('tasks_count_by_user_id', user_args),
+    )
+    print(f"{'operation':38} {'sqlite':>12} {'in-memory':>12} {'speedup':>8}")
+    for name, args_list in reads:
+        sql_time = _per_op(getattr(sql_repository, name), args_list)
+        memory_time = _per_op(getattr(memory_repository, name), args_list)
+        print(f"{name:38} {sql_time * 1e6:9.1f} us {memory_time * 1e6:9.1f} us {sql_time / memory_time:7.1f}x")
+    #Escrituras (el SQLite hace commit en cada una)
+    add_args = [(f'new {i}', rng.choice(user_ids), clock.now()) for i in range(args.ops // 10)]
+    sql_time = _per_op(sql_repository.add_task_by_user_id_global, add_args)
+    memory_time = _per_op(memory_repository.add_task_by_user_id_global, add_args)
+    print(f"{'add_task_by_user_id_global':38} {sql_time * 1e6:9.1f} us {memory_time * 1e6:9.1f} us {sql_time / memory_time:7.1f}x")
+    sql_time = _per_op(sql_repository.complete_task_global, task_args[:args.ops // 10])
+    memory_time = _per_op(memory_repository.complete_task_global, task_args[:args.ops // 10])
+    print(f"{'complete_task_global':38} {sql_time * 1e6:9.1f} us {memory_time * 1e6:9.1f} us {sql_time / memory_time:7.1f}x")
+    sql_repository.close()
+
+
+if __name__ == '__main__':
+    main()
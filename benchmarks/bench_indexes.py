@@ -0,0 +1,102 @@
+"""Query plans and latencies of the per-user queries before and after the index migration.
+
+Usage: python -m benchmarks.bench_indexes --users 1000 --tasks 1000000
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from src.migrations import apply_migrations, get_schema_version
+from src.task_repository import TaskRepository
+from benchmarks.common import temp_db_path, bench_clock, seed_database, time_calls, percentile, format_ms
+
+
+def _create_legacy_database(source_conn):
+    """Copia usuarios y tareas a una base nueva con el esquema de la versión sin migraciones
+    (solo clave primaria, user_version 0). Devuelve la ruta"""
+    db_path = temp_db_path('bench_indexes_legacy')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER not NULL, description TEXT NOT NULL, completed BOOLEAN NOT NULL DEFAULT 0, due_date TEXT NULL, priority BOOLEAN NOT NULL DEFAULT 0, recurrency BOOLEAN NOT NULL DEFAULT 0, recurrency_days INTEGER NULL)")
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE)")
+    source_path = source_conn.execute("PRAGMA database_list").fetchone()[2]
+    conn.execute("ATTACH DATABASE ? AS source", (source_path,))
+    conn.execute("INSERT INTO users SELECT id, username FROM source.users")
+    conn.execute("INSERT INTO tasks SELECT id, user_id, description, completed, due_date, priority, recurrency, recurrency_days FROM source.tasks")
+    conn.commit()
+    conn.execute("DETACH DATABASE source")
+    conn.close()
+    return db_path
+
+
+def _drop_task_indexes(conn):
+    "Deja solo la clave primaria para medir las consultas sin índices"
+    index_names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_tasks_%'")]
+    for index_name in index_names:
+        conn.execute(f"DROP INDEX {index_name}")
+    conn.commit()
+
+
+def _queries(repository, user_ids, task_ids):
+    return [
+        ('get_pending_tasks_by_user_id_global', repository.get_pending_tasks_by_user_id_global, [(u,) for u in user_ids]),
+        ('get_overdue_tasks_by_user_id_global', repository.get_overdue_tasks_by_user_id_global, [(u,) for u in user_ids]),
+        ('tasks_count_by_user_id', repository.tasks_count_by_user_id, [(u,) for u in user_ids]),
+        ('contains_task_by_user_id', repository.contains_task_by_user_id, list(zip(task_ids, user_ids))),
+    ]
+
+
+def _plans(repository, user_id):
+    table = repository.TABLE_NAME
+    statements = {
+        'pending': (f"SELECT * FROM {table} WHERE completed = 0 AND user_id = ?", (user_id,)),
+        'overdue': (f"SELECT * FROM {table} WHERE completed = 0 AND user_id = ? AND due_date IS NOT NULL AND due_date < ?", (user_id, '2025-12-14 17:00:00')),
+        'count': (f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (user_id,)),
+        'pending (all users)': (f"SELECT * FROM {table} WHERE completed = 0", ()),
+    }
+    for name, (sql, params) in statements.items():
+        details = [row[3] for row in repository.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        print(f"    {name:20} {' / '.join(details)}")
+
+
+def _report(label, repository, user_ids, task_ids):
+    print(f"\n== {label} (user_version={get_schema_version(repository.conn)}) ==")
+    _plans(repository, user_ids[0])
+    for name, fn, args_list in _queries(repository, user_ids, task_ids):
+        samples = time_calls(fn, args_list)
+        print(f"    {name:38} p50={format_ms(percentile(samples, 50))}  p99={format_ms(percentile(samples, 99))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=200000)
+    parser.add_argument('--samples', type=int, default=50)
+    args = parser.parse_args()
+
+    repository = TaskRepository(temp_db_path('bench_indexes'), bench_clock())
+    all_user_ids = seed_database(repository, args.users, args.tasks)
+    rng = random.Random(1)
+    user_ids = [rng.choice(all_user_ids) for _ in range(args.samples)]
+    task_ids = [rng.randint(1, args.tasks) for _ in range(args.samples)]
+
+    #Las migraciones publicadas no se vuelven a correr sobre una base migrada:
+    #el "después" migra una copia nueva con el esquema viejo
+    legacy_path = _create_legacy_database(repository.conn)
+    _drop_task_indexes(repository.conn)
+    _report('before (idx_tasks_* dropped)', repository, user_ids, task_ids)
+    repository.close()
+
+    conn = sqlite3.connect(legacy_path)
+    start = time.perf_counter()
+    apply_migrations(conn)
+    print(f"\n  (legacy database migrated from user_version=0 in {format_ms(time.perf_counter() - start)})")
+    conn.close()
+    migrated = TaskRepository(legacy_path, bench_clock())
+    migrated.conn.execute("ANALYZE")
+    _report('after', migrated, user_ids, task_ids)
+    migrated.close()
+
+
+if __name__ == '__main__':
+    main()
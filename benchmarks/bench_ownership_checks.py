@@ -0,0 +1,57 @@
+"""SQL statements and latency per secure operation: check-then-act versus fused ownership checks.
+
+Usage: python -m benchmarks.bench_ownership_checks --ops 5000
+"""
+import argparse
+import time
+
+from src.task_repository import TaskRepository
+from src.task_manager import TaskManager
+from benchmarks.common import temp_db_path, bench_clock
+
+
+def _legacy_complete_task_for_user(manager, task_id, user_id):
+    "El camino anterior: COUNT de pertenencia, COUNT de existencia y el UPDATE"
+    manager.assert_task_id_belongs_to_user(task_id, user_id)
+    manager.assert_is_valid_task_id_global(task_id)
+    manager.repository.complete_task_global(task_id)
+
+
+def _legacy_get_task_by_id_for_user(manager, task_id, user_id):
+    manager.assert_task_id_belongs_to_user(task_id, user_id)
+    manager.assert_is_valid_task_id_global(task_id)
+    return manager.repository.get_task_by_id_global(task_id)
+
+
+def _measure(label, repository, fn, task_ids, user_id):
+    statements = []
+    repository.conn.set_trace_callback(statements.append)
+    start = time.perf_counter()
+    for task_id in task_ids:
+        fn(task_id, user_id)
+    elapsed = time.perf_counter() - start
+    repository.conn.set_trace_callback(None)
+    queries = sum(1 for sql in statements if sql.split()[0] not in ('BEGIN', 'COMMIT'))
+    print(f"{label:36} {queries / len(task_ids):4.1f} queries/op  {elapsed / len(task_ids) * 1e6:8.1f} us/op")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ops', type=int, default=5000)
+    args = parser.parse_args()
+
+    repository = TaskRepository(temp_db_path('bench_ownership'), bench_clock())
+    manager = TaskManager(repository)
+    user_id = manager.add_user('owner')
+    manager.add_tasks_bulk_for_user([(f'task {i}',) for i in range(args.ops)], user_id)
+    task_ids = [task.get_id() for task in manager.get_pending_tasks_for_user(user_id)]
+
+    _measure('complete_task_for_user (legacy)', repository, lambda t, u: _legacy_complete_task_for_user(manager, t, u), task_ids, user_id)
+    _measure('complete_task_for_user (fused)', repository, manager.complete_task_for_user, task_ids, user_id)
+    _measure('get_task_by_id_for_user (legacy)', repository, lambda t, u: _legacy_get_task_by_id_for_user(manager, t, u), task_ids, user_id)
+    _measure('get_task_by_id_for_user (fused)', repository, manager.get_task_by_id_for_user, task_ids, user_id)
+    repository.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Recurrence sweep: materialize the next occurrence of N completed recurring tasks.
+
+Usage: python -m benchmarks.bench_recurrence --tasks 1000000
+"""
+import argparse
+import time
+
+from src.task_repository import TaskRepository
+from src.recurrence_engine import RecurrenceEngine
+from benchmarks.common import temp_db_path, bench_clock, BENCH_NOW
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000000)
+    args = parser.parse_args()
+
+    clock = bench_clock()
+    repository = TaskRepository(temp_db_path('bench_recurrence'), clock, profile='fast')
+    user_id = repository.add_user('recurrent')
+    due_date = repository._to_db_format(BENCH_NOW)
+    #Todas completadas y recurrentes, listas para el barrido
+    repository.conn.executemany(
+        f"INSERT INTO {repository.TABLE_NAME} (user_id, description, completed, due_date, recurrency, recurrency_days) VALUES (?, ?, 1, ?, 1, ?)",
+        ((user_id, f'task {i}', due_date, 1 + i % 30) for i in range(args.tasks))
+    )
+    repository.conn.commit()
+
+    engine = RecurrenceEngine(repository, clock)
+    start = time.perf_counter()
+    created = engine.sweep()
+    elapsed = time.perf_counter() - start
+    print(f"first sweep   {created:>10} tasks in {elapsed:8.3f} s  ({created / elapsed:,.0f} tasks/s)")
+
+    start = time.perf_counter()
+    created = engine.sweep()
+    print(f"second sweep  {created:>10} tasks in {time.perf_counter() - start:8.3f} s  (idempotent)")
+    repository.close()
+
+
+if __name__ == '__main__':
+    main()
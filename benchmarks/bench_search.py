@@ -0,0 +1,69 @@
+"""Full-text search (FTS5, search_tasks) versus LIKE '%word%' over task descriptions.
+
+Usage: python -m benchmarks.bench_search --users 100 --tasks 1000000 --queries 200
+"""
+import argparse
+import random
+import time
+
+from src.task_repository import TaskRepository
+from benchmarks.common import temp_db_path, bench_clock, time_calls, percentile, format_ms
+
+#Vocabulario con frecuencias muy distintas: las primeras palabras aparecen mucho más
+WORDS = [
+    'comprar', 'llamar', 'pagar', 'revisar', 'enviar', 'preparar', 'leer', 'escribir', 'limpiar', 'organizar',
+    'factura', 'informe', 'reunión', 'correo', 'presupuesto', 'capítulo', 'médico', 'banco', 'cumpleaños', 'jardín',
+    'proveedor', 'contrato', 'auditoría', 'inventario', 'presentación', 'garantía', 'hipoteca', 'vacunación', 'mudanza', 'pasaporte',
+]
+
+
+def _description(rng):
+    words = rng.choices(WORDS, weights=[1 / (rank + 1) for rank in range(len(WORDS))], k=rng.randint(3, 8))
+    return ' '.join(words) + f' #{rng.randint(1, 10**6)}'
+
+
+def seed(repository, users, tasks, seed=0):
+    rng = random.Random(seed)
+    conn = repository.conn
+    conn.executemany(f"INSERT INTO {repository.USERS_TABLE_NAME} (username) VALUES (?)", ((f'user{i}',) for i in range(users)))
+    user_ids = [row[0] for row in conn.execute(f"SELECT id FROM {repository.USERS_TABLE_NAME}")]
+    #Los triggers indexan cada descripción al insertarla
+    conn.executemany(
+        f"INSERT INTO {repository.TABLE_NAME} (user_id, description, completed) VALUES (?, ?, ?)",
+        ((rng.choice(user_ids), _description(rng), rng.random() < 0.5) for _ in range(tasks))
+    )
+    conn.commit()
+    return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    repository = TaskRepository(temp_db_path('bench_search'), bench_clock(), profile='balanced')
+    start = time.perf_counter()
+    user_ids = seed(repository, args.users, args.tasks)
+    print(f"seeded {args.tasks} tasks (indexed by the FTS triggers) in {time.perf_counter() - start:.1f} s")
+
+    like_sql = f"""SELECT id, user_id, description, completed, due_date, priority, recurrency, recurrency_days
+        FROM {repository.TABLE_NAME} WHERE user_id = ? AND description LIKE ? LIMIT ?"""
+    def like_search(user_id, word, limit):
+        return repository.create_tasks_by_rows(repository._execute(like_sql, (user_id, f'%{word}%', limit)).fetchall())
+
+    rng = random.Random(1)
+    print(f"{'term':14} {'method':8} {'p50':>12} {'p95':>12} {'hits':>6}")
+    for word in ('comprar', 'factura', 'pasaporte', 'inexistente'):
+        queries = [(rng.choice(user_ids), word, args.limit) for _ in range(args.queries)]
+        for label, fn in (('fts5', repository.search_tasks), ('like', like_search)):
+            samples = time_calls(fn, queries)
+            hits = len(fn(*queries[0]))
+            print(f"{word:14} {label:8} {format_ms(percentile(samples, 50)):>12} {format_ms(percentile(samples, 95)):>12} {hits:6}")
+    repository.close()
+
+
+if __name__ == '__main__':
+    main()
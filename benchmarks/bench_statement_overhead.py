@@ -0,0 +1,115 @@
+"""Per-call overhead of TaskRepository: SQL rebuilt per call + cursor() (before) versus the statement registry + connection.execute (after).
+
+Also shows what a statement cache smaller than the registry costs (every call re-prepares).
+
+Usage: python -m benchmarks.bench_statement_overhead --users 100 --tasks 20000 --calls 20000
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from src.task_repository import TaskRepository
+from benchmarks.common import temp_db_path, bench_clock, seed_database
+
+
+class LegacyTaskRepository(TaskRepository):
+    "Cómo eran estos métodos antes del registro: SQL armado en cada llamada y un cursor explícito"
+    def _execute(self, sql, params=(), raw=False):
+        cursor = self._read_connection().cursor()
+        if raw:
+            cursor.row_factory = None
+        return cursor.execute(sql, params)
+
+    def contains_user_by_id(self, user_id):
+        sql = f"SELECT COUNT(id) FROM {self.USERS_TABLE_NAME} WHERE id = ?"
+        return self._execute(sql, (user_id,)).fetchone()[0] > 0
+
+    def _where_task(self, task_id, user_id):
+        if user_id == None:
+            return "id = ?", (task_id,)
+        return "id = ? AND user_id = ?", (task_id, user_id)
+
+    def task_is_completed_global(self, task_id, user_id=None):
+        where, params = self._where_task(task_id, user_id)
+        sql = f"SELECT completed FROM {self.TABLE_NAME} WHERE {where}"
+        row = self._execute(sql, params).fetchone()
+        return None if row is None else row[0] == 1
+
+    def get_task_by_id_global(self, task_id, user_id=None):
+        where, params = self._where_task(task_id, user_id)
+        sql = f"SELECT id, user_id, description, completed, due_date, priority, recurrency, recurrency_days FROM {self.TABLE_NAME} WHERE {where}"
+        row = self._execute(sql, params).fetchone()
+        return None if row is None else self.create_task_by_row(row)
+
+    def get_user_id_by_username(self, username):
+        sql = f"SELECT id FROM {self.USERS_TABLE_NAME} WHERE username = ?"
+        return self._execute(sql, (username,)).fetchone()[0]
+
+
+def _per_call(fns, args_list, repeat=7):
+    "Mejor de repeat pasadas de cada fn (alternadas, para que el ruido les toque a todas), en microsegundos por llamada"
+    best = [float('inf')] * len(fns)
+    for _ in range(repeat):
+        for index, fn in enumerate(fns):
+            start = time.perf_counter()
+            for args in args_list:
+                fn(*args)
+            best[index] = min(best[index], time.perf_counter() - start)
+    return [seconds / len(args_list) * 1e6 for seconds in best]
+
+
+def _cycle_statements(conn, statements, rounds):
+    "Corre todas las lecturas del registro en ronda: con una cache chica cada una desaloja a otra"
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for sql, params in statements:
+            conn.execute(sql, params).fetchone()
+    return (time.perf_counter() - start) / (rounds * len(statements)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    db_path = temp_db_path('bench_statement_overhead')
+    repository = TaskRepository(db_path, bench_clock(), profile='balanced')
+    user_ids = seed_database(repository, args.users, args.tasks)
+    legacy = LegacyTaskRepository(db_path, bench_clock(), profile='balanced')
+    rng = random.Random(1)
+    task_args = [(rng.randint(1, args.tasks), rng.choice(user_ids)) for _ in range(args.calls)]
+    user_args = [(rng.choice(user_ids),) for _ in range(args.calls)]
+    username_args = [(f'user{rng.randrange(args.users)}',) for _ in range(args.calls)]
+
+    print(f"{len(repository.statements)} statements in the registry, cached_statements={repository.cached_statements}")
+    print(f"{'operation':28} {'before':>10} {'after':>10} {'saved':>8}")
+    for name, args_list in (
+        ('contains_user_by_id', user_args),
+        ('get_user_id_by_username', username_args),
+        ('task_is_completed_global', task_args),
+        ('get_task_by_id_global', task_args),
+    ):
+        before, after = _per_call((getattr(legacy, name), getattr(repository, name)), args_list)
+        print(f"{name:28} {before:7.2f} us {after:7.2f} us {1 - after / before:7.1%}")
+    legacy.close()
+    repository.close()
+
+    #Sobre una base vacía ejecutar no cuesta nada: queda a la vista lo que cuesta preparar cada sentencia
+    empty_path = temp_db_path('bench_statement_cache')
+    empty = TaskRepository(empty_path, bench_clock())
+    statements = [(sql, (1,) * sql.count('?')) for sql in empty.statements.values()
+                  if sql.lstrip().startswith('SELECT') and ':' not in sql and 'MATCH' not in sql]
+    rounds = max(1, args.calls // len(statements))
+    print(f"\ncycling {len(statements)} registry reads on an empty database:")
+    for cached_statements in (len(statements) // 2, empty.cached_statements):
+        conn = sqlite3.connect(empty_path, cached_statements=cached_statements)
+        print(f"  cached_statements={cached_statements:<4} {_cycle_statements(conn, statements, rounds):7.2f} us per statement")
+        conn.close()
+    empty.close()
+
+
+if __name__ == '__main__':
+    main()
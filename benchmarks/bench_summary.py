@@ -0,0 +1,94 @@
+"""Per-user dashboard counts: separate COUNT(*) + list loads (before) versus one SUM(CASE ...) scan versus the trigger-maintained counters table.
+
+Also measures what the counter triggers add to writes.
+
+Usage: python -m benchmarks.bench_summary --users 1000 --tasks 200000
+"""
+import argparse
+import random
+import time
+
+from src.task_manager import TaskSummary
+from src.task_repository import TaskRepository
+from benchmarks.common import temp_db_path, bench_clock, seed_database, time_calls, percentile, format_ms
+
+
+def summary_before(repository, user_id):
+    "Cómo armaba la cabecera cada pantalla: un COUNT(*) y las listas completas de pendientes y vencidas"
+    total = repository.tasks_count_by_user_id(user_id)
+    pending = repository.get_pending_tasks_by_user_id_global(user_id)
+    overdue = repository.get_overdue_tasks_by_user_id_global(user_id)
+    return TaskSummary(
+        user_id, len(pending), len(overdue),
+        sum(1 for task in pending if task.is_priority()),
+        sum(1 for task in pending if task.is_recurrency()),
+        total - len(pending),
+    )
+
+
+def _report(name, fn, args_list):
+    samples = time_calls(fn, args_list)
+    print(f"  {name:34} p50={format_ms(percentile(samples, 50))}  p99={format_ms(percentile(samples, 99))}")
+
+
+def _time_writes(repository, user_ids, count):
+    "Segundos de count altas en un bloque y de completarlas una por una"
+    rng = random.Random(2)
+    start = time.perf_counter()
+    with repository.transaction():
+        first_id = None
+        for i in range(count):
+            task_id = repository.add_task_by_user_id_global(f'write {i}', rng.choice(user_ids))
+            first_id = first_id or task_id
+    inserted = time.perf_counter() - start
+    start = time.perf_counter()
+    with repository.transaction():
+        for task_id in range(first_id, first_id + count):
+            repository.complete_task_global(task_id)
+    return inserted, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=200000)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--writes', type=int, default=20000)
+    args = parser.parse_args()
+
+    db_path = temp_db_path('bench_summary')
+    repository = TaskRepository(db_path, bench_clock(), profile='balanced')
+    user_ids = seed_database(repository, args.users, args.tasks)
+    rng = random.Random(1)
+    user_args = [(rng.choice(user_ids),) for _ in range(args.samples)]
+
+    print(f"== one user ({args.tasks // args.users} tasks on average) ==")
+    _report('before (count + pending + overdue)', lambda user_id: summary_before(repository, user_id), user_args)
+    _report('SUM(CASE ...) scan', repository.get_user_task_summary, user_args)
+    plain_writes = _time_writes(repository, user_ids, args.writes)
+    repository.close()
+
+    #La misma base con contadores (se llenan desde las tareas que ya están)
+    start = time.perf_counter()
+    counted = TaskRepository(db_path, bench_clock(), profile='balanced', task_counters=True)
+    print(f"  (counters table filled in {format_ms(time.perf_counter() - start)})")
+    _report('counters table', counted.get_user_task_summary, user_args)
+    assert all(summary_before(counted, user_id) == counted.get_user_task_summary(user_id) for (user_id,) in user_args[:20])
+
+    print(f"\n== every user ({args.users}) ==")
+    plain = TaskRepository(temp_db_path('bench_summary_plain'), bench_clock(), profile='balanced')
+    seed_database(plain, args.users, args.tasks)
+    _report('one summary per user', lambda: [plain.get_user_task_summary(user_id) for user_id in user_ids], [()] * 5)
+    _report('get_all_user_summaries (scan)', plain.get_all_user_summaries, [()] * 5)
+    _report('get_all_user_summaries (counters)', counted.get_all_user_summaries, [()] * 5)
+    plain.close()
+
+    counted_writes = _time_writes(counted, user_ids, args.writes)
+    counted.close()
+    print(f"\n== {args.writes} writes ==")
+    for name, (inserted, completed) in (('without counters', plain_writes), ('with counters', counted_writes)):
+        print(f"  {name:18} insert={inserted / args.writes * 1e6:6.2f} us  complete={completed / args.writes * 1e6:6.2f} us")
+
+
+if __name__ == '__main__':
+    main()
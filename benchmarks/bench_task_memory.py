@@ -0,0 +1,61 @@
+"""Memory used by a large pending-task listing: dict-based Task, slotted Task, TaskBatch and streaming.
+
+Usage: python -m benchmarks.bench_task_memory --tasks 500000
+"""
+import argparse
+import time
+import tracemalloc
+
+from src.task_repository import TaskRepository
+from benchmarks.common import temp_db_path, bench_clock, seed_database
+
+
+class _DictTask:
+    "El Task anterior, con __dict__ por instancia"
+    def __init__(self, id, user_id, description, completed=False, due_date=None, priority=False, recurrency=False, recurrency_days=0):
+        self.id = id
+        self.description = description
+        self.completed = completed
+        self.priority = priority
+        self.due_date = due_date
+        self.user_id = user_id
+        self.recurrency = recurrency
+        self.recurrency_days = recurrency_days
+
+
+def _measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:22} {len(result):>8} tasks  retained={current / 2**20:8.1f} MiB  peak={peak / 2**20:8.1f} MiB  {elapsed:6.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=500000)
+    args = parser.parse_args()
+
+    repository = TaskRepository(temp_db_path('bench_memory'), bench_clock())
+    #Todas pendientes y de un único usuario
+    seed_database(repository, 1, args.tasks, completed_ratio=0.0)
+
+    def dict_tasks():
+        #Lo mismo que hacía create_tasks_by_rows con la clase anterior
+        rows = repository.conn.execute(f"SELECT * FROM {repository.TABLE_NAME} WHERE completed = 0").fetchall()
+        return [_DictTask(row['id'], row['user_id'], row['description'], row['completed'] == 1, repository._from_db_format(row['due_date']),
+                          row['priority'] == 1, row['recurrency'] == 1, row['recurrency_days']) for row in rows]
+
+    _measure('Task (__dict__)', dict_tasks)
+    _measure('Task (__slots__)', repository.get_pending_tasks_by_user_id_global)
+    _measure('TaskBatch', lambda: repository.get_pending_tasks_by_user_id_global(as_batch=True))
+    #Streaming: solo se retiene el contador, el pico queda acotado por el tamaño de página
+    _measure('iter_pending_tasks', lambda: range(sum(1 for _ in repository.iter_pending_tasks())))
+    repository.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Workload suite: the same synthetic mix through TaskManagerCliFacade, TaskManager and TaskRepository.
+
+Reports throughput, p50/p95/p99 per operation and peak RSS; --save writes a JSON baseline and
+--compare checks a run against one (exit status 1 on regressions beyond --tolerance).
+
+Usage: python -m benchmarks.bench_workload --users 200 --tasks 50000 --ops 20000 --save baseline.json
+       python -m benchmarks.bench_workload --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+
+from src.task_repository import TaskRepository
+from src.task_manager import TaskManager
+from src.cli_facade import TaskManagerCliFacade
+from benchmarks.common import temp_db_path, bench_clock, seed_database, percentile, peak_rss_mb
+from benchmarks.workload import Workload, RepositoryDriver, ManagerDriver, FacadeDriver, DEFAULT_MIX, parse_mix, pending_task_ids
+
+LAYERS = {
+    'repository': lambda repository: RepositoryDriver(repository),
+    'manager': lambda repository: ManagerDriver(TaskManager(repository)),
+    'facade': lambda repository: FacadeDriver(TaskManagerCliFacade(TaskManager(repository))),
+}
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_layer(layer, config):
+    "Siembra una base nueva (misma semilla para todas las capas) y corre la carga sobre la capa"
+    repository = TaskRepository(temp_db_path(f'bench_workload_{layer}'), bench_clock(), profile=config['profile'])
+    user_ids = seed_database(repository, config['users'], config['tasks'], config['seed'], config['completed_ratio'],
+                             config['due_ratio'], config['priority_ratio'], tuple(config['due_days']))
+    users = [(user_id, f'user{i}') for i, user_id in enumerate(user_ids)]
+    workload = Workload(config['mix'], config['seed'], config['due_ratio'], config['priority_ratio'], tuple(config['due_days']))
+    latencies, seconds = workload.run(LAYERS[layer](repository), users, pending_task_ids(repository), config['ops'])
+    repository.close()
+    return {
+        'ops': config['ops'],
+        'seconds': seconds,
+        'throughput': config['ops'] / seconds,
+        'latency_ms': {
+            kind: {'n': len(samples), **{f'p{p}': percentile(samples, p) * 1000 for p in (50, 95, 99)}}
+            for kind, samples in latencies.items() if samples
+        },
+        #ru_maxrss es el pico del proceso: con varias capas cuenta lo que dejaron las anteriores
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(baseline, current, tolerance):
+    "Imprime la diferencia con el baseline y devuelve la lista de regresiones"
+    if baseline['config'] != current['config']:
+        print("warning: baseline was recorded with a different configuration")
+    regressions = []
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'} (tolerance {tolerance:.0%})")
+    for layer, result in current['layers'].items():
+        old = baseline['layers'].get(layer)
+        if old is None:
+            continue
+        change = result['throughput'] / old['throughput'] - 1
+        flag = change < -tolerance
+        print(f"  {layer:11} throughput {old['throughput']:>10,.0f} -> {result['throughput']:>10,.0f} ops/s {change:+7.1%}{'  REGRESSION' if flag else ''}")
+        if flag:
+            regressions.append(f'{layer} throughput')
+        for kind, stats in result['latency_ms'].items():
+            old_stats = old['latency_ms'].get(kind)
+            if old_stats is None:
+                continue
+            change = stats['p95'] / old_stats['p95'] - 1 if old_stats['p95'] else 0.0
+            flag = change > tolerance
+            print(f"  {'':11} {kind:13} p95 {old_stats['p95']:9.3f} -> {stats['p95']:9.3f} ms {change:+7.1%}{'  REGRESSION' if flag else ''}")
+            if flag:
+                regressions.append(f'{layer} {kind} p95')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=50000)
+    parser.add_argument('--ops', type=int, default=20000)
+    parser.add_argument('--layers', default='facade,manager,repository', help="comma separated subset of: " + ', '.join(LAYERS))
+    parser.add_argument('--mix', type=parse_mix, default=dict(DEFAULT_MIX), help="weights, e.g. create=0.2,list_pending=0.3,list_overdue=0.2,complete=0.15,toggle=0.15")
+    parser.add_argument('--completed-ratio', type=float, default=0.5)
+    parser.add_argument('--due-ratio', type=float, default=0.8, help="share of tasks with a due date")
+    parser.add_argument('--due-days', type=int, nargs=2, default=[-30, 30], metavar=('FROM', 'TO'), help="due dates spread uniformly over these days from now")
+    parser.add_argument('--priority-ratio', type=float, default=0.1)
+    parser.add_argument('--profile', default='balanced')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help="run each layer this many times and keep the fastest run")
+    parser.add_argument('--save', metavar='PATH', help="write the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare with a JSON baseline")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed throughput drop / p95 increase before flagging")
+    args = parser.parse_args()
+
+    layers = [layer.strip() for layer in args.layers.split(',')]
+    for layer in layers:
+        if layer not in LAYERS:
+            parser.error(f"unknown layer {layer!r}")
+    config = {
+        'users': args.users, 'tasks': args.tasks, 'ops': args.ops, 'mix': args.mix, 'seed': args.seed,
+        'completed_ratio': args.completed_ratio, 'due_ratio': args.due_ratio, 'due_days': args.due_days,
+        'priority_ratio': args.priority_ratio, 'profile': args.profile, 'repeat': args.repeat,
+    }
+    results = {
+        'meta': {
+            'commit': _git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'config': config,
+        'layers': {},
+    }
+    print(f"{args.users} users, {args.tasks} tasks, {args.ops} ops per layer")
+    for layer in layers:
+        #Quedarse con la corrida más rápida reduce el ruido al comparar
+        result = max((run_layer(layer, config) for _ in range(args.repeat)), key=lambda run: run['throughput'])
+        results['layers'][layer] = result
+        rss = f"{result['peak_rss_mb']:.1f} MB" if result['peak_rss_mb'] is not None else 'n/a'
+        print(f"\n{layer}: {result['throughput']:,.0f} ops/s, peak RSS {rss}")
+        for kind, stats in result['latency_ms'].items():
+            print(f"  {kind:13} n={stats['n']:>6}  p50 {stats['p50']:9.3f} ms  p95 {stats['p95']:9.3f} ms  p99 {stats['p99']:9.3f} ms")
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"\nbaseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
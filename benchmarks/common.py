@@ -0,0 +1,91 @@
+#Utilidades compartidas por los benchmarks
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+try:
+    import resource
+except ImportError:
+    #Windows no tiene el módulo resource
+    resource = None
+
+from src.clock_implementations import MockClock
+
+#Fecha fija para que los datos sembrados sean reproducibles
+BENCH_NOW = datetime(2025, 12, 14, 17, 00, 00)
+
+
+def temp_db_path(prefix='bench'):
+    "Devuelve la ruta a un archivo SQLite nuevo dentro de un directorio temporal"
+    directory = tempfile.mkdtemp(prefix=f'{prefix}_')
+    return os.path.join(directory, f'{prefix}.db')
+
+
+def bench_clock():
+    return MockClock(BENCH_NOW)
+
+
+def seed_database(repository, users, tasks, seed=0, completed_ratio=0.5, due_ratio=0.8, priority_ratio=0.1, due_days=(-30, 30)):
+    "Siembra users usuarios y tasks tareas repartidas al azar (vencimientos uniformes en due_days días desde BENCH_NOW). Devuelve la lista de user_ids"
+    rng = random.Random(seed)
+    conn = repository.conn
+    conn.executemany(
+        f"INSERT INTO {repository.USERS_TABLE_NAME} (username) VALUES (?)",
+        ((f'user{i}',) for i in range(users))
+    )
+    user_ids = [row[0] for row in conn.execute(f"SELECT id FROM {repository.USERS_TABLE_NAME}")]
+
+    def rows():
+        for i in range(tasks):
+            due_date = None
+            if rng.random() < due_ratio:
+                due_date = repository._to_db_format(BENCH_NOW + timedelta(days=rng.randint(*due_days)))
+            yield (
+                rng.choice(user_ids),
+                f'task {i}',
+                1 if rng.random() < completed_ratio else 0,
+                due_date,
+                1 if rng.random() < priority_ratio else 0,
+                0,
+                0,
+            )
+    conn.executemany(
+        f"INSERT INTO {repository.TABLE_NAME} (user_id, description, completed, due_date, priority, recurrency, recurrency_days) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows()
+    )
+    conn.commit()
+    return user_ids
+
+
+def time_calls(fn, args_list):
+    "Ejecuta fn(*args) para cada args y devuelve las latencias en segundos"
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, p):
+    "Percentil p (0-100) por el método del rango más cercano"
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def format_ms(seconds):
+    return f"{seconds * 1000:.3f} ms"
+
+
+def peak_rss_mb():
+    "Pico de memoria residente del proceso en MB (None si la plataforma no lo informa)"
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #Linux lo da en KB, macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
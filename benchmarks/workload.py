@@ -0,0 +1,142 @@
+#Generador de cargas sintéticas: la misma secuencia de operaciones contra cualquier capa del stack
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.common import BENCH_NOW
+
+OPERATIONS = ('create', 'list_pending', 'list_overdue', 'complete', 'toggle')
+DEFAULT_MIX = {'create': 0.2, 'list_pending': 0.3, 'list_overdue': 0.2, 'complete': 0.15, 'toggle': 0.15}
+
+
+def parse_mix(text):
+    "'create=2,list_pending=3' -> {'create': 2.0, 'list_pending': 3.0}. Los pesos no tienen que sumar 1"
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def pending_task_ids(repository):
+    "user_id -> ids de sus tareas pendientes, leído directo de la base sembrada"
+    pending = {}
+    for task_id, user_id in repository.conn.execute(f"SELECT id, user_id FROM {repository.TABLE_NAME} WHERE completed = 0 ORDER BY id"):
+        pending.setdefault(user_id, []).append(task_id)
+    return pending
+
+
+class RepositoryDriver:
+    "Operaciones de la carga sobre TaskRepository directamente"
+    def __init__(self, repository):
+        self.repository = repository
+
+    def create(self, user, description, due_date, priority):
+        return self.repository.add_task_by_user_id_global(description, user[0], due_date, priority)
+
+    def list_pending(self, user):
+        return self.repository.get_pending_tasks_by_user_id_global(user[0])
+
+    def list_overdue(self, user):
+        return self.repository.get_overdue_tasks_by_user_id_global(user[0])
+
+    def complete(self, user, task_id):
+        return self.repository.complete_task_global(task_id, user[0])
+
+    def toggle(self, user, task_id):
+        return self.repository.change_task_priority_global(task_id, user[0])
+
+
+class ManagerDriver:
+    "Operaciones de la carga sobre TaskManager (validaciones y transacciones incluidas)"
+    def __init__(self, manager):
+        self.manager = manager
+
+    def create(self, user, description, due_date, priority):
+        return self.manager.add_task_for_user(description, user[0], due_date, priority)
+
+    def list_pending(self, user):
+        return self.manager.get_pending_tasks_for_user(user[0])
+
+    def list_overdue(self, user):
+        return self.manager.get_overdue_tasks_by_user_id_global(user[0])
+
+    def complete(self, user, task_id):
+        return self.manager.complete_task_for_user(task_id, user[0])
+
+    def toggle(self, user, task_id):
+        return self.manager.change_task_priority_for_user(user[0], task_id)
+
+
+class FacadeDriver:
+    "Operaciones de la carga sobre TaskManagerCliFacade (por username)"
+    def __init__(self, facade):
+        self.facade = facade
+
+    def create(self, user, description, due_date, priority):
+        return self.facade.create_task(user[1], description, due_date, priority)
+
+    def list_pending(self, user):
+        return self.facade.list_pending_tasks(user[1])
+
+    def list_overdue(self, user):
+        return self.facade.list_overdue_tasks(user[1])
+
+    def complete(self, user, task_id):
+        return self.facade.complete_task(user[1], task_id)
+
+    def toggle(self, user, task_id):
+        return self.facade.update_task_priority(user[1], task_id)
+
+
+class Workload:
+    """Reproducible mix of operations. With the same seed and the same seeded database,
+    every driver receives exactly the same calls"""
+    def __init__(self, mix=None, seed=0, due_ratio=0.8, priority_ratio=0.1, due_days=(-30, 30)):
+        mix = dict(DEFAULT_MIX if mix is None else mix)
+        self.kinds = [kind for kind in OPERATIONS if mix.get(kind, 0) > 0]
+        if not self.kinds:
+            raise ValueError("The mix needs at least one operation with positive weight")
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.seed = seed
+        self.due_ratio = due_ratio
+        self.priority_ratio = priority_ratio
+        self.due_days = due_days
+
+    def run(self, driver, users, pending, ops):
+        """Runs ops operations. users: list of (user_id, username); pending: user_id -> pending task ids
+        (modified while running). Returns (latencies per operation in seconds, total seconds)"""
+        rng = random.Random(self.seed)
+        latencies = {kind: [] for kind in self.kinds}
+        total = 0.0
+        for i in range(ops):
+            kind = rng.choices(self.kinds, self.weights)[0]
+            user = rng.choice(users)
+            pool = pending.setdefault(user[0], [])
+            #Sin pendientes no hay nada que completar ni marcar: se crea una
+            if kind in ('complete', 'toggle') and not pool:
+                kind = 'create'
+                latencies.setdefault(kind, [])
+            #Los argumentos se eligen fuera de la medición
+            if kind == 'create':
+                due_date = BENCH_NOW + timedelta(days=rng.randint(*self.due_days)) if rng.random() < self.due_ratio else None
+                args = (user, f'workload task {i}', due_date, rng.random() < self.priority_ratio)
+            elif kind == 'complete':
+                index = rng.randrange(len(pool))
+                pool[index], pool[-1] = pool[-1], pool[index]
+                args = (user, pool.pop())
+            elif kind == 'toggle':
+                args = (user, rng.choice(pool))
+            else:
+                args = (user,)
+            start = time.perf_counter()
+            result = getattr(driver, kind)(*args)
+            elapsed = time.perf_counter() - start
+            latencies[kind].append(elapsed)
+            total += elapsed
+            if kind == 'create':
+                pool.append(result)
+        return latencies, total
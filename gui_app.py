@@ -1,3 +1,5 @@
+import atexit
+import os
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 from datetime import datetime
@@ -10,23 +12,55 @@ from src.task_manager import (
     TaskNotFoundError, UserIdNotFoundError, UsernameNotFoundError, Task
 )
 from src.task_repository import TaskRepository
+from src.query_stats import QueryStats, LoggingSink
+from src.tracing import Tracer, trace_stack
+from src.caching_repository import CachingRepository
 from src.clock_implementations import SystemClock 
-from src.cli_facade import TaskManagerCliFacade 
+from src.cli_facade import TaskManagerCliFacade
+from src.recurrence_engine import RecurrenceEngine
+from src.background_executor import BackgroundExecutor
+from src.task_list_view_model import TaskListViewModel
 
 # --- CONFIGURACIÓN GLOBAL ---
 DB_NAME = 'elias_taskmanager_v2.db'
 DATE_FORMAT = '%Y-%m-%d'
+PAGE_SIZE = 100 # Tareas por página al hacer scroll
+WORKER_POLL_MS = 50 # Cada cuánto el main loop recoge resultados del worker
+DB_PROFILE = os.environ.get('TASKMANAGER_DB_PROFILE', 'balanced') # durable | balanced | fast
+DB_EPOCH_DUE_DATES = os.environ.get('TASKMANAGER_EPOCH_DUE_DATES') == '1' # Fechas como segundos epoch (opt-in)
+SLOW_QUERY_MS = os.environ.get('TASKMANAGER_SLOW_QUERY_MS') # Slow-query log (opt-in), umbral en ms
+# Una sola QueryStats para todas las conexiones (UI y worker)
+QUERY_STATS = QueryStats(float(SLOW_QUERY_MS), [LoggingSink()]) if SLOW_QUERY_MS else None
+TRACE_PATH = os.environ.get('TASKMANAGER_TRACE') # Trazas por operación (opt-in): collapsed stack al salir
+TRACER = Tracer(enabled=True) if TRACE_PATH else None
+DB_TASK_COUNTERS = os.environ.get('TASKMANAGER_TASK_COUNTERS') == '1' # Contadores por usuario con triggers (opt-in)
+if TRACER is not None:
+    atexit.register(TRACER.write_collapsed, TRACE_PATH)
+
+def create_facade():
+    """Crea una fachada con su propia conexión (las conexiones sqlite3 no se comparten entre hilos)."""
+    clock = SystemClock()
+    repository = TaskRepository(DB_NAME, clock, memory=False, profile=DB_PROFILE, epoch_due_dates=DB_EPOCH_DUE_DATES, query_stats=QUERY_STATS, task_counters=DB_TASK_COUNTERS)
+    #Cada fachada escribe y lee por su propia conexión, así que su cache ve todas sus escrituras
+    repository = CachingRepository(repository)
+    manager = TaskManager(repository, RecurrenceEngine(repository, clock))
+    facade = TaskManagerCliFacade(manager)
+    if TRACER is not None:
+        trace_stack(facade, TRACER)
+    return facade
+
+def close_facade(facade: TaskManagerCliFacade):
+    facade.manager.repository.close()
 
 def setup_application():
     """Configura e inyecta todas las dependencias."""
-    clock = SystemClock()
-    repository = TaskRepository(DB_NAME, clock, memory=False) 
-    manager = TaskManager(repository)
-    facade = TaskManagerCliFacade(manager) 
-    return facade, repository
+    facade = create_facade()
+    #Recurrentes completadas mientras la app estaba cerrada
+    facade.manager.sweep_recurring_tasks()
+    return facade, facade.manager.repository
 
 class TaskManagerGUI(tk.Tk):
-    def __init__(self, facade: TaskManagerCliFacade, repository: TaskRepository):
+    def __init__(self, facade: TaskManagerCliFacade, repository: TaskRepository, worker: Optional[BackgroundExecutor] = None):
         super().__init__()
         self.title("Sistema de Gestión de Tareas v2")
         self.geometry("800x600")
@@ -34,6 +68,8 @@ class TaskManagerGUI(tk.Tk):
         self.facade = facade
         self.repository = repository
         self.current_user = None # Guarda el nombre del usuario logueado
+        # Worker con su propia fachada/conexión: las llamadas lentas no congelan la ventana
+        self.worker = worker if worker is not None else BackgroundExecutor(create_facade, close_facade)
         
         self.frames = {}
         for F in (LoginPage, TaskPage):
@@ -46,6 +82,18 @@ class TaskManagerGUI(tk.Tk):
         self.grid_columnconfigure(0, weight=1)
 
         self.show_frame("LoginPage")
+        self.after(WORKER_POLL_MS, self.poll_worker)
+
+    def poll_worker(self):
+        """Entrega en el hilo de Tk los resultados del worker y actualiza el indicador de ocupado."""
+        self.worker.poll()
+        self.frames["TaskPage"].set_busy(self.worker.is_busy())
+        self.after(WORKER_POLL_MS, self.poll_worker)
+
+    def run_in_background(self, job, on_success=None, on_error=None, key=None):
+        """job(facade) corre en el worker; los callbacks vuelven al main loop."""
+        self.worker.submit(job, on_success, on_error, key)
+        self.frames["TaskPage"].set_busy(True)
 
     def show_frame(self, page_name: str):
         frame = self.frames[page_name]
@@ -56,7 +104,7 @@ class TaskManagerGUI(tk.Tk):
     def login(self, username: str):
         try:
             # Intenta obtener el ID; si falla, el usuario no existe.
-            self.facade.manager.get_user_id_by_username(username)
+            self.facade.get_user_id(username)
             self.current_user = username
             self.show_frame("TaskPage")
         except UsernameNotFoundError:
@@ -106,11 +154,21 @@ class TaskPage(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.task_map = {} # {id: Task object} para mapear la lista
+        # Filas por id de tarea: solo se tocan en la Listbox las que cambian
+        self.view_model = TaskListViewModel(self.format_task)
+        self.last_loaded_id = None # Keyset: id de la última tarea cargada
+        self.has_more_pages = False
+        self.loading_page = False
         
         tk.Label(self, text="MIS TAREAS PENDIENTES", font=('Arial', 14, 'bold')).pack(pady=10)
         self.user_label = tk.Label(self, text="", font=('Arial', 10))
         self.user_label.pack()
+        # Resumen de la cabecera: todos los contadores en una sola consulta
+        self.summary_label = tk.Label(self, text="", font=('Arial', 9))
+        self.summary_label.pack()
+        # Indicador de ocupado mientras el worker trabaja
+        self.busy_label = tk.Label(self, text="", font=('Arial', 9, 'italic'), fg='gray')
+        self.busy_label.pack()
 
         # Frame de la lista de tareas
         list_frame = tk.Frame(self)
@@ -122,7 +180,9 @@ class TaskPage(tk.Frame):
         scrollbar = tk.Scrollbar(list_frame, orient="vertical")
         scrollbar.config(command=self.task_list.yview)
         scrollbar.pack(side="right", fill="y")
-        self.task_list.config(yscrollcommand=scrollbar.set)
+        self.scrollbar = scrollbar
+        # Al acercarnos al final de la lista cargamos la página siguiente
+        self.task_list.config(yscrollcommand=self.on_list_scroll)
         
         # Frame para botones de acción
         action_frame = tk.Frame(self)
@@ -142,35 +202,96 @@ class TaskPage(tk.Frame):
         """Carga y muestra las tareas pendientes del usuario actual."""
         username = self.controller.current_user
         self.user_label.config(text=f"Sesión: {username} {'(MODO PRIORIDAD)' if priority_mode else ''}")
-        self.task_list.delete(0, tk.END)
+        self.has_more_pages = False
+        self.loading_page = False
         
-        try:
-            if priority_mode:
-                tasks = self.controller.facade.list_priority_tasks(username)
+        if priority_mode:
+            job = lambda facade: facade.list_priority_tasks(username)
+            on_success = lambda tasks: self.show_tasks(tasks, paged=False)
+        else:
+            # Recargamos tantas filas como ya se veían (mínimo una página); el resto llega al hacer scroll
+            limit = max(PAGE_SIZE, len(self.view_model))
+            job = lambda facade: facade.list_pending_tasks_page(username, limit=limit)
+            on_success = lambda tasks: self.show_tasks(tasks, paged=len(tasks) == limit)
+        # key: una recarga nueva descarta cualquier carga anterior que siga en vuelo
+        self.controller.run_in_background(job, on_success, self.show_load_error, key='task_list')
+        self.load_summary()
+
+    def load_summary(self):
+        """Pide al worker los contadores de la cabecera."""
+        username = self.controller.current_user
+        job = lambda facade: facade.get_task_summary(username)
+        self.controller.run_in_background(job, self.show_summary, self.show_load_error, key='task_summary')
+
+    def show_summary(self, summary):
+        self.summary_label.config(text=f"Pendientes: {summary.pending} | Vencidas: {summary.overdue} | Prioritarias: {summary.priority} | "
+                                       f"Recurrentes: {summary.recurring} | Completadas: {summary.completed}")
+
+    def show_tasks(self, tasks, paged: bool):
+        """Muestra exactamente tasks, aplicando solo las filas que cambiaron."""
+        selected_id = self.current_selected_id()
+        self.apply_operations(self.view_model.replace(tasks), selected_id)
+        self.after_page_loaded(paged)
+
+    def append_page(self, tasks):
+        selected_id = self.current_selected_id()
+        self.apply_operations(self.view_model.append(tasks), selected_id)
+        self.after_page_loaded(len(tasks) == PAGE_SIZE)
+
+    def after_page_loaded(self, has_more: bool):
+        self.loading_page = False
+        self.has_more_pages = has_more
+        self.last_loaded_id = self.view_model.task_id_at(len(self.view_model) - 1) if len(self.view_model) else None
+
+    def apply_operations(self, operations, selected_id: Optional[int] = None):
+        """Aplica en la Listbox los cambios calculados por el view model y restaura la selección."""
+        for operation in operations:
+            if operation[0] == 'delete':
+                self.task_list.delete(operation[1])
+            elif operation[0] == 'insert':
+                self.task_list.insert(operation[1], operation[2])
             else:
-                tasks = self.controller.facade.list_pending_tasks(username)
+                self.task_list.delete(operation[1])
+                self.task_list.insert(operation[1], operation[2])
+        if selected_id is not None and self.view_model.index_of(selected_id) is not None:
+            self.task_list.selection_set(self.view_model.index_of(selected_id))
+
+    def show_load_error(self, error):
+        self.loading_page = False
+        messagebox.showerror("Error de Carga", f"No se pudieron cargar las tareas: {error}")
+
+    def on_list_scroll(self, first, last):
+        """yscrollcommand de la lista: mueve la scrollbar y pide más tareas cerca del final."""
+        self.scrollbar.set(first, last)
+        if self.has_more_pages and not self.loading_page and float(last) >= 0.9:
+            self.loading_page = True
+            self.load_next_page()
+
+    def load_next_page(self):
+        """Pide al worker la siguiente página de tareas pendientes (keyset sobre id)."""
+        username = self.controller.current_user
+        after_id = self.last_loaded_id
+        job = lambda facade: facade.list_pending_tasks_page(username, after_id=after_id, limit=PAGE_SIZE)
+        self.controller.run_in_background(job, self.append_page, self.show_load_error, key='task_list')
 
-            self.task_map = {} 
-            
-            for task in tasks:
-                task_id = task.get_id()
-                due_date_str = task.get_due_date().strftime(DATE_FORMAT) if task.get_due_date() else 'N/A'
-                
-                # AÑADIMOS INDICADORES VISUALES
-                priority_flag = "⭐" if task.is_priority() else " "
-                # CORREGIDO para usar el método is_recurrency()
-                recurrent_flag = "🔁" if task.is_recurrency() else " " 
-                recurrency_days = 0
-                if task.is_recurrency():
-                    recurrency_days = task.recurrency_days
-                else:
-                    recurrency_days = 0
-                display_text = f"[{task_id:4}] {priority_flag} {recurrent_flag} {recurrency_days} | VENCE: {due_date_str:10} | {task.get_description()}"
-                self.task_list.insert(tk.END, display_text)
-                self.task_map[task_id] = task
-                
-        except Exception as e:
-            messagebox.showerror("Error de Carga", f"No se pudieron cargar las tareas: {e}")
+    def set_busy(self, busy: bool):
+        self.busy_label.config(text="⏳ Cargando..." if busy else "")
+        self.config(cursor="watch" if busy else "")
+
+    def format_task(self, task: Task) -> str:
+        task_id = task.get_id()
+        due_date_str = task.get_due_date().strftime(DATE_FORMAT) if task.get_due_date() else 'N/A'
+        
+        # AÑADIMOS INDICADORES VISUALES
+        priority_flag = "⭐" if task.is_priority() else " "
+        # CORREGIDO para usar el método is_recurrency()
+        recurrent_flag = "🔁" if task.is_recurrency() else " " 
+        recurrency_days = 0
+        if task.is_recurrency():
+            recurrency_days = task.recurrency_days
+        else:
+            recurrency_days = 0
+        return f"[{task_id:4}] {priority_flag} {recurrent_flag} {recurrency_days} | VENCE: {due_date_str:10} | {task.get_description()}"
 
     def list_priority_tasks(self):
         """Muestra solo las tareas prioritarias pendientes."""
@@ -181,20 +302,15 @@ class TaskPage(tk.Frame):
         if not selection:
             messagebox.showwarning("Advertencia", "Selecciona una tarea de la lista.")
             return None
-        
-        # El ID está en los primeros caracteres: [ID: XXXX]
-        selected_text = self.task_list.get(selection[0])
-        # Intentamos obtener el número entre corchetes
-        try:
-            task_id_str = selected_text.split('[')[1].split(']')[0].strip()
-            task_id = int(task_id_str)
-            return task_id
-        except IndexError:
-            messagebox.showerror("Error", "No se pudo parsear el ID de la tarea seleccionada.")
-            return None
-        except ValueError:
-            messagebox.showerror("Error", "ID de tarea no válido.")
+        # La fila seleccionada se mapea al id por índice, sin parsear el texto
+        return self.view_model.task_id_at(selection[0])
+
+    def current_selected_id(self) -> Optional[int]:
+        """Id seleccionado (sin avisos), para conservar la selección entre recargas."""
+        selection = self.task_list.curselection()
+        if not selection:
             return None
+        return self.view_model.task_id_at(selection[0])
         
     def complete_task(self):
         task_id = self.get_selected_task_id()
@@ -202,12 +318,17 @@ class TaskPage(tk.Frame):
 
         username = self.controller.current_user
         if messagebox.askyesno("Confirmar", f"¿Completar tarea {task_id}?"):
-            try:
-                self.controller.facade.complete_task(username, task_id)
+            def on_success(_):
                 messagebox.showinfo("Éxito", f"Tarea {task_id} marcada como completada.")
                 self.load_tasks() 
-            except (AuthenticationError, TaskNotFoundError) as e:
-                messagebox.showerror("Error de Acción", str(e))
+
+            def on_error(e):
+                if isinstance(e, (AuthenticationError, TaskNotFoundError)):
+                    messagebox.showerror("Error de Acción", str(e))
+                else:
+                    messagebox.showerror("Error", f"Error al completar la tarea: {e}")
+
+            self.controller.run_in_background(lambda facade: facade.complete_task(username, task_id), on_success, on_error)
                 
     def toggle_flag(self, flag_name: str):
         """Método unificado para alternar el estado de prioridad o recurrencia."""
@@ -216,23 +337,26 @@ class TaskPage(tk.Frame):
 
         username = self.controller.current_user
         
-        try:
-            if flag_name == 'priority':
-                self.controller.facade.update_task_priority(username, task_id)
-                action = "Prioridad"
-            elif flag_name == 'recurrency':
-                self.controller.facade.update_task_recurrency(username, task_id)
-                action = "Recurrencia"
-            else:
-                return
+        if flag_name == 'priority':
+            job = lambda facade: facade.update_task_priority(username, task_id)
+            action = "Prioridad"
+        elif flag_name == 'recurrency':
+            job = lambda facade: facade.update_task_recurrency(username, task_id)
+            action = "Recurrencia"
+        else:
+            return
 
+        def on_success(_):
             messagebox.showinfo("Éxito", f"{action} de tarea {task_id} alternada.")
             self.load_tasks() # Recargar la lista para ver el cambio
-            
-        except (AuthenticationError, TaskNotFoundError, UserIdNotFoundError) as e:
-            messagebox.showerror("Error de Seguridad", str(e))
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al alternar {flag_name}: {e}")
+
+        def on_error(e):
+            if isinstance(e, (AuthenticationError, TaskNotFoundError, UserIdNotFoundError)):
+                messagebox.showerror("Error de Seguridad", str(e))
+            else:
+                messagebox.showerror("Error", f"Error al alternar {flag_name}: {e}")
+
+        self.controller.run_in_background(job, on_success, on_error)
 
     def open_create_dialog(self):
         CreateTaskDialog(self, self.controller)
@@ -306,28 +430,38 @@ class CreateTaskDialog(simpledialog.Dialog):
             recurrency_days = 0 
 
 
-        try:
-            # NOTA: Asumimos que cli_facade.create_task ahora acepta los argumentos recurrency y recurrency_days
-            self.controller.facade.create_task(
-                username=self.controller.current_user,
-                description=description,
-                due_date=due_date,
-                priority=priority,
-                recurrency=recurrency,
-                recurrency_days=recurrency_days # Pasamos la cantidad de días al Manager
-            )
+        username = self.controller.current_user
+        task_page = self.controller.frames["TaskPage"]
+
+        def on_success(_):
             messagebox.showinfo("Éxito", "Tarea creada exitosamente.")
-            self.controller.frames["TaskPage"].load_tasks()
-        except Exception as e:
+            task_page.load_tasks()
+
+        def on_error(e):
             messagebox.showerror("Error", f"Error al crear la tarea: {e}")
 
+        # NOTA: Asumimos que cli_facade.create_task ahora acepta los argumentos recurrency y recurrency_days
+        job = lambda facade: facade.create_task(
+            username=username,
+            description=description,
+            due_date=due_date,
+            priority=priority,
+            recurrency=recurrency,
+            recurrency_days=recurrency_days # Pasamos la cantidad de días al Manager
+        )
+        self.controller.run_in_background(job, on_success, on_error)
+
 
 # --- EJECUCIÓN ---
 if __name__ == '__main__':
     facade, repo = setup_application()
+    app = None
     try:
         app = TaskManagerGUI(facade, repo)
         app.mainloop()
     finally:
         print(f"Cerrando conexión a la base de datos: {DB_NAME}")
+        if app is not None:
+            # Cierra también la conexión propia del worker
+            app.worker.shutdown()
         repo.close()
\ No newline at end of file
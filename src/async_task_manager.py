@@ -0,0 +1,49 @@
+#TaskManager asyncio: misma API que TaskManager, con async def
+from .task_manager import TaskManager
+
+
+class AsyncTaskManager:
+    """async def mirror of TaskManager.
+
+    Each call runs the synchronous TaskManager method through an AsyncTaskRepository:
+    reads on its reader pool, writes on its writer thread (one SAVEPOINT per call,
+    so a call that raises, e.g. AuthenticationError, only rolls back itself).
+    To make several operations atomic, pass a function to run_write.
+    The manager must be built over the same (pooled) repository.
+    """
+    def __init__(self, manager, async_repository):
+        if manager.overdue_scheduler is not None:
+            #El scheduler no es thread-safe: lectores y escritor lo tocarían a la vez
+            raise ValueError("AsyncTaskManager no soporta overdue_scheduler")
+        self.manager = manager
+        self.async_repository = async_repository
+
+    async def run_read(self, fn, *args, **kwargs):
+        return await self.async_repository.run_read(fn, *args, **kwargs)
+
+    async def run_write(self, fn, *args, **kwargs):
+        "fn(manager, *args) corre atómica en el escritor"
+        return await self.async_repository.run_write(fn, self.manager, *args, **kwargs)
+
+    async def close(self):
+        await self.async_repository.close()
+
+
+def _read_method(name):
+    async def method(self, *args, **kwargs):
+        return await self.async_repository.run_read(getattr(self.manager, name), *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+def _write_method(name):
+    async def method(self, *args, **kwargs):
+        return await self.async_repository.run_write(getattr(self.manager, name), *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+for _name in TaskManager.READ_METHODS:
+    setattr(AsyncTaskManager, _name, _read_method(_name))
+for _name in TaskManager.WRITE_METHODS:
+    setattr(AsyncTaskManager, _name, _write_method(_name))
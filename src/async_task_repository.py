@@ -0,0 +1,92 @@
+#Repositorio asyncio: el trabajo SQLite corre en hilos, el event loop nunca se bloquea
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from .group_commit_writer import GroupCommitWriter
+
+#Métodos de TaskRepository que se exponen como async def
+READ_METHODS = (
+    'has_tasks', 'users_count', 'contains_user_by_id', 'contains_user_by_username', 'get_user_name_by_id',
+    'get_user_id_by_username', 'get_task_by_id_global', 'get_pending_tasks_by_user_id_global',
+    'get_overdue_tasks_by_user_id_global', 'get_pending_tasks_page', 'contains_task_by_user_id',
+    'task_is_completed_global', 'tasks_count_by_user_id', 'search_tasks', 'get_user_task_summary', 'get_all_user_summaries',
+)
+WRITE_METHODS = (
+    'add_user', 'update_user_name_of', 'add_task_by_user_id_global', 'add_tasks_bulk', 'complete_task_global',
+    'change_task_priority_global', 'change_task_recurrency_global', 'complete_tasks_bulk', 'update_task_due_date_global',
+    'update_task_description_global', 'delete_task_global', 'delete_tasks_bulk', 'materialize_recurring_tasks',
+)
+
+
+class AsyncTaskRepository:
+    """async def mirror of a PooledTaskRepository.
+
+    - Reads run on a bounded thread pool (each thread has its own WAL reader connection).
+    - Writes go to a GroupCommitWriter: one writer thread takes every write waiting
+      in the queue (up to max_batch, or what arrives within max_delay_ms), runs each
+      one in its own SAVEPOINT and commits them all at once. A failing write only
+      rolls back itself. The awaitable resolves after the commit.
+    - At most max_pending operations are in flight; beyond that callers wait
+      (backpressure) instead of growing the queues without bound.
+    """
+    def __init__(self, repository, read_workers=4, max_pending=256, max_batch=128, max_delay_ms=0):
+        self.repository = repository
+        self.writer = GroupCommitWriter(repository, max_delay_ms, max_batch)
+        self._read_executor = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix='task-reader')
+        self._pending = asyncio.Semaphore(max_pending)
+        #Operaciones aceptadas que todavía no terminaron (nunca más de max_pending)
+        self.in_flight = 0
+
+    #Estadísticas del escritor
+    @property
+    def writes(self):
+        return self.writer.writes
+
+    @property
+    def commits(self):
+        return self.writer.commits
+
+    async def run_read(self, fn, *args, **kwargs):
+        "Ejecuta fn(*args) en el pool de lectura"
+        async with self._pending:
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._read_executor, lambda: fn(*args, **kwargs))
+            finally:
+                self.in_flight -= 1
+
+    async def run_write(self, fn, *args, **kwargs):
+        "Encola fn(*args) para el escritor. fn corre atómica (su propio SAVEPOINT) y se espera hasta el commit"
+        async with self._pending:
+            self.in_flight += 1
+            try:
+                return await asyncio.wrap_future(self.writer.submit(fn, *args, **kwargs))
+            finally:
+                self.in_flight -= 1
+
+    async def close(self):
+        "Espera las escrituras encoladas, frena los hilos y cierra las conexiones"
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.writer.close)
+        self._read_executor.shutdown(wait=True)
+        self.repository.close()
+
+
+def _read_method(name):
+    async def method(self, *args, **kwargs):
+        return await self.run_read(getattr(self.repository, name), *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+def _write_method(name):
+    async def method(self, *args, **kwargs):
+        return await self.run_write(getattr(self.repository, name), *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+for _name in READ_METHODS:
+    setattr(AsyncTaskRepository, _name, _read_method(_name))
+for _name in WRITE_METHODS:
+    setattr(AsyncTaskRepository, _name, _write_method(_name))
@@ -0,0 +1,92 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+class BackgroundExecutor:
+    """Runs jobs on a single worker thread that owns its own resource.
+
+    sqlite3 connections are bound to the thread that created them, so the
+    resource (e.g. a facade with its own TaskRepository) is built on the
+    worker by resource_factory. Callbacks never run on the worker: they are
+    delivered by poll(), which the GUI calls from its main loop.
+    """
+    def __init__(self, resource_factory, resource_closer=None):
+        self._resource_factory = resource_factory
+        self._resource_closer = resource_closer
+        self._resource = None
+        self._results = queue.Queue()
+        #key -> generación del último submit con esa key (los anteriores quedan viejos)
+        self._generations = {}
+        self._pending = {}
+        self._in_flight = 0
+        self._shut_down = False
+        self._executor = ThreadPoolExecutor(max_workers=1, initializer=self._create_resource)
+
+    def _create_resource(self):
+        self._resource = self._resource_factory()
+
+    def _run(self, job):
+        return job(self._resource)
+
+    def submit(self, job, on_success=None, on_error=None, key=None):
+        """Runs job(resource) on the worker. A new submit with the same key cancels the previous one
+        if it has not started, and discards its result if it has."""
+        generation = None
+        if key is not None:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            previous = self._pending.pop(key, None)
+            if previous is not None:
+                previous.cancel()
+        future = self._executor.submit(self._run, job)
+        self._in_flight += 1
+        if key is not None:
+            self._pending[key] = future
+        #Se llama en el worker: solo encolamos, el callback real corre en poll()
+        future.add_done_callback(lambda done: self._results.put((key, generation, done, on_success, on_error)))
+        return future
+
+    def poll(self):
+        "Delivers every finished job to its callbacks. Call it from the thread that owns the UI"
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return
+            self._deliver(*result)
+
+    def wait(self, timeout=None):
+        "Blocks until every submitted job has been delivered"
+        while self._in_flight:
+            self._deliver(*self._results.get(timeout=timeout))
+
+    def is_busy(self):
+        return self._in_flight > 0
+
+    def shutdown(self):
+        "Cancels queued jobs and closes the resource on its own thread"
+        if self._shut_down:
+            return
+        self._shut_down = True
+        for future in self._pending.values():
+            future.cancel()
+        if self._resource_closer is not None:
+            self._executor.submit(self._run, self._resource_closer)
+        self._executor.shutdown(wait=True)
+
+    def _deliver(self, key, generation, future, on_success, on_error):
+        self._in_flight -= 1
+        if key is not None:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if self._generations.get(key) != generation:
+                #Resultado de una carga vieja: lo descartamos
+                return
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            return
+        if on_success is not None:
+            on_success(future.result())
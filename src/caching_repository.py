@@ -0,0 +1,294 @@
+#Cache de lectura de pendientes por usuario
+from collections import OrderedDict
+from contextlib import contextmanager
+from src.repository_interface import AbstractRepository
+
+class _UserEntry:
+    "Lo cacheado de un usuario: la lista completa de pendientes y/o páginas sueltas"
+    __slots__ = ('pending', 'pages', 'size')
+    def __init__(self):
+        self.pending = None
+        #(after_id, limit, order) -> lista
+        self.pages = {}
+        #Tareas cacheadas (para el límite max_tasks)
+        self.size = 0
+
+    def task_lists(self):
+        if self.pending is not None:
+            yield self.pending
+        yield from self.pages.values()
+
+
+class CachingRepository(AbstractRepository):
+    """Read-through cache of per-user pending lists in front of another repository.
+
+    - Pending lists and pending pages are memoized per user. Overdue lists are
+      derived from the cached pending list with the current clock (due_date < now,
+      same rule as the SQL query), so they do not go stale as time passes.
+    - Every write invalidates only the user it can affect: user_id when given,
+      otherwise the owner of the task as seen in the cached lists. A task that is
+      not cached only matters when it comes back to pending (un-completing), and
+      then its owner is looked up.
+    - LRU eviction keeps at most max_users users and max_tasks cached tasks.
+    - An exception inside transaction() invalidates the users written during the
+      block (everything when an owner was unknown): their lists may hold rows that
+      were rolled back. A block that wrote nothing keeps the cache.
+    Lists are copies, but the Task objects are shared with the cache. Writes made
+    through another connection are not seen.
+    """
+    def __init__(self, repository, max_users=256, max_tasks=50000):
+        self.repository = repository
+        self.max_users = max_users
+        self.max_tasks = max_tasks
+        #user_id -> _UserEntry, del menos al más usado
+        self._entries = OrderedDict()
+        #task_id -> user_id de las tareas que aparecen en alguna lista cacheada
+        self._owners = {}
+        self._size = 0
+        #Usuarios escritos dentro de transaction() (todos si hubo un dueño desconocido)
+        self._transaction_depth = 0
+        self._touched_users = set()
+        self._touched_all = False
+        #Estadísticas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __getattr__(self, name):
+        #Todo lo que no se cachea (usuarios, close, conn, clock, ...) va directo al repositorio
+        return getattr(self.repository, name)
+
+    #Cache
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'users': len(self._entries),
+            'tasks': self._size,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self._owners.clear()
+        self._size = 0
+
+    def invalidate_user(self, user_id):
+        if self._transaction_depth:
+            self._touched_users.add(user_id)
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        self.invalidations += 1
+        self._forget(entry)
+
+    def _forget(self, entry):
+        for tasks in entry.task_lists():
+            for task in tasks:
+                self._owners.pop(task.get_id(), None)
+        self._size -= entry.size
+
+    def _invalidate_task(self, task_id, user_id=None):
+        "Invalida al dueño de la tarea si está cacheada. Devuelve si lo encontró"
+        owner = user_id if user_id is not None else self._owners.get(task_id)
+        if owner is None:
+            if self._transaction_depth:
+                self._touched_all = True
+            return False
+        self.invalidate_user(owner)
+        return True
+
+    def _lookup(self, user_id, key):
+        entry = self._entries.get(user_id)
+        tasks = None
+        if entry is not None:
+            tasks = entry.pending if key is None else entry.pages.get(key)
+        if tasks is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return tasks
+
+    def _store(self, user_id, key, tasks):
+        if len(tasks) > self.max_tasks:
+            return
+        entry = self._entries.get(user_id)
+        if entry is None:
+            entry = self._entries[user_id] = _UserEntry()
+        self._entries.move_to_end(user_id)
+        if key is None:
+            entry.pending = tasks
+        else:
+            entry.pages[key] = tasks
+        entry.size += len(tasks)
+        self._size += len(tasks)
+        for task in tasks:
+            self._owners[task.get_id()] = user_id
+        #Desalojamos los menos usados (nunca el que acabamos de guardar)
+        while len(self._entries) > 1 and (len(self._entries) > self.max_users or self._size > self.max_tasks):
+            oldest_user_id, oldest = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._forget(oldest)
+
+    def _cached_pending(self, user_id):
+        tasks = self._lookup(user_id, None)
+        if tasks is None:
+            tasks = self.repository.get_pending_tasks_by_user_id_global(user_id)
+            self._store(user_id, None, tasks)
+        return tasks
+
+    #Lecturas cacheadas
+    def get_pending_tasks_by_user_id_global(self, user_id=None, as_batch=False):
+        if user_id is None or as_batch:
+            return self.repository.get_pending_tasks_by_user_id_global(user_id, as_batch)
+        return list(self._cached_pending(user_id))
+
+    def get_overdue_tasks_by_user_id_global(self, user_id):
+        now = self.repository.clock.now()
+        return [task for task in self._cached_pending(user_id) if task.get_due_date() is not None and task.get_due_date() < now]
+
+    def get_pending_tasks_page(self, user_id, after_id=None, limit=50, order='asc'):
+        key = (after_id, limit, order)
+        tasks = self._lookup(user_id, key)
+        if tasks is None:
+            tasks = self.repository.get_pending_tasks_page(user_id, after_id, limit, order)
+            self._store(user_id, key, tasks)
+        return list(tasks)
+
+    #Lecturas sin cache
+    def _to_db_format(self, dt):
+        return self.repository._to_db_format(dt)
+
+    def _from_db_format(self, db_value):
+        return self.repository._from_db_format(db_value)
+
+    def get_task_by_id_global(self, task_id, user_id=None):
+        return self.repository.get_task_by_id_global(task_id, user_id)
+
+    def iter_pending_tasks(self, user_id=None, batch_size=500, after_id=0):
+        return self.repository.iter_pending_tasks(user_id, batch_size, after_id)
+
+    def iter_overdue_tasks(self, user_id=None, batch_size=500):
+        return self.repository.iter_overdue_tasks(user_id, batch_size)
+
+    def contains_task_by_user_id(self, task_id, user_id=None):
+        return self.repository.contains_task_by_user_id(task_id, user_id)
+
+    def task_is_completed_global(self, task_id, user_id=None):
+        return self.repository.task_is_completed_global(task_id, user_id)
+
+    def tasks_count_by_user_id(self, user_id):
+        return self.repository.tasks_count_by_user_id(user_id)
+
+    def get_user_task_summary(self, user_id):
+        return self.repository.get_user_task_summary(user_id)
+
+    def get_all_user_summaries(self):
+        return self.repository.get_all_user_summaries()
+
+    @contextmanager
+    def transaction(self):
+        self._transaction_depth += 1
+        try:
+            with self.repository.transaction():
+                yield self
+        except BaseException:
+            #Lo leído de los usuarios escritos en el bloque puede no haberse guardado
+            self._invalidate_touched()
+            raise
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._touched_users = set()
+                self._touched_all = False
+
+    def _invalidate_touched(self):
+        if self._touched_all:
+            self.clear()
+            return
+        for user_id in self._touched_users:
+            entry = self._entries.pop(user_id, None)
+            if entry is not None:
+                self._forget(entry)
+
+    #Escrituras: primero la escritura, después la invalidación
+    def add_task_by_user_id_global(self, description, user_id, due_date=None, priority=False, recurrency=False, recurrency_days=0):
+        task_id = self.repository.add_task_by_user_id_global(description, user_id, due_date, priority, recurrency, recurrency_days)
+        self.invalidate_user(user_id)
+        return task_id
+
+    def add_tasks_bulk(self, tasks):
+        tasks = list(tasks)
+        count = self.repository.add_tasks_bulk(tasks)
+        for user_id in {task[1] for task in tasks}:
+            self.invalidate_user(user_id)
+        return count
+
+    def complete_task_global(self, task_id, user_id=None):
+        found = self.repository.complete_task_global(task_id, user_id)
+        if found and not self._invalidate_task(task_id, user_id) and self._entries:
+            #No estaba cacheada como pendiente: puede haber vuelto a pendiente
+            task = self.repository.get_task_by_id_global(task_id)
+            if task is not None:
+                self.invalidate_user(task.user_id)
+        return found
+
+    def change_task_priority_global(self, task_id, user_id=None):
+        found = self.repository.change_task_priority_global(task_id, user_id)
+        if found:
+            self._invalidate_task(task_id, user_id)
+        return found
+
+    def change_task_recurrency_global(self, task_id, user_id=None):
+        found = self.repository.change_task_recurrency_global(task_id, user_id)
+        if found:
+            self._invalidate_task(task_id, user_id)
+        return found
+
+    def update_task_due_date_global(self, task_id, new_due_date, user_id=None):
+        found = self.repository.update_task_due_date_global(task_id, new_due_date, user_id)
+        if found:
+            self._invalidate_task(task_id, user_id)
+        return found
+
+    def update_task_description_global(self, task_id, new_description, user_id=None):
+        found = self.repository.update_task_description_global(task_id, new_description, user_id)
+        if found:
+            self._invalidate_task(task_id, user_id)
+        return found
+
+    def delete_task_global(self, task_id, user_id=None):
+        found = self.repository.delete_task_global(task_id, user_id)
+        if found:
+            self._invalidate_task(task_id, user_id)
+        return found
+
+    def complete_tasks_bulk(self, task_ids, user_id=None):
+        task_ids = list(task_ids)
+        count = self.repository.complete_tasks_bulk(task_ids, user_id)
+        #Completar en bloque nunca devuelve tareas a pendiente: alcanza con las cacheadas
+        for task_id in task_ids:
+            self._invalidate_task(task_id, user_id)
+        return count
+
+    def delete_tasks_bulk(self, task_ids, user_id=None):
+        task_ids = list(task_ids)
+        count = self.repository.delete_tasks_bulk(task_ids, user_id)
+        for task_id in task_ids:
+            self._invalidate_task(task_id, user_id)
+        return count
+
+    def materialize_recurring_tasks(self, now, task_ids=None):
+        created = self.repository.materialize_recurring_tasks(now, task_ids)
+        if created:
+            #Las ocurrencias nuevas son de usuarios que no sabemos: se invalida todo
+            self.invalidations += 1
+            self.clear()
+            if self._transaction_depth:
+                self._touched_all = True
+        return created
@@ -1,40 +1,79 @@
 from src.task_manager import *
+from src.user_id_cache import UserIdCache
 class TaskManagerCliFacade:
-    def __init__(self, manager: TaskManager):
+    def __init__(self, manager: TaskManager, user_id_cache: UserIdCache = None):
         self.manager = manager
+        #Cache username -> user_id. Se invalida sola cuando el manager crea o renombra usuarios
+        self.user_id_cache = user_id_cache if user_id_cache is not None else UserIdCache()
+        self.manager.add_user_listener(self.user_id_cache.invalidate)
     
     #User handling
     def create_user(self, username):
         return self.manager.add_user(username)
+
+    def get_user_id(self, username):
+        "Resuelve el username usando la cache; solo va al manager en un miss"
+        user_id = self.user_id_cache.get(username)
+        if user_id is None:
+            user_id = self.manager.get_user_id_by_username(username)
+            self.user_id_cache.put(username, user_id)
+        return user_id
     #Task creating
     def create_task(self, username, description, due_date = None, priority=False, recurrency=False, recurrency_days = 0):
-        user_id = self.manager.get_user_id_by_username(username)
-        return self.manager.add_task_for_user(description, user_id, due_date, priority, recurrency, recurrency_days)
+        #El user_id viene de resolver el username: ya sabemos que es válido
+        user_id = self.get_user_id(username)
+        return self.manager.add_task_by_user_id_global(description, user_id, due_date, priority, recurrency, recurrency_days)
+    def create_tasks_bulk(self, username, tasks):
+        user_id = self.get_user_id(username)
+        return self.manager.add_tasks_bulk_for_user(tasks, user_id)
     #Task removing
     def delete_task(self, username, task_id):
-        user_id = self.manager.get_user_id_by_username(username)
+        user_id = self.get_user_id(username)
         return self.manager.delete_task_for_user(task_id, user_id)
+    def delete_tasks_bulk(self, username, task_ids):
+        user_id = self.get_user_id(username)
+        return self.manager.delete_tasks_bulk_for_user(task_ids, user_id)
     #Task completing
     def complete_task(self, username, task_id):
-        user_id = self.manager.get_user_id_by_username(username)
+        user_id = self.get_user_id(username)
         return self.manager.complete_task_for_user(task_id, user_id)
+    def complete_tasks_bulk(self, username, task_ids):
+        user_id = self.get_user_id(username)
+        return self.manager.complete_tasks_bulk_for_user(task_ids, user_id)
     #List pending tasks
     def list_pending_tasks(self, username):
-        user_id = self.manager.get_user_id_by_username(username)
-        return self.manager.get_pending_tasks_for_user(user_id)
+        user_id = self.get_user_id(username)
+        return self.manager.get_pending_tasks_by_user_id_global(user_id)
+    def list_pending_tasks_page(self, username, after_id=None, limit=50, order='asc'):
+        "Page of pending tasks; pass the id of the last task received as after_id to get the next one"
+        user_id = self.get_user_id(username)
+        return self.manager.get_pending_tasks_page_by_user_id_global(user_id, after_id, limit, order)
+    def list_overdue_tasks(self, username):
+        user_id = self.get_user_id(username)
+        return self.manager.get_overdue_tasks_by_user_id_global(user_id)
+    #Search
+    def search_tasks_for_user(self, username, query, limit=50, offset=0):
+        "Ranked search over the user's task descriptions; pass offset=len(previous results) for the next page"
+        user_id = self.get_user_id(username)
+        return self.manager.search_tasks_for_user(user_id, query, limit, offset)
+    #Summary
+    def get_task_summary(self, username):
+        "Pending, overdue, priority, recurring and completed counts of the user, in one query"
+        user_id = self.get_user_id(username)
+        return self.manager.get_user_task_summary(user_id)
     #Update
     def update_task_description(self, username, task_id, new_description):
-        user_id = self.manager.get_user_id_by_username(username)
+        user_id = self.get_user_id(username)
         return self.manager.update_task_description_for_user(task_id, new_description, user_id)
     
     def update_task_date(self, username, task_id, new_date):
-        user_id = self.manager.get_user_id_by_username(username)
+        user_id = self.get_user_id(username)
         return self.manager.update_task_overdue_date_for_user(task_id, new_date, user_id)
     
     def update_task_priority(self, username, task_id):
-        user_id = self.manager.get_user_id_by_username(username)
+        user_id = self.get_user_id(username)
         return self.manager.change_task_priority_for_user(user_id, task_id)
 
     def update_task_recurrency(self, username, task_id):
-        user_id = self.manager.get_user_id_by_username(username)
+        user_id = self.get_user_id(username)
         return self.manager.change_task_recurrency_for_user(user_id, task_id)
\ No newline at end of file
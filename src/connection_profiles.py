@@ -0,0 +1,48 @@
+#Perfiles de conexión SQLite: cuánto durabilidad cambiamos por velocidad
+
+class ConnectionProfile:
+    "Set of PRAGMAs applied to a connection right after opening it"
+    def __init__(self, name, journal_mode, synchronous, mmap_size, cache_size, temp_store, busy_timeout_ms):
+        self.name = name
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        #Bytes mapeados en memoria (0 = sin mmap)
+        self.mmap_size = mmap_size
+        #Negativo = KiB, positivo = páginas (semántica de SQLite)
+        self.cache_size = cache_size
+        self.temp_store = temp_store
+        self.busy_timeout_ms = busy_timeout_ms
+
+    def pragmas(self):
+        return [
+            ('journal_mode', self.journal_mode),
+            ('synchronous', self.synchronous),
+            ('mmap_size', self.mmap_size),
+            ('cache_size', self.cache_size),
+            ('temp_store', self.temp_store),
+            ('busy_timeout', self.busy_timeout_ms),
+        ]
+
+    def apply(self, conn):
+        for pragma, value in self.pragmas():
+            #PRAGMA no acepta parámetros; los valores son siempre nuestros
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+PROFILES = {
+    #WAL con fsync en cada commit: no se pierde nada ante un corte de luz
+    'durable': ConnectionProfile('durable', 'WAL', 'FULL', 0, -2000, 'DEFAULT', 5000),
+    #WAL + NORMAL: un corte puede perder los últimos commits, pero la base nunca se corrompe
+    'balanced': ConnectionProfile('balanced', 'WAL', 'NORMAL', 64 * 2**20, -16000, 'MEMORY', 5000),
+    #Sin fsync: solo para bases descartables (tests, cargas masivas que se pueden repetir)
+    'fast': ConnectionProfile('fast', 'WAL', 'OFF', 256 * 2**20, -64000, 'MEMORY', 5000),
+}
+
+
+def get_profile(profile):
+    "Acepta un nombre de PROFILES o un ConnectionProfile"
+    if isinstance(profile, ConnectionProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil de conexión desconocido: {profile!r}. Opciones: {', '.join(PROFILES)}")
+    return PROFILES[profile]
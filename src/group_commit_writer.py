@@ -0,0 +1,148 @@
+#Escritura diferida con group commit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+#Marca de fin para el hilo escritor
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Write-behind queue: one thread runs the submitted writes and commits them in groups.
+
+    A group is closed when it reaches max_batch writes or when max_delay_ms have
+    passed since its first write, whatever comes first (max_delay_ms=0 only takes
+    what is already waiting). Each write runs in its own SAVEPOINT, so one that
+    raises only rolls back itself. submit() returns a Future that resolves with the
+    write's result (e.g. the generated id) after the group is committed.
+    The tradeoff: fewer fsyncs, but every write waits up to max_delay_ms.
+    The repository must be usable from the writer thread (PooledTaskRepository).
+    """
+    def __init__(self, repository, max_delay_ms=5, max_batch=100):
+        self.repository = repository
+        self.max_delay_ms = max_delay_ms
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        #Estadísticas
+        self.writes = 0
+        self.commits = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='group-commit-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        "Encola fn(*args). Devuelve un Future con su resultado, resuelto después del commit"
+        if self._closed:
+            raise RuntimeError("GroupCommitWriter cerrado")
+        future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def flush(self, timeout=None):
+        "Cierra el grupo actual sin esperar max_delay_ms y espera a que esté guardado"
+        future = Future()
+        #fn None: marca de flush, corta el grupo en curso
+        self._queue.put((None, (), {}, future))
+        future.result(timeout)
+
+    def pending(self):
+        "Escrituras encoladas que el escritor todavía no tomó"
+        return self._queue.qsize()
+
+    def close(self, timeout=None):
+        "Guarda lo encolado y frena el hilo. No cierra el repositorio"
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            operation = self._queue.get()
+            if operation is _STOP:
+                return
+            batch, stop = self._collect(operation)
+            self._commit_batch(batch)
+            if stop:
+                return
+
+    def _collect(self, first):
+        "Junta el grupo que empieza con first. Devuelve (grupo, si hay que frenar después)"
+        batch = [first]
+        if first[0] is None:
+            return batch, False
+        deadline = time.monotonic() + self.max_delay_ms / 1000
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                operation = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if operation is _STOP:
+                return batch, True
+            batch.append(operation)
+            if operation[0] is None:
+                break
+        return batch, False
+
+    def _commit_batch(self, batch):
+        results = []
+        try:
+            with self.repository.transaction():
+                conn = self.repository.conn
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                for fn, args, kwargs, future in batch:
+                    #Cancelado mientras esperaba en la cola: no se ejecuta
+                    if fn is None or not future.set_running_or_notify_cancel():
+                        results.append(None)
+                        continue
+                    conn.execute("SAVEPOINT group_commit_write")
+                    try:
+                        result = (fn(*args, **kwargs), None)
+                    except Exception as error:
+                        conn.execute("ROLLBACK TO group_commit_write")
+                        result = (None, error)
+                    conn.execute("RELEASE group_commit_write")
+                    results.append(result)
+        except Exception as error:
+            #Falló el commit: ninguna escritura del grupo quedó guardada
+            results = [None if future.cancelled() else (None, error) for fn, args, kwargs, future in batch]
+        else:
+            self.writes += sum(1 for result in results if result is not None)
+            self.commits += 1
+        for (fn, args, kwargs, future), result in zip(batch, results):
+            if fn is None:
+                future.set_result(None)
+            elif result is not None:
+                value, error = result
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(value)
+
+
+class GroupCommitTaskManager:
+    """TaskManager in write-behind mode: write methods return a Future, reads run directly.
+
+    Reads do not see writes that are still queued; call flush() first when that matters.
+    """
+    def __init__(self, manager, writer):
+        if manager.overdue_scheduler is not None:
+            #El scheduler no es thread-safe: el escritor lo actualiza mientras el llamador lo lee
+            raise ValueError("GroupCommitTaskManager no soporta overdue_scheduler")
+        self.manager = manager
+        self.writer = writer
+
+    def flush(self, timeout=None):
+        self.writer.flush(timeout)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.manager, name)
+        if name not in self.manager.WRITE_METHODS:
+            return attribute
+        def submit(*args, **kwargs):
+            return self.writer.submit(attribute, *args, **kwargs)
+        return submit
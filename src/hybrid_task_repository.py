@@ -0,0 +1,340 @@
+#Repositorio híbrido: lecturas desde índices en memoria, escrituras a SQLite
+from contextlib import contextmanager
+from .in_memory_task_repository import InMemoryTaskRepository
+from .task_manager import TaskSummary
+from .group_commit_writer import GroupCommitWriter
+from src.repository_interface import AbstractRepository
+
+class HybridTaskRepository(AbstractRepository):
+    """In-memory indexes over a SQLite repository that keeps durability.
+
+    At startup it streams (keyset pages, never fetchall) every user, every
+    pending task and every completed task still marked recurring into an
+    InMemoryTaskRepository, plus task_id -> user_id for the other completed
+    tasks. Every contains_*, get_* and count method is answered from memory;
+    only reading the full row of a completed task goes to the database.
+    Every write is applied to memory and then written through to the store:
+    - write_behind=False: in the caller's thread, inside the same transaction;
+    - write_behind=True: queued on a GroupCommitWriter (the store must be usable
+      from another thread: PooledTaskRepository). A transaction() block is sent
+      as one atomic write when it ends. A write that fails in the store is
+      raised by the next flush() or close().
+    The hybrid must be the only writer of the database.
+    """
+    def __init__(self, store, write_behind=False, max_delay_ms=5, max_batch=100):
+        self.store = store
+        self.clock = store.clock
+        self.memory = InMemoryTaskRepository(store.clock)
+        #Completadas que no están en memoria: task_id -> user_id, y cuántas tiene cada usuario
+        self._cold_owners = {}
+        self._cold_counts = {}
+        self.writer = GroupCommitWriter(store, max_delay_ms, max_batch) if write_behind else None
+        self._write_errors = []
+        #Transacción: profundidad, escrituras diferidas, deshacer de _cold_owners y tareas que quizás se enfríen
+        self._transaction_depth = 0
+        self._queued_writes = []
+        self._cold_undo = []
+        self._maybe_cold = set()
+        self._warm()
+
+    def __getattr__(self, name):
+        #Lo que no es del repositorio (conn, epoch_due_dates, ...) es del store
+        return getattr(self.store, name)
+
+    def _warm(self):
+        store, memory = self.store, self.memory
+        for user_id, username in store.iter_users():
+            memory.load_user(user_id, username)
+        for task in store.iter_pending_tasks():
+            memory.load_task(task)
+        #Las recurrentes completadas quedan en memoria: el barrido de recurrencias se hace acá
+        for task in store.iter_recurring_done_tasks():
+            memory.load_task(task, child_id=store.get_recurrence_child_id(task.id))
+        for task_id, user_id in store.iter_completed_task_owners():
+            if not memory.contains_task_by_user_id(task_id):
+                self._set_cold_owner(task_id, user_id)
+        memory.reserve_ids(store.get_last_id(store.USERS_TABLE_NAME), store.get_last_id(store.TABLE_NAME))
+
+    #Escrituras al store
+    def _write(self, fn, *args):
+        if self.writer is None:
+            fn(*args)
+        elif self._transaction_depth:
+            self._queued_writes.append((fn, args))
+        else:
+            self._submit(fn, *args)
+
+    def _submit(self, fn, *args):
+        self.writer.submit(fn, *args).add_done_callback(self._on_write_done)
+
+    def _on_write_done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self._write_errors.append(future.exception())
+
+    def _run_writes(self, writes):
+        for fn, args in writes:
+            fn(*args)
+
+    def _write_materialized(self, occurrences, occurrence_parents, parent_ids):
+        with self.store.transaction():
+            self.store.insert_tasks(occurrences, occurrence_parents)
+            for parent_id in parent_ids:
+                self.store.change_task_recurrency_global(parent_id)
+
+    def flush(self, timeout=None):
+        "Espera a que todo lo encolado esté guardado. Lanza el primer error de escritura, si hubo"
+        if self.writer is not None:
+            self.writer.flush(timeout)
+        self._raise_write_errors()
+
+    def _raise_write_errors(self):
+        if self._write_errors:
+            error = self._write_errors[0]
+            self._write_errors.clear()
+            raise error
+
+    def close(self):
+        "Guarda lo encolado y cierra el store. Lanza el primer error de escritura, si hubo"
+        try:
+            if self.writer is not None:
+                self.writer.close()
+            self._raise_write_errors()
+        finally:
+            self.store.close()
+
+    #Tareas completadas fuera de memoria
+    def _set_cold_owner(self, task_id, user_id):
+        "user_id None: deja de estar fría (se cargó o se borró)"
+        previous = self._cold_owners.pop(task_id, None)
+        if previous is not None:
+            self._cold_counts[previous] -= 1
+        if user_id is not None:
+            self._cold_owners[task_id] = user_id
+            self._cold_counts[user_id] = self._cold_counts.get(user_id, 0) + 1
+        if self._transaction_depth:
+            self._cold_undo.append((task_id, previous))
+
+    def _is_cold(self, task_id, user_id):
+        owner = self._cold_owners.get(task_id)
+        return owner is not None and (user_id is None or owner == user_id)
+
+    def _warm_task(self, task_id):
+        "Trae a memoria una tarea completada (va a volver a pendiente o a ser recurrente)"
+        if self.writer is not None:
+            self.flush()
+        self.memory.load_task(self.store.get_task_by_id_global(task_id), child_id=self.store.get_recurrence_child_id(task_id))
+        self._set_cold_owner(task_id, None)
+
+    def _cool_task(self, task_id):
+        "Completada y no recurrente: sale de memoria"
+        if self._transaction_depth:
+            #Se decide al terminar la transacción (puede volver a pendiente dentro del bloque)
+            self._maybe_cold.add(task_id)
+            return
+        task = self.memory.get_task_by_id_global(task_id)
+        if task is not None and task.is_completed() and not (task.is_recurrency() and task.recurrency_days):
+            self.memory.delete_task_global(task_id)
+            self._set_cold_owner(task_id, task.user_id)
+
+    @contextmanager
+    def transaction(self):
+        "Como TaskRepository.transaction: memoria y store se guardan o vuelven atrás juntos"
+        outermost = self._transaction_depth == 0
+        self._transaction_depth += 1
+        try:
+            with self.memory.transaction():
+                if self.writer is None:
+                    with self.store.transaction():
+                        yield self
+                else:
+                    yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if outermost:
+                for task_id, user_id in reversed(self._cold_undo):
+                    self._set_cold_owner(task_id, user_id)
+                self._cold_undo.clear()
+                self._queued_writes.clear()
+                self._maybe_cold.clear()
+            raise
+        self._transaction_depth -= 1
+        if outermost:
+            self._cold_undo.clear()
+            if self._queued_writes:
+                writes, self._queued_writes = self._queued_writes, []
+                self._submit(self._run_writes, writes)
+            maybe_cold, self._maybe_cold = self._maybe_cold, set()
+            for task_id in sorted(maybe_cold):
+                self._cool_task(task_id)
+
+    #Usuarios
+    def add_user(self, user_str):
+        user_id = self.memory.add_user(user_str)
+        self._write(self.store.insert_users, [(user_id, user_str)])
+        return user_id
+
+    def update_user_name_of(self, user_id, new_username):
+        self.memory.update_user_name_of(user_id, new_username)
+        self._write(self.store.update_user_name_of, user_id, new_username)
+
+    def users_count(self):
+        return self.memory.users_count()
+
+    def contains_user_by_id(self, user_id):
+        return self.memory.contains_user_by_id(user_id)
+
+    def contains_user_by_username(self, username):
+        return self.memory.contains_user_by_username(username)
+
+    def get_user_name_by_id(self, user_id):
+        return self.memory.get_user_name_by_id(user_id)
+
+    def get_user_id_by_username(self, username):
+        return self.memory.get_user_id_by_username(username)
+
+    #Lecturas
+    def has_tasks(self):
+        return self.memory.has_tasks() or bool(self._cold_owners)
+
+    def _to_db_format(self, due_date_python):
+        return self.store._to_db_format(due_date_python)
+
+    def _from_db_format(self, due_date_db):
+        return self.store._from_db_format(due_date_db)
+
+    def get_task_by_id_global(self, task_id, user_id=None):
+        if self._is_cold(task_id, user_id):
+            #La fila completa de una completada solo está en la base
+            if self.writer is not None:
+                self.flush()
+            return self.store.get_task_by_id_global(task_id, user_id)
+        return self.memory.get_task_by_id_global(task_id, user_id)
+
+    def search_tasks(self, user_id, query, limit=50, offset=0):
+        "El índice de texto está en la base (y abarca también las completadas que no están en memoria)"
+        if self.writer is not None:
+            self.flush()
+        return self.store.search_tasks(user_id, query, limit, offset)
+
+    def get_pending_tasks_by_user_id_global(self, user_id=None, as_batch=False):
+        return self.memory.get_pending_tasks_by_user_id_global(user_id, as_batch)
+
+    def get_overdue_tasks_by_user_id_global(self, user_id):
+        return self.memory.get_overdue_tasks_by_user_id_global(user_id)
+
+    def get_pending_tasks_page(self, user_id, after_id=None, limit=50, order='asc'):
+        return self.memory.get_pending_tasks_page(user_id, after_id, limit, order)
+
+    def iter_pending_tasks(self, user_id=None, batch_size=500, after_id=0):
+        return self.memory.iter_pending_tasks(user_id, batch_size, after_id)
+
+    def iter_overdue_tasks(self, user_id=None, batch_size=500):
+        return self.memory.iter_overdue_tasks(user_id, batch_size)
+
+    def contains_task_by_user_id(self, task_id, user_id=None):
+        return self.memory.contains_task_by_user_id(task_id, user_id) or self._is_cold(task_id, user_id)
+
+    def task_is_completed_global(self, task_id, user_id=None):
+        if self._is_cold(task_id, user_id):
+            return True
+        return self.memory.task_is_completed_global(task_id, user_id)
+
+    def tasks_count_by_user_id(self, user_id):
+        return self.memory.tasks_count_by_user_id(user_id) + self._cold_counts.get(user_id, 0)
+
+    def get_user_task_summary(self, user_id):
+        "Las pendientes están todas en memoria: solo las completadas frías se suman aparte"
+        summary = self.memory.get_user_task_summary(user_id)
+        summary.completed += self._cold_counts.get(user_id, 0)
+        return summary
+
+    def get_all_user_summaries(self):
+        summaries = {summary.user_id: summary for summary in self.memory.get_all_user_summaries()}
+        for user_id, count in self._cold_counts.items():
+            if count:
+                summaries.setdefault(user_id, TaskSummary(user_id)).completed += count
+        return [summaries[user_id] for user_id in sorted(summaries)]
+
+    #Escrituras
+    def add_task_by_user_id_global(self, description, user_id, due_date=None, priority=False, recurrency=False, recurrency_days=0):
+        task_id = self.memory.add_task_by_user_id_global(description, user_id, due_date, priority, recurrency, recurrency_days)
+        self._write(self.store.insert_tasks, [self.memory.get_task_by_id_global(task_id)])
+        return task_id
+
+    def add_tasks_bulk(self, tasks):
+        with self.transaction():
+            task_ids = [self.memory.add_task_by_user_id_global(*task) for task in tasks]
+            self._write(self.store.insert_tasks, [self.memory.get_task_by_id_global(task_id) for task_id in task_ids])
+        return len(task_ids)
+
+    def _update_task(self, name, task_id, user_id, *args):
+        "Aplica la escritura name(task_id, *args, user_id) en memoria (si la tarea está) y en el store"
+        if self._is_cold(task_id, user_id):
+            if name in ('complete_task_global', 'change_task_recurrency_global') or (self.writer is not None and self._transaction_depth):
+                #Vuelve a pendiente o a ser recurrente: la necesitamos en memoria.
+                #Con write-behind, dentro de una transacción la base no ve lo encolado: la seguimos en memoria
+                self._warm_task(task_id)
+            elif name == 'delete_task_global':
+                self._set_cold_owner(task_id, None)
+        elif not self.memory.contains_task_by_user_id(task_id, user_id):
+            return False
+        if self.memory.contains_task_by_user_id(task_id):
+            getattr(self.memory, name)(task_id, *args)
+            self._cool_task(task_id)
+        self._write(getattr(self.store, name), task_id, *args, user_id)
+        return True
+
+    def complete_task_global(self, task_id, user_id=None):
+        return self._update_task('complete_task_global', task_id, user_id)
+
+    def change_task_priority_global(self, task_id, user_id=None):
+        return self._update_task('change_task_priority_global', task_id, user_id)
+
+    def change_task_recurrency_global(self, task_id, user_id=None):
+        return self._update_task('change_task_recurrency_global', task_id, user_id)
+
+    def update_task_due_date_global(self, task_id, new_due_date, user_id=None):
+        return self._update_task('update_task_due_date_global', task_id, user_id, new_due_date)
+
+    def update_task_description_global(self, task_id, new_description, user_id=None):
+        return self._update_task('update_task_description_global', task_id, user_id, new_description)
+
+    def delete_task_global(self, task_id, user_id=None):
+        return self._update_task('delete_task_global', task_id, user_id)
+
+    def complete_tasks_bulk(self, task_ids, user_id=None):
+        task_ids = list(task_ids)
+        count = 0
+        with self.transaction():
+            for task_id in task_ids:
+                if self._is_cold(task_id, user_id):
+                    count += 1
+                elif self.memory.complete_tasks_bulk([task_id], user_id):
+                    self._cool_task(task_id)
+                    count += 1
+            self._write(self.store.complete_tasks_bulk, task_ids, user_id)
+        return count
+
+    def delete_tasks_bulk(self, task_ids, user_id=None):
+        task_ids = list(task_ids)
+        count = 0
+        with self.transaction():
+            for task_id in task_ids:
+                if self._is_cold(task_id, user_id):
+                    self._set_cold_owner(task_id, None)
+                    count += 1
+                elif self.memory.delete_task_global(task_id, user_id):
+                    count += 1
+            self._write(self.store.delete_tasks_bulk, task_ids, user_id)
+        return count
+
+    def materialize_recurring_tasks(self, now, task_ids=None):
+        "Se calcula en memoria (las recurrentes completadas están cargadas) y se escribe en el store"
+        with self.transaction():
+            occurrences, parent_ids = self.memory.materialize_occurrences(now, task_ids)
+            if parent_ids:
+                occurrence_parents = {task.id: self.memory.get_recurrence_parent_id(task.id) for task in occurrences}
+                self._write(self._write_materialized, occurrences, occurrence_parents, parent_ids)
+                for parent_id in parent_ids:
+                    self._cool_task(parent_id)
+        return len(occurrences)
@@ -0,0 +1,487 @@
+#Repositorio en memoria (sin SQL) con índices secundarios
+import re
+import sqlite3
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from heapq import merge
+from datetime import timedelta
+from .task_manager import Task, TaskBatch, TaskSummary
+from .task_repository import TaskRepository
+from src.repository_interface import AbstractRepository
+
+def _search_words(text):
+    "Palabras como las arma el tokenizer unicode61 de la búsqueda FTS5: minúsculas y sin tildes"
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return re.findall(r'\w+', ''.join(char for char in text if not unicodedata.combining(char)))
+
+
+class InMemoryTaskRepository(AbstractRepository):
+    """Pure-Python repository for hot working sets: no SQL parsing, no row conversion.
+
+    Indexes kept on every write:
+    - user_id -> ids of all its tasks (counts, ownership);
+    - user_id -> sorted ids of its pending tasks (pending lists and keyset pages);
+    - user_id -> sorted (due_date, id) of its pending tasks with a due date (overdue = a bisect);
+    - ids of completed recurring tasks (what a recurrence sweep looks at);
+    - username -> user_id.
+    transaction() keeps the state each touched row had before the block and puts
+    it back if the block raises. save_snapshot()/load_snapshot() copy everything
+    to/from a TaskRepository SQLite file, keeping ids.
+    Reads return new Task objects: callers never share state with the indexes.
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        #Las fechas se guardan como datetime
+        self.epoch_due_dates = False
+        self._tasks = {} # task_id -> Task
+        self._task_ids_by_user = {} # user_id -> {task_id}
+        self._pending_by_user = {} # user_id -> [task_id] ordenados
+        self._due_by_user = {} # user_id -> [(due_date, task_id)] ordenados, solo pendientes con fecha
+        self._recurring_done = set() # completadas, recurrentes, con recurrency_days > 0
+        self._parent_of = {} # task_id -> recurrence_parent_id
+        self._child_of = {} # recurrence_parent_id -> task_id
+        self._usernames = {} # user_id -> username
+        self._user_ids = {} # username -> user_id
+        #Como AUTOINCREMENT: los ids no se reusan
+        self._last_task_id = 0
+        self._last_user_id = 0
+        #Transacción: profundidad y estado previo de lo tocado (None = no existía)
+        self._transaction_depth = 0
+        self._saved_tasks = {}
+        self._saved_users = {}
+        self._saved_last_ids = None
+
+    def close(self):
+        pass
+
+    def has_tasks(self):
+        return len(self._tasks) != 0
+
+    #Formato: en memoria el datetime se guarda tal cual
+    def _to_db_format(self, due_date_python):
+        return due_date_python
+
+    def _from_db_format(self, due_date_db):
+        return due_date_db
+
+    #Índices
+    def _index(self, task):
+        task_id, user_id = task.id, task.user_id
+        self._task_ids_by_user.setdefault(user_id, set()).add(task_id)
+        if task.completed:
+            if task.recurrency and task.recurrency_days:
+                self._recurring_done.add(task_id)
+            return
+        insort(self._pending_by_user.setdefault(user_id, []), task_id)
+        if task.due_date is not None:
+            insort(self._due_by_user.setdefault(user_id, []), (task.due_date, task_id))
+
+    def _unindex(self, task):
+        task_id, user_id = task.id, task.user_id
+        self._task_ids_by_user[user_id].discard(task_id)
+        if task.completed:
+            self._recurring_done.discard(task_id)
+            return
+        self._remove_sorted(self._pending_by_user[user_id], task_id)
+        if task.due_date is not None:
+            self._remove_sorted(self._due_by_user[user_id], (task.due_date, task_id))
+
+    def _remove_sorted(self, values, value):
+        index = bisect_left(values, value)
+        if index < len(values) and values[index] == value:
+            del values[index]
+
+    #Escrituras de bajo nivel: guardan el estado previo si hay transacción abierta
+    def _remember_task(self, task_id):
+        if self._transaction_depth and task_id not in self._saved_tasks:
+            task = self._tasks.get(task_id)
+            self._saved_tasks[task_id] = None if task is None else (self._copy(task), self._parent_of.get(task_id))
+
+    def _remember_user(self, user_id):
+        if self._transaction_depth and user_id not in self._saved_users:
+            self._saved_users[user_id] = self._usernames.get(user_id)
+
+    def _insert(self, task, parent_id=None):
+        self._remember_task(task.id)
+        self._tasks[task.id] = task
+        self._index(task)
+        if parent_id is not None:
+            self._parent_of[task.id] = parent_id
+            self._child_of[parent_id] = task.id
+
+    def _update(self, task, **changes):
+        self._remember_task(task.id)
+        self._unindex(task)
+        for name, value in changes.items():
+            setattr(task, name, value)
+        self._index(task)
+
+    def _delete(self, task):
+        self._remember_task(task.id)
+        self._unindex(task)
+        del self._tasks[task.id]
+        parent_id = self._parent_of.pop(task.id, None)
+        if parent_id is not None:
+            del self._child_of[parent_id]
+
+    def _copy(self, task):
+        return Task(task.id, task.user_id, task.description, task.completed, task.due_date, task.priority, task.recurrency, task.recurrency_days)
+
+    def _find(self, task_id, user_id):
+        "La tarea, o None si no existe (o no es de user_id)"
+        task = self._tasks.get(task_id)
+        if task is None or (user_id is not None and task.user_id != user_id):
+            return None
+        return task
+
+    #Transactions
+    @contextmanager
+    def transaction(self):
+        "Agrupa las escrituras del bloque: si el bloque lanza, todas vuelven atrás. Anidada, se une a la exterior"
+        if self._transaction_depth == 0:
+            self._saved_last_ids = (self._last_task_id, self._last_user_id)
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._rollback()
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            self._saved_tasks.clear()
+            self._saved_users.clear()
+
+    def _rollback(self):
+        saved_tasks, self._saved_tasks = self._saved_tasks, {}
+        saved_users, self._saved_users = self._saved_users, {}
+        for task_id, saved in saved_tasks.items():
+            current = self._tasks.get(task_id)
+            if current is not None:
+                self._delete(current)
+            if saved is not None:
+                task, parent_id = saved
+                self._insert(task, parent_id)
+        for user_id, username in saved_users.items():
+            self._set_username(user_id, username)
+        self._last_task_id, self._last_user_id = self._saved_last_ids
+
+    # USER CRUD
+    def _set_username(self, user_id, username):
+        old_username = self._usernames.pop(user_id, None)
+        if old_username is not None:
+            del self._user_ids[old_username]
+        if username is not None:
+            self._usernames[user_id] = username
+            self._user_ids[username] = user_id
+
+    def add_user(self, user_str):
+        #Misma restricción que la columna UNIQUE
+        if user_str in self._user_ids:
+            raise sqlite3.IntegrityError(f"UNIQUE constraint failed: username {user_str!r}")
+        self._last_user_id += 1
+        user_id = self._last_user_id
+        self._remember_user(user_id)
+        self._set_username(user_id, user_str)
+        return user_id
+
+    def users_count(self):
+        return len(self._usernames)
+
+    def contains_user_by_id(self, user_id):
+        return user_id in self._usernames
+
+    def contains_user_by_username(self, username):
+        return username in self._user_ids
+
+    def update_user_name_of(self, user_id, new_username):
+        if user_id not in self._usernames:
+            return
+        if self._user_ids.get(new_username, user_id) != user_id:
+            raise sqlite3.IntegrityError(f"UNIQUE constraint failed: username {new_username!r}")
+        self._remember_user(user_id)
+        self._set_username(user_id, new_username)
+
+    def get_user_name_by_id(self, user_id):
+        return self._usernames[user_id]
+
+    def get_user_id_by_username(self, username):
+        return self._user_ids[username]
+
+    #CRUD DE TAREAS
+    #1. Create
+    def add_task_by_user_id_global(self, description, user_id, due_date=None, priority=False, recurrency=False, recurrency_days = 0):
+        self._last_task_id += 1
+        self._insert(Task(self._last_task_id, user_id, description, False, due_date, bool(priority), bool(recurrency), recurrency_days))
+        return self._last_task_id
+
+    def add_tasks_bulk(self, tasks):
+        "Inserta muchas tareas. tasks: tuplas con los argumentos de add_task_by_user_id_global"
+        count = 0
+        with self.transaction():
+            for task in tasks:
+                self.add_task_by_user_id_global(*task)
+                count += 1
+        return count
+
+    #2. Read
+    def get_task_by_id_global(self, task_id, user_id=None):
+        "Devuelve la tarea, o None si no existe (o no es de user_id)"
+        task = self._find(task_id, user_id)
+        return None if task is None else self._copy(task)
+
+    def _pending_ids(self, user_id):
+        if user_id is None:
+            return merge(*self._pending_by_user.values())
+        return self._pending_by_user.get(user_id, ())
+
+    def get_pending_tasks_by_user_id_global(self, user_id=None, as_batch=False):
+        "Tareas pendientes (de todos si user_id es None). Con as_batch devuelve un TaskBatch columnar"
+        tasks = self._tasks
+        if as_batch:
+            batch = TaskBatch()
+            for task_id in self._pending_ids(user_id):
+                task = tasks[task_id]
+                batch.append(task.id, task.user_id, task.description, False, task.due_date, task.priority, task.recurrency, task.recurrency_days)
+            return batch
+        return [self._copy(tasks[task_id]) for task_id in self._pending_ids(user_id)]
+
+    def _overdue_ids(self, user_id, now):
+        due = self._due_by_user.get(user_id, ())
+        #Las entradas antes de (now,) son las de due_date < now
+        return sorted(task_id for due_date, task_id in due[:bisect_left(due, (now,))])
+
+    def get_overdue_tasks_by_user_id_global(self, user_id):
+        now = self.clock.now()
+        return [self._copy(self._tasks[task_id]) for task_id in self._overdue_ids(user_id, now)]
+
+    def get_pending_tasks_page(self, user_id, after_id=None, limit=50, order='asc'):
+        "Una página de pendientes del usuario, keyset sobre id: las de id mayor (asc) o menor (desc) que after_id"
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"order debe ser 'asc' o 'desc', no {order!r}")
+        ids = self._pending_by_user.get(user_id, [])
+        if order == 'asc':
+            start = 0 if after_id is None else bisect_right(ids, after_id)
+            page = ids[start:start + limit]
+        else:
+            end = len(ids) if after_id is None else bisect_left(ids, after_id)
+            page = ids[max(0, end - limit):end][::-1]
+        return [self._copy(self._tasks[task_id]) for task_id in page]
+
+    #2.0 Búsqueda
+    def search_tasks(self, user_id, query, limit=50, offset=0):
+        """Same matching as TaskRepository.search_tasks (every word, as a prefix, ignoring case and accents).
+        Scans the user's tasks; the shortest descriptions come first instead of bm25"""
+        query_words = _search_words(query)
+        if not query_words:
+            return []
+        found = []
+        for task_id in self._task_ids_by_user.get(user_id, ()):
+            task = self._tasks[task_id]
+            words = _search_words(task.description)
+            if all(any(word.startswith(query_word) for word in words) for query_word in query_words):
+                found.append((len(words), task_id))
+        found.sort()
+        return [self._copy(self._tasks[task_id]) for _, task_id in found[offset:offset + limit]]
+
+    #2.1 Streaming
+    def iter_pending_tasks(self, user_id=None, batch_size=TaskRepository.STREAM_BATCH_SIZE, after_id=0):
+        "Generador de tareas pendientes con id > after_id (las que había al empezar)"
+        task_ids = list(self._pending_ids(user_id))
+        for task_id in task_ids[bisect_right(task_ids, after_id):]:
+            task = self._tasks.get(task_id)
+            if task is not None:
+                yield self._copy(task)
+
+    def iter_overdue_tasks(self, user_id=None, batch_size=TaskRepository.STREAM_BATCH_SIZE):
+        "Generador de tareas vencidas (respecto del ahora al empezar)"
+        now = self.clock.now()
+        user_ids = self._due_by_user.keys() if user_id is None else (user_id,)
+        task_ids = list(merge(*[self._overdue_ids(user_id, now) for user_id in user_ids]))
+        for task_id in task_ids:
+            task = self._tasks.get(task_id)
+            if task is not None:
+                yield self._copy(task)
+
+    #3. Update
+    def complete_task_global(self, task_id, user_id=None):
+        task = self._find(task_id, user_id)
+        if task is None:
+            return False
+        self._update(task, completed=not task.completed)
+        return True
+
+    def change_task_priority_global(self, task_id, user_id=None):
+        task = self._find(task_id, user_id)
+        if task is None:
+            return False
+        self._update(task, priority=not task.priority)
+        return True
+
+    def change_task_recurrency_global(self, task_id, user_id=None):
+        task = self._find(task_id, user_id)
+        if task is None:
+            return False
+        self._update(task, recurrency=not task.recurrency)
+        return True
+
+    def complete_tasks_bulk(self, task_ids, user_id=None):
+        "Marca como completadas todas las tareas. Si se pasa user_id, solo las de ese usuario. Devuelve cuántas matchearon"
+        count = 0
+        with self.transaction():
+            for task_id in task_ids:
+                task = self._find(task_id, user_id)
+                if task is not None:
+                    if not task.completed:
+                        self._update(task, completed=True)
+                    count += 1
+        return count
+
+    def update_task_due_date_global(self, task_id, new_due_date, user_id=None):
+        task = self._find(task_id, user_id)
+        if task is None:
+            return False
+        self._update(task, due_date=new_due_date)
+        return True
+
+    def update_task_description_global(self, task_id, new_description, user_id=None):
+        task = self._find(task_id, user_id)
+        if task is None:
+            return False
+        #La descripción no está en ningún índice
+        self._remember_task(task_id)
+        task.description = new_description
+        return True
+
+    #4. Delete
+    def delete_task_global(self, task_id, user_id=None):
+        task = self._find(task_id, user_id)
+        if task is None:
+            return False
+        self._delete(task)
+        return True
+
+    def delete_tasks_bulk(self, task_ids, user_id=None):
+        "Borra todas las tareas. Si se pasa user_id, solo las de ese usuario. Devuelve cuántas se borraron"
+        count = 0
+        with self.transaction():
+            for task_id in task_ids:
+                if self.delete_task_global(task_id, user_id):
+                    count += 1
+        return count
+
+    #Recurrencias
+    def materialize_recurring_tasks(self, now, task_ids=None):
+        """Creates the next occurrence of every completed recurring task, same rules as TaskRepository.
+        Returns how many were created"""
+        return len(self.materialize_occurrences(now, task_ids)[0])
+
+    def materialize_occurrences(self, now, task_ids=None):
+        "Como materialize_recurring_tasks, pero devuelve (ocurrencias nuevas, ids de las que dejaron de ser recurrentes)"
+        candidates = self._recurring_done if task_ids is None else self._recurring_done.intersection(task_ids)
+        occurrences = []
+        parent_ids = sorted(candidates)
+        with self.transaction():
+            for parent_id in parent_ids:
+                parent = self._tasks[parent_id]
+                if parent_id not in self._child_of:
+                    self._last_task_id += 1
+                    occurrence = Task(self._last_task_id, parent.user_id, parent.description, False,
+                                      self._next_due_date(parent, now), parent.priority, True, parent.recurrency_days)
+                    self._insert(occurrence, parent_id)
+                    occurrences.append(self._copy(occurrence))
+                #La recurrencia pasa a la ocurrencia nueva
+                self._update(parent, recurrency=False)
+        return occurrences, parent_ids
+
+    def get_recurrence_parent_id(self, task_id):
+        return self._parent_of.get(task_id)
+
+    def _next_due_date(self, task, now):
+        "due_date + k * recurrency_days, con el menor k >= 1 que la deja después de now. Sin due_date se cuenta desde now"
+        start = task.due_date if task.due_date is not None else now
+        days = task.recurrency_days
+        periods = max(1, int((now - start) / timedelta(days=1) / days) + 1)
+        return start + timedelta(days=days * periods)
+
+    #State
+    def contains_task_by_user_id(self, task_id, user_id=None):
+        return self._find(task_id, user_id) is not None
+
+    def task_is_completed_global(self, task_id, user_id=None):
+        "True/False, o None si la tarea no existe (o no es de user_id)"
+        task = self._find(task_id, user_id)
+        return None if task is None else task.completed
+
+    def tasks_count_by_user_id(self, user_id):
+        return len(self._task_ids_by_user.get(user_id, ()))
+
+    #Resúmenes
+    def get_user_task_summary(self, user_id):
+        "Pendientes y completadas salen del tamaño de los índices, las vencidas de un bisect; solo se recorren las pendientes"
+        tasks = self._tasks
+        pending_ids = self._pending_by_user.get(user_id, ())
+        due = self._due_by_user.get(user_id, ())
+        priority = recurring = 0
+        for task_id in pending_ids:
+            task = tasks[task_id]
+            priority += bool(task.priority)
+            recurring += bool(task.recurrency)
+        completed = len(self._task_ids_by_user.get(user_id, ())) - len(pending_ids)
+        return TaskSummary(user_id, len(pending_ids), bisect_left(due, (self.clock.now(),)), priority, recurring, completed)
+
+    def get_all_user_summaries(self):
+        return [self.get_user_task_summary(user_id) for user_id in sorted(self._task_ids_by_user) if self._task_ids_by_user[user_id]]
+
+    #Carga de filas que ya tienen id (snapshots, HybridTaskRepository)
+    def load_user(self, user_id, username):
+        self._set_username(user_id, username)
+        self._last_user_id = max(self._last_user_id, user_id)
+
+    def load_task(self, task, parent_id=None, child_id=None):
+        "Agrega una tarea con su id. child_id: ocurrencia que ya generó (aunque no esté cargada)"
+        #Fechas como datetime (en modo epoch las filas traen un int)
+        task.due_date = task.get_due_date()
+        self._insert(task, parent_id)
+        if child_id is not None:
+            self._child_of[task.id] = child_id
+        self._last_task_id = max(self._last_task_id, task.id)
+
+    def reserve_ids(self, last_user_id, last_task_id):
+        "Los próximos ids siguen después de estos (como sqlite_sequence)"
+        self._last_user_id = max(self._last_user_id, last_user_id)
+        self._last_task_id = max(self._last_task_id, last_task_id)
+
+    #Snapshots
+    @classmethod
+    def load_snapshot(cls, db_name, clock):
+        "Arma un repositorio en memoria con todo el contenido de una base de TaskRepository"
+        repository = cls(clock)
+        source = TaskRepository(db_name, clock)
+        try:
+            for user_id, username in source.iter_users():
+                repository.load_user(user_id, username)
+            sql = f"SELECT id, user_id, description, completed, due_date, priority, recurrency, recurrency_days, recurrence_parent_id FROM {TaskRepository.TABLE_NAME}"
+            for row in source._execute(sql):
+                repository.load_task(source.create_task_by_row(row), row['recurrence_parent_id'])
+            repository.reserve_ids(source.get_last_id(TaskRepository.USERS_TABLE_NAME), source.get_last_id(TaskRepository.TABLE_NAME))
+        finally:
+            source.close()
+        return repository
+
+    def save_snapshot(self, db_name):
+        "Reemplaza el contenido de la base db_name por el del repositorio, con los mismos ids"
+        target = TaskRepository(db_name, self.clock)
+        try:
+            with target.transaction():
+                target._execute_write(f"DELETE FROM {TaskRepository.TABLE_NAME}")
+                target._execute_write(f"DELETE FROM {TaskRepository.USERS_TABLE_NAME}")
+                target.insert_users(sorted(self._usernames.items()))
+                target.insert_tasks(sorted(self._tasks.values(), key=Task.get_id), self._parent_of)
+                #Los próximos ids siguen donde iban, aunque las últimas filas se hayan borrado
+                target.set_last_id(TaskRepository.TABLE_NAME, self._last_task_id)
+                target.set_last_id(TaskRepository.USERS_TABLE_NAME, self._last_user_id)
+        finally:
+            target.close()
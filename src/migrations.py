@@ -0,0 +1,288 @@
+#Migraciones del esquema
+#La versión del esquema se guarda en PRAGMA user_version. Cada migración
+#lleva la base de la versión N-1 a la N y se aplica dentro de su propia transacción.
+import sqlite3
+
+TASKS_TABLE_NAME = 'tasks'
+
+# -- INDEXES --
+#(user_id, completed, due_date): pendientes/vencidas por usuario y COUNT por usuario (cubriente)
+USER_PENDING_DUE_INDEX = 'idx_tasks_user_completed_due'
+#Parcial sobre las pendientes: listados y barridos globales sin user_id
+PENDING_DUE_INDEX = 'idx_tasks_pending_due'
+#Parcial sobre las pendientes por usuario, ordenado por id (rowid implícito): keyset sobre id
+PENDING_USER_INDEX = 'idx_tasks_pending_user'
+#Único y parcial sobre recurrence_parent_id: cada tarea recurrente genera a lo sumo una ocurrencia siguiente
+RECURRENCE_PARENT_INDEX = 'idx_tasks_recurrence_parent'
+#Parcial sobre las recurrentes completadas que todavía no generaron su siguiente ocurrencia
+RECURRING_DONE_INDEX = 'idx_tasks_recurring_done'
+
+# -- BÚSQUEDA --
+#FTS5 de contenido externo sobre tasks.description (el texto no se guarda dos veces), rowid = tasks.id.
+#unicode61 con remove_diacritics: "capitulo" encuentra "capítulo"
+TASKS_FTS_TABLE_NAME = 'tasks_fts'
+
+# -- CONTADORES (opt-in) --
+#Por usuario: pendientes, prioritarias y recurrentes (entre las pendientes) y completadas, al día por triggers
+TASK_COUNTERS_TABLE_NAME = 'task_counters'
+
+
+def _add_task_indexes(conn):
+    "v1: índices para los listados por usuario y para las pendientes globales"
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {USER_PENDING_DUE_INDEX}
+        ON {TASKS_TABLE_NAME} (user_id, completed, due_date)
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {PENDING_DUE_INDEX}
+        ON {TASKS_TABLE_NAME} (due_date)
+        WHERE completed = 0
+    """)
+
+
+def _add_pending_keyset_index(conn):
+    "v2: pendientes de un usuario en orden de id, para paginar sin ordenar"
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {PENDING_USER_INDEX}
+        ON {TASKS_TABLE_NAME} (user_id)
+        WHERE completed = 0
+    """)
+
+
+def _add_recurrence_parent(conn):
+    "v3: enlace ocurrencia -> tarea que la generó, para materializar recurrencias de forma idempotente"
+    conn.execute(f"ALTER TABLE {TASKS_TABLE_NAME} ADD COLUMN recurrence_parent_id INTEGER NULL")
+    _add_recurrence_indexes(conn)
+
+
+def _add_recurrence_indexes(conn):
+    conn.execute(f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS {RECURRENCE_PARENT_INDEX}
+        ON {TASKS_TABLE_NAME} (recurrence_parent_id)
+        WHERE recurrence_parent_id IS NOT NULL
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {RECURRING_DONE_INDEX}
+        ON {TASKS_TABLE_NAME} (recurrency_days)
+        WHERE completed = 1 AND recurrency = 1
+    """)
+
+
+def _add_description_search(conn):
+    "v4: búsqueda por texto en las descripciones"
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {TASKS_FTS_TABLE_NAME} USING fts5(
+            description, content='{TASKS_TABLE_NAME}', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    _add_description_search_triggers(conn)
+    #Indexamos las descripciones que ya estaban
+    conn.execute(f"INSERT INTO {TASKS_FTS_TABLE_NAME}({TASKS_FTS_TABLE_NAME}) VALUES ('rebuild')")
+
+
+def _add_description_search_triggers(conn):
+    "Mantienen el índice FTS al día con cada INSERT, DELETE y cambio de description"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TASKS_FTS_TABLE_NAME}_insert AFTER INSERT ON {TASKS_TABLE_NAME} BEGIN
+            INSERT INTO {TASKS_FTS_TABLE_NAME}(rowid, description) VALUES (new.id, new.description);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TASKS_FTS_TABLE_NAME}_delete AFTER DELETE ON {TASKS_TABLE_NAME} BEGIN
+            INSERT INTO {TASKS_FTS_TABLE_NAME}({TASKS_FTS_TABLE_NAME}, rowid, description) VALUES ('delete', old.id, old.description);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TASKS_FTS_TABLE_NAME}_update AFTER UPDATE OF description ON {TASKS_TABLE_NAME} BEGIN
+            INSERT INTO {TASKS_FTS_TABLE_NAME}({TASKS_FTS_TABLE_NAME}, rowid, description) VALUES ('delete', old.id, old.description);
+            INSERT INTO {TASKS_FTS_TABLE_NAME}(rowid, description) VALUES (new.id, new.description);
+        END
+    """)
+
+#Lista ordenada de (versión, migración). Nunca reordenar ni editar una ya publicada.
+MIGRATIONS = [
+    (1, _add_task_indexes),
+    (2, _add_pending_keyset_index),
+    (3, _add_recurrence_parent),
+    (4, _add_description_search),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    "Devuelve la versión actual del esquema"
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn, target_version=LATEST_VERSION):
+    "Aplica en orden las migraciones pendientes hasta target_version. Devuelve la versión final"
+    current_version = get_schema_version(conn)
+    for version, migration in MIGRATIONS:
+        if version <= current_version or version > target_version:
+            continue
+        try:
+            conn.execute("BEGIN")
+            migration(conn)
+            #PRAGMA no acepta parámetros, pero version es siempre un int nuestro
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        current_version = version
+    return current_version
+
+
+# -- DUE DATES COMO ENTEROS (opt-in) --
+#No es una versión lineal: cada base elige su formato y se detecta por el tipo declarado de la columna.
+
+def uses_epoch_due_dates(conn):
+    "True si tasks.due_date guarda segundos epoch (INTEGER) en vez de texto ISO"
+    for row in conn.execute(f"PRAGMA table_info({TASKS_TABLE_NAME})"):
+        if row[1] == 'due_date':
+            return row[2].upper() == 'INTEGER'
+    return False
+
+
+def _recreate_task_indexes(conn):
+    "Índices de todas las migraciones. Si una migración nueva agrega índices o triggers sobre tasks, sumarlos acá"
+    _add_task_indexes(conn)
+    _add_pending_keyset_index(conn)
+    _add_recurrence_indexes(conn)
+    _add_description_search_triggers(conn)
+    if uses_task_counters(conn):
+        _add_task_counters_triggers(conn)
+
+
+def convert_due_dates_to_epoch(conn):
+    """Rebuilds the tasks table in place with due_date INTEGER (epoch seconds, naive dates as UTC; sub-second parts are truncated).
+    Requires the schema at LATEST_VERSION. Does nothing if it is already converted. Returns True if it converted"""
+    if uses_epoch_due_dates(conn):
+        return False
+    if get_schema_version(conn) != LATEST_VERSION:
+        raise sqlite3.OperationalError(f"El esquema debe estar en la versión {LATEST_VERSION} para convertir due_date")
+    new_table = f"{TASKS_TABLE_NAME}_epoch"
+    columns = "id, user_id, description, completed, due_date, priority, recurrency, recurrency_days, recurrence_parent_id"
+    try:
+        conn.execute("BEGIN")
+        conn.execute(f"""
+            CREATE TABLE {new_table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER not NULL,
+                description TEXT NOT NULL,
+                completed BOOLEAN NOT NULL DEFAULT 0,
+                due_date INTEGER NULL,
+                priority BOOLEAN NOT NULL DEFAULT 0,
+                recurrency BOOLEAN NOT NULL DEFAULT 0,
+                recurrency_days INTEGER NULL,
+                recurrence_parent_id INTEGER NULL
+            )
+        """)
+        #strftime('%s') interpreta el texto como UTC, igual que _to_db_format con fechas naive.
+        #Redondea las fracciones de segundo, así que se quitan antes (isoformat usa siempre 6 dígitos)
+        #para truncar como _to_db_format
+        conn.execute(f"""
+            INSERT INTO {new_table} ({columns})
+            SELECT id, user_id, description, completed,
+                   CAST(strftime('%s', CASE WHEN substr(due_date, 20, 1) = '.'
+                                            THEN substr(due_date, 1, 19) || substr(due_date, 27)
+                                            ELSE due_date END) AS INTEGER),
+                   priority, recurrency, recurrency_days, recurrence_parent_id
+            FROM {TASKS_TABLE_NAME}
+        """)
+        #AUTOINCREMENT: no reutilizar ids de tareas ya borradas
+        sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (TASKS_TABLE_NAME,)).fetchone()
+        conn.execute(f"DROP TABLE {TASKS_TABLE_NAME}")
+        conn.execute(f"ALTER TABLE {new_table} RENAME TO {TASKS_TABLE_NAME}")
+        if sequence is not None:
+            updated = conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence[0], TASKS_TABLE_NAME)).rowcount
+            if not updated:
+                #Tabla vacía: la nueva todavía no tiene fila en sqlite_sequence
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (TASKS_TABLE_NAME, sequence[0]))
+        _recreate_task_indexes(conn)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return True
+
+
+# -- CONTADORES POR USUARIO (opt-in) --
+#Tampoco es una versión lineal: suma un upsert por cada escritura sobre tasks, así que cada base elige.
+#Se detecta por la existencia de la tabla. Las vencidas no se cuentan acá: dependen del ahora
+
+def uses_task_counters(conn):
+    "True si la base mantiene la tabla de contadores por usuario"
+    row = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?", (TASK_COUNTERS_TABLE_NAME,)).fetchone()
+    return row[0] > 0
+
+
+#Columna -> aporte de una fila de tasks (new u old) a ese contador
+TASK_COUNTERS = (
+    ('pending', "{row}.completed = 0"),
+    ('priority', "{row}.completed = 0 AND {row}.priority = 1"),
+    ('recurring', "{row}.completed = 0 AND {row}.recurrency = 1"),
+    ('completed', "{row}.completed = 1"),
+)
+
+
+def _add_task_counters_triggers(conn):
+    "Suman la fila nueva y restan la vieja en cada INSERT, DELETE y cambio de las columnas contadas"
+    columns = ', '.join(column for column, _ in TASK_COUNTERS)
+    new_values = ', '.join(f"({value.format(row='new')})" for _, value in TASK_COUNTERS)
+    add_excluded = ', '.join(f"{column} = {column} + excluded.{column}" for column, _ in TASK_COUNTERS)
+    subtract_old_values = ', '.join(f"{column} = {column} - ({value.format(row='old')})" for column, value in TASK_COUNTERS)
+    add_new = f"""
+        INSERT INTO {TASK_COUNTERS_TABLE_NAME} (user_id, {columns}) VALUES (new.user_id, {new_values})
+        ON CONFLICT (user_id) DO UPDATE SET {add_excluded};
+    """
+    subtract_old = f"UPDATE {TASK_COUNTERS_TABLE_NAME} SET {subtract_old_values} WHERE user_id = old.user_id;"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TASK_COUNTERS_TABLE_NAME}_insert AFTER INSERT ON {TASKS_TABLE_NAME} BEGIN
+            {add_new}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TASK_COUNTERS_TABLE_NAME}_delete AFTER DELETE ON {TASKS_TABLE_NAME} BEGIN
+            {subtract_old}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TASK_COUNTERS_TABLE_NAME}_update
+        AFTER UPDATE OF user_id, completed, priority, recurrency ON {TASKS_TABLE_NAME} BEGIN
+            {subtract_old}
+            {add_new}
+        END
+    """)
+
+
+def enable_task_counters(conn):
+    """Creates the per-user counters table, fills it from the current tasks and adds the triggers
+    that keep it up to date. Does nothing if the database already has it. Returns True if it created it"""
+    if uses_task_counters(conn):
+        return False
+    try:
+        conn.execute("BEGIN")
+        conn.execute(f"""
+            CREATE TABLE {TASK_COUNTERS_TABLE_NAME} (
+                user_id INTEGER PRIMARY KEY,
+                pending INTEGER NOT NULL DEFAULT 0,
+                priority INTEGER NOT NULL DEFAULT 0,
+                recurring INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        #Conteo inicial con la misma definición que usan los triggers
+        columns = ', '.join(column for column, _ in TASK_COUNTERS)
+        sums = ', '.join(f"SUM(CASE WHEN {value.format(row=TASKS_TABLE_NAME)} THEN 1 ELSE 0 END)" for _, value in TASK_COUNTERS)
+        conn.execute(f"""
+            INSERT INTO {TASK_COUNTERS_TABLE_NAME} (user_id, {columns})
+            SELECT user_id, {sums} FROM {TASKS_TABLE_NAME} GROUP BY user_id
+        """)
+        _add_task_counters_triggers(conn)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return True
@@ -0,0 +1,119 @@
+#Planificador de vencimientos en memoria
+import heapq
+from bisect import bisect_left, insort
+
+class OverdueScheduler:
+    """Keeps pending tasks with a due date in a min-heap keyed on due_date.
+
+    advance() pops every entry whose due_date has passed (due_date < clock.now(),
+    same rule as the SQL query) and moves it to a per-user overdue map, so
+    "overdue for user X" is answered in O(k) without touching the database
+    (each user's overdue ids are kept sorted as they arrive).
+    A stale heap entry (task changed or gone) is skipped when it is popped; when
+    the heap grows past COMPACT_FACTOR times the tracked tasks it is rebuilt.
+    """
+    #Tamaño del heap, relativo a las tareas seguidas, a partir del cual se descartan las entradas viejas
+    COMPACT_FACTOR = 2
+    COMPACT_MIN_SIZE = 64
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._heap = [] # (due_date, task_id)
+        self._tasks = {} # task_id -> Task, pendientes con fecha (vencidas o no)
+        self._overdue_by_user = {} # user_id -> {task_id: Task}
+        self._overdue_ids_by_user = {} # user_id -> [task_id] ordenados
+        self._listeners = []
+        #Mayor id cargado: las tareas creadas en bloque se levantan con iter_pending_tasks(after_id=...)
+        self.last_task_id = 0
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def add_listener(self, listener):
+        "listener(task) se llama cuando una tarea pasa a estar vencida"
+        self._listeners.append(listener)
+
+    def load(self, tasks):
+        "Registra tareas (por ejemplo, el stream de pendientes del repositorio)"
+        for task in tasks:
+            self.refresh(task)
+
+    def refresh(self, task):
+        "Sincroniza una tarea tras crearla o modificarla: se sigue si está pendiente y tiene fecha"
+        if task.get_id() > self.last_task_id:
+            self.last_task_id = task.get_id()
+        if task.is_completed() or task.get_due_date() is None:
+            self.discard(task.get_id())
+            return
+        task_id = task.get_id()
+        previous = self._tasks.get(task_id)
+        self._tasks[task_id] = task
+        if previous is not None and previous.get_due_date() == task.get_due_date():
+            #Misma fecha: la entrada del heap sigue valiendo, solo actualizamos el objeto
+            overdue = self._overdue_by_user.get(task.user_id)
+            if overdue is not None and task_id in overdue:
+                overdue[task_id] = task
+            return
+        self._remove_overdue(previous)
+        heapq.heappush(self._heap, (task.get_due_date(), task_id))
+        if len(self._heap) > self.COMPACT_FACTOR * len(self._tasks) + self.COMPACT_MIN_SIZE:
+            self._compact()
+
+    def _compact(self):
+        "Rearma el heap solo con las seguidas que todavía no vencieron"
+        self._heap = [(task.get_due_date(), task_id) for task_id, task in self._tasks.items()
+                      if task_id not in self._overdue_by_user.get(task.user_id, ())]
+        heapq.heapify(self._heap)
+
+    def discard(self, task_id):
+        "Deja de seguir la tarea (completada, borrada o sin fecha)"
+        self._remove_overdue(self._tasks.pop(task_id, None))
+
+    def advance(self):
+        "Mueve a vencidas las tareas cuya fecha ya pasó y avisa a los listeners. Devuelve las nuevas vencidas"
+        now = self.clock.now()
+        became_overdue = []
+        while self._heap and self._heap[0][0] < now:
+            due_date, task_id = heapq.heappop(self._heap)
+            task = self._tasks.get(task_id)
+            if task is None or task.get_due_date() != due_date:
+                #Entrada vieja
+                continue
+            overdue = self._overdue_by_user.setdefault(task.user_id, {})
+            if task_id in overdue:
+                continue
+            overdue[task_id] = task
+            insort(self._overdue_ids_by_user.setdefault(task.user_id, []), task_id)
+            became_overdue.append(task)
+        for task in became_overdue:
+            for listener in self._listeners:
+                listener(task)
+        return became_overdue
+
+    def get_overdue_tasks(self, user_id):
+        "Vencidas del usuario, ordenadas por id"
+        self.advance()
+        overdue = self._overdue_by_user.get(user_id)
+        if not overdue:
+            return []
+        return [overdue[task_id] for task_id in self._overdue_ids_by_user[user_id]]
+
+    def is_overdue(self, task_id):
+        self.advance()
+        task = self._tasks.get(task_id)
+        return task is not None and task_id in self._overdue_by_user.get(task.user_id, ())
+
+    def _remove_overdue(self, task):
+        if task is None:
+            return
+        overdue = self._overdue_by_user.get(task.user_id)
+        if overdue is None or overdue.pop(task.get_id(), None) is None:
+            return
+        ids = self._overdue_ids_by_user[task.user_id]
+        del ids[bisect_left(ids, task.get_id())]
+        if not overdue:
+            del self._overdue_by_user[task.user_id]
+            del self._overdue_ids_by_user[task.user_id]
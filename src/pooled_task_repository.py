@@ -0,0 +1,98 @@
+#Repositorio para hosts multi-hilo (por ejemplo, un worker web con threads)
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from .task_repository import TaskRepository
+
+class _ThreadReader:
+    "Conexión de lectura de un hilo; vive en su threading.local y muere con él"
+    __slots__ = ('conn', '__weakref__')
+    def __init__(self, conn):
+        self.conn = conn
+
+class PooledTaskRepository(TaskRepository):
+    """TaskRepository that can be shared by many threads.
+
+    SQLite in WAL mode lets readers run next to one writer, so:
+    - every thread reads through its own connection (opened lazily, query_only),
+      closed when the thread exits;
+    - all writes go through a single writer connection serialized by an RLock,
+      held for the whole transaction() block when there is one.
+    Reads made by the thread that holds an open transaction use the writer
+    connection, so they see their own uncommitted writes.
+    """
+    def __init__(self, db_name, clock, profile='balanced', epoch_due_dates=False, query_stats=None, task_counters=False):
+        self.db_name = db_name
+        self._write_lock = threading.RLock()
+        #Hilo dueño de la transacción abierta (None = ninguna)
+        self._writer_thread = None
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        super().__init__(db_name, clock, False, profile or 'balanced', epoch_due_dates, query_stats, task_counters)
+
+    def _open_connection(self, db_name, memory):
+        #Sin check_same_thread: la conexión la usa un único hilo a la vez (lock o thread-local),
+        #pero close() la cierra desde el hilo que sea
+        conn = sqlite3.connect(db_name, check_same_thread=False, cached_statements=self.cached_statements)
+        if self.profile is not None:
+            self.profile.apply(conn)
+        #WAL es obligatorio (aunque el perfil diga otra cosa): sin él los lectores bloquean al escritor
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _read_connection(self):
+        if self._writer_thread == threading.get_ident():
+            return self.conn
+        reader = getattr(self._local, 'reader', None)
+        if reader is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed repository.")
+            conn = self._open_connection(self.db_name, False)
+            conn.execute("PRAGMA query_only = 1")
+            with self._readers_lock:
+                self._readers.append(conn)
+            reader = self._local.reader = _ThreadReader(conn)
+            #Al terminar el hilo se libera su threading.local y con él la conexión.
+            #Solo una referencia débil al repositorio: el hilo no lo mantiene vivo
+            weakref.finalize(reader, PooledTaskRepository._release_reader, weakref.ref(self), conn)
+        return reader.conn
+
+    @staticmethod
+    def _release_reader(repository_ref, conn):
+        "Cierra la conexión de un hilo que terminó y la saca de _readers"
+        repository = repository_ref()
+        if repository is not None:
+            with repository._readers_lock:
+                if conn in repository._readers:
+                    repository._readers.remove(conn)
+        conn.close()
+
+    def _execute_write(self, sql, params=(), many=False):
+        with self._write_lock:
+            return super()._execute_write(sql, params, many)
+
+    @contextmanager
+    def transaction(self):
+        "Como TaskRepository.transaction, pero toma el lock de escritura hasta el commit o rollback"
+        with self._write_lock:
+            previous_writer = self._writer_thread
+            self._writer_thread = threading.get_ident()
+            try:
+                with super().transaction():
+                    yield self
+            finally:
+                self._writer_thread = previous_writer
+
+    def close(self):
+        "Cierra el escritor y las conexiones de lectura de todos los hilos"
+        self._closed = True
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        with self._write_lock:
+            self.conn.close()
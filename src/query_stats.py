@@ -0,0 +1,195 @@
+#Instrumentación opcional de TaskRepository: cuántas veces corre cada sentencia, cuánto tarda y cuánto devuelve
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+#Sentencias que difieren solo en espacios/saltos de línea cuentan como la misma
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class _StatementStats:
+    __slots__ = ('count', 'seconds', 'max_seconds', 'rows', 'plan')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        #Último EXPLAIN QUERY PLAN capturado (solo si alguna vez fue lenta)
+        self.plan = None
+
+
+class QueryStats:
+    """Per-statement counters for a TaskRepository (TaskRepository(..., query_stats=QueryStats())).
+
+    Records count, cumulative/max time and rows (returned by reads, affected by writes) per
+    statement, plus commit latency. Statements slower than slow_query_ms also get their
+    EXPLAIN QUERY PLAN captured. Every event goes to the sinks: objects with emit(event), where
+    event is a dict with 'kind' ('statement', 'commit' or 'slow_query'). Thread-safe.
+    """
+    def __init__(self, slow_query_ms=None, sinks=(), max_slow_queries=100):
+        self.slow_query_ms = slow_query_ms
+        self.sinks = list(sinks)
+        self._lock = threading.Lock()
+        self._statements = {}
+        #sql tal como llega -> normalizada (evita la regex en cada llamada)
+        self._keys = {}
+        self._commits = _StatementStats()
+        #Últimas lentas, de la más vieja a la más nueva
+        self._slow_queries = deque(maxlen=max_slow_queries)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def is_slow(self, seconds):
+        return self.slow_query_ms is not None and seconds * 1000 >= self.slow_query_ms
+
+    def record(self, sql, seconds, rows, plan=None):
+        "plan: detalles del EXPLAIN QUERY PLAN, solo para las lentas"
+        key = self._keys.get(sql)
+        if key is None:
+            key = self._keys[sql] = normalize_sql(sql)
+        sql = key
+        with self._lock:
+            stats = self._statements.get(sql)
+            if stats is None:
+                stats = self._statements[sql] = _StatementStats()
+            stats.count += 1
+            stats.seconds += seconds
+            stats.rows += rows
+            if seconds > stats.max_seconds:
+                stats.max_seconds = seconds
+            if plan is not None:
+                stats.plan = plan
+                slow_query = {'kind': 'slow_query', 'sql': sql, 'ms': seconds * 1000, 'rows': rows, 'plan': plan}
+                self._slow_queries.append(slow_query)
+        self._emit({'kind': 'statement', 'sql': sql, 'ms': seconds * 1000, 'rows': rows})
+        if plan is not None:
+            self._emit(slow_query)
+
+    def record_commit(self, seconds):
+        with self._lock:
+            self._commits.count += 1
+            self._commits.seconds += seconds
+            if seconds > self._commits.max_seconds:
+                self._commits.max_seconds = seconds
+        self._emit({'kind': 'commit', 'ms': seconds * 1000})
+
+    def _emit(self, event):
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def snapshot(self):
+        "Copia de los contadores: sentencias de mayor a menor tiempo total, commits y últimas lentas"
+        with self._lock:
+            statements = [
+                {
+                    'sql': sql, 'count': stats.count, 'total_ms': stats.seconds * 1000,
+                    'mean_ms': stats.seconds * 1000 / stats.count, 'max_ms': stats.max_seconds * 1000,
+                    'rows': stats.rows, 'plan': stats.plan,
+                }
+                for sql, stats in self._statements.items()
+            ]
+            commits = self._commits
+            snapshot = {
+                'statements': sorted(statements, key=lambda stats: stats['total_ms'], reverse=True),
+                'commits': {
+                    'count': commits.count, 'total_ms': commits.seconds * 1000, 'max_ms': commits.max_seconds * 1000,
+                    'mean_ms': commits.seconds * 1000 / commits.count if commits.count else 0.0,
+                },
+                'slow_queries': list(self._slow_queries),
+            }
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._commits = _StatementStats()
+            self._slow_queries.clear()
+
+    def dump_json(self, path):
+        "Guarda el snapshot en path"
+        with open(path, 'w') as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+
+#Sinks
+class LoggingSink:
+    "Slow-query log: writes the chosen kinds of events (by default only slow queries) to a logger"
+    def __init__(self, logger=None, level=logging.WARNING, kinds=('slow_query',)):
+        self.logger = logger if logger is not None else logging.getLogger('taskmanager.queries')
+        self.level = level
+        self.kinds = kinds
+
+    def emit(self, event):
+        if event['kind'] not in self.kinds:
+            return
+        if event['kind'] == 'slow_query':
+            self.logger.log(self.level, "slow query (%.3f ms, %d rows): %s | plan: %s",
+                            event['ms'], event['rows'], event['sql'], '; '.join(event['plan']))
+        else:
+            self.logger.log(self.level, "%s", event)
+
+
+class HistogramSink:
+    "In-memory latency histogram per statement (and one for commits, under the key 'COMMIT')"
+    DEFAULT_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+    def __init__(self, bounds_ms=DEFAULT_BOUNDS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def emit(self, event):
+        if event['kind'] == 'slow_query':
+            return
+        key = event['sql'] if event['kind'] == 'statement' else 'COMMIT'
+        bucket = bisect.bisect_left(self.bounds_ms, event['ms'])
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.bounds_ms) + 1)
+            histogram[bucket] += 1
+
+    def histogram(self, key):
+        "Lista de (límite superior en ms, cantidad); el último límite es None (sin techo)"
+        with self._lock:
+            counts = list(self._histograms.get(key, [0] * (len(self.bounds_ms) + 1)))
+        return list(zip(self.bounds_ms + (None,), counts))
+
+    def keys(self):
+        with self._lock:
+            return list(self._histograms)
+
+
+class JsonDumpSink:
+    "Appends the chosen kinds of events to path, one JSON object per line"
+    def __init__(self, path, kinds=('slow_query', 'commit')):
+        self.path = path
+        self.kinds = kinds
+        self._lock = threading.Lock()
+        self._file = None
+
+    def emit(self, event):
+        if event['kind'] not in self.kinds:
+            return
+        line = json.dumps({'time': time.time(), **event})
+        with self._lock:
+            if self._file is None:
+                #Se abre recién con el primer evento, con buffer de línea
+                self._file = open(self.path, 'a', buffering=1)
+            self._file.write(line + '\n')
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,21 @@
+#Materialización de tareas recurrentes
+
+class RecurrenceEngine:
+    """Generates the next occurrence (due_date + recurrency_days) of completed recurring tasks.
+
+    The work is a single set-based statement in the repository, so a sweep
+    over millions of tasks never loops in Python. Each occurrence records the
+    task that generated it (recurrence_parent_id, unique), which makes running
+    it twice harmless. Dates are taken from the injected clock.
+    """
+    def __init__(self, repository, clock):
+        self.repository = repository
+        self.clock = clock
+
+    def sweep(self):
+        "Materializa todas las recurrentes completadas pendientes de generar. Devuelve cuántas tareas se crearon"
+        return self.repository.materialize_recurring_tasks(self.clock.now())
+
+    def on_tasks_completed(self, task_ids):
+        "Hook del TaskManager: solo mira las tareas recién completadas"
+        return self.repository.materialize_recurring_tasks(self.clock.now(), task_ids)
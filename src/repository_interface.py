@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Optional
-from src.task_manager import Task
+from typing import Iterator, Optional, Union
+from src.task_manager import Task, TaskBatch, TaskSummary
 
 class AbstractRepository(ABC):
     "Abstract interface for a repository"
@@ -15,34 +15,64 @@ class AbstractRepository(ABC):
     def add_task_by_user_id_global(self, description:str, due_date:Optional[datetime]) -> int:
         pass
     @abstractmethod
-    def get_task_by_id_global(self, task_id: int) -> Task:
+    def get_task_by_id_global(self, task_id: int, user_id: Optional[int] = None) -> Optional[Task]:
         pass
     @abstractmethod
-    def get_pending_tasks_by_user_id_global(self) -> list[Task]:
+    def get_pending_tasks_by_user_id_global(self, user_id: Optional[int] = None, as_batch: bool = False) -> Union[list[Task], TaskBatch]:
         pass
     @abstractmethod
     def get_overdue_tasks_by_user_id_global(self) -> list[Task]:
         pass
     @abstractmethod
+    def get_pending_tasks_page(self, user_id: int, after_id: Optional[int] = None, limit: int = 50, order: str = 'asc') -> list[Task]:
+        pass
+    @abstractmethod
+    def iter_pending_tasks(self, user_id: Optional[int] = None, batch_size: int = 500, after_id: int = 0) -> Iterator[Task]:
+        pass
+    @abstractmethod
+    def iter_overdue_tasks(self, user_id: Optional[int] = None, batch_size: int = 500) -> Iterator[Task]:
+        pass
+    @abstractmethod
     def contains_task_by_user_id(self, task_id: int) -> bool:
         pass
     @abstractmethod
-    def complete_task_global(self, task_id: int):
+    def complete_task_global(self, task_id: int, user_id: Optional[int] = None) -> bool:
         pass
     @abstractmethod
-    def update_task_due_date_global(self, task_id: int, new_due_date: datetime):
+    def update_task_due_date_global(self, task_id: int, new_due_date: datetime, user_id: Optional[int] = None) -> bool:
         pass
     @abstractmethod
-    def update_task_description_global(self, task_id: int, new_description: str):
+    def update_task_description_global(self, task_id: int, new_description: str, user_id: Optional[int] = None) -> bool:
         pass
     @abstractmethod
-    def delete_task_global(self, task_id: int):
+    def delete_task_global(self, task_id: int, user_id: Optional[int] = None) -> bool:
         pass
     @abstractmethod
     def tasks_count_by_user_id(self) -> int:
         pass
     @abstractmethod
-    def task_is_completed_global(self, task_id: int) -> bool:
+    def task_is_completed_global(self, task_id: int, user_id: Optional[int] = None) -> Optional[bool]:
+        pass
+    @abstractmethod
+    def get_user_task_summary(self, user_id: int) -> TaskSummary:
+        pass
+    @abstractmethod
+    def get_all_user_summaries(self) -> list[TaskSummary]:
+        pass
+    @abstractmethod
+    def transaction(self):
+        pass
+    @abstractmethod
+    def add_tasks_bulk(self, tasks) -> int:
+        pass
+    @abstractmethod
+    def complete_tasks_bulk(self, task_ids, user_id: Optional[int] = None) -> int:
+        pass
+    @abstractmethod
+    def delete_tasks_bulk(self, task_ids, user_id: Optional[int] = None) -> int:
         pass
 
     
+    @abstractmethod
+    def materialize_recurring_tasks(self, now: datetime, task_ids=None) -> int:
+        pass
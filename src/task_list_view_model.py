@@ -0,0 +1,84 @@
+class TaskListViewModel:
+    """Rows of a task list keyed by task id.
+
+    Instead of rebuilding the widget, replace()/append() return the minimal
+    operations to apply, in order: ('delete', index), ('insert', index, text)
+    and ('update', index, text).
+    """
+    def __init__(self, format_row):
+        #format_row(task) -> texto de la fila
+        self.format_row = format_row
+        self.task_ids = [] # índice de fila -> id
+        self.rows = {} # id -> texto mostrado
+        self.tasks = {} # id -> Task
+        self._index_by_id = {}
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def task_id_at(self, index):
+        return self.task_ids[index]
+
+    def index_of(self, task_id):
+        return self._index_by_id.get(task_id)
+
+    def get_task(self, task_id):
+        return self.tasks.get(task_id)
+
+    def append(self, tasks):
+        "Agrega tareas al final (página siguiente). Las que ya estaban se actualizan en su lugar. Solo formatea las nuevas"
+        operations = []
+        for task in tasks:
+            task_id = task.get_id()
+            row = self.format_row(task)
+            self.tasks[task_id] = task
+            index = self._index_by_id.get(task_id)
+            if index is None:
+                index = len(self.task_ids)
+                self.task_ids.append(task_id)
+                self._index_by_id[task_id] = index
+                operations.append(('insert', index, row))
+            elif self.rows[task_id] != row:
+                operations.append(('update', index, row))
+            self.rows[task_id] = row
+        return operations
+
+    def replace(self, tasks):
+        "Pasa a mostrar exactamente tasks y devuelve las operaciones para llegar ahí"
+        new_ids = []
+        new_rows = {}
+        new_tasks = {}
+        for task in tasks:
+            task_id = task.get_id()
+            if task_id not in new_rows:
+                new_ids.append(task_id)
+            new_rows[task_id] = self.format_row(task)
+            new_tasks[task_id] = task
+
+        operations = []
+        #1. Borramos de abajo hacia arriba para no correr los índices pendientes
+        for index in range(len(self.task_ids) - 1, -1, -1):
+            if self.task_ids[index] not in new_rows:
+                operations.append(('delete', index))
+        kept_ids = [task_id for task_id in self.task_ids if task_id in new_rows]
+
+        #2. Si las que quedan cambiaron de orden, no hay diff incremental: reconstruimos
+        if [task_id for task_id in new_ids if task_id in self.rows] != kept_ids:
+            operations.extend(('delete', index) for index in range(len(kept_ids) - 1, -1, -1))
+            kept_ids = []
+
+        #3. Recorremos el orden nuevo: las conservadas se actualizan si cambió el texto, el resto se inserta
+        kept_position = 0
+        for index, task_id in enumerate(new_ids):
+            if kept_position < len(kept_ids) and kept_ids[kept_position] == task_id:
+                if self.rows[task_id] != new_rows[task_id]:
+                    operations.append(('update', index, new_rows[task_id]))
+                kept_position += 1
+            else:
+                operations.append(('insert', index, new_rows[task_id]))
+
+        self.task_ids = new_ids
+        self.rows = new_rows
+        self.tasks = new_tasks
+        self._index_by_id = {task_id: index for index, task_id in enumerate(new_ids)}
+        return operations
@@ -1,4 +1,6 @@
 import sqlite3
+from array import array
+from datetime import datetime, timedelta
 
 class TaskErrorManager(Exception):
     pass
@@ -34,13 +36,19 @@ class UsernameAlreadyExistsError(TaskErrorManager):
         self.username = username
         super().__init__(f"Error. Usuario con username '{username}' ya existe.")
     
+#Origen de las fechas guardadas como número (naive, tratado como UTC)
+EPOCH = datetime(1970, 1, 1)
+
 class Task:
+    #Sin __dict__ por instancia: los listados grandes crean cientos de miles de estos
+    __slots__ = ('id', 'user_id', 'description', 'completed', '_due_date', 'priority', 'recurrency', 'recurrency_days')
+
     def __init__(self, id, user_id, description, completed=False, due_date = None, priority = False, recurrency = False, recurrency_days = 0):
         self.id = id
         self.description = description
         self.completed = completed
         self.priority = priority
-        self.due_date = due_date
+        self._due_date = due_date
         self.user_id = user_id
         self.recurrency = recurrency
         self.recurrency_days = recurrency_days
@@ -62,19 +70,179 @@ class Task:
         return self.id
     def get_due_date(self):
         return self.due_date
+
+    @property
+    def due_date(self):
+        "datetime o None. Si se creó con segundos epoch (int), el datetime se arma recién acá"
+        due_date = self._due_date
+        if due_date.__class__ is int:
+            due_date = self._due_date = EPOCH + timedelta(seconds=due_date)
+        return due_date
+
+    @due_date.setter
+    def due_date(self, due_date):
+        self._due_date = due_date
+
+
+class TaskBatch:
+    "Columnar list of tasks: parallel arrays instead of one object per task"
+    __slots__ = ('ids', 'user_ids', 'descriptions', 'flags', 'due_dates', 'recurrency_days')
+    #Bits de flags
+    COMPLETED = 1
+    PRIORITY = 2
+    RECURRENCY = 4
+    #due_dates guarda microsegundos desde EPOCH; este valor significa "sin fecha"
+    NO_DUE_DATE = -2**63
+    EPOCH = EPOCH
+
+    def __init__(self):
+        self.ids = array('q')
+        self.user_ids = array('q')
+        self.descriptions = []
+        self.flags = bytearray()
+        self.due_dates = array('q')
+        self.recurrency_days = array('q')
+
+    def append(self, id, user_id, description, completed=False, due_date=None, priority=False, recurrency=False, recurrency_days=0):
+        self.ids.append(id)
+        self.user_ids.append(user_id)
+        self.descriptions.append(description)
+        self.flags.append((self.COMPLETED if completed else 0) | (self.PRIORITY if priority else 0) | (self.RECURRENCY if recurrency else 0))
+        if due_date is None:
+            due_date = self.NO_DUE_DATE
+        elif due_date.__class__ is int:
+            #Segundos epoch tal cual vienen de la base: sin pasar por datetime
+            due_date = due_date * 1000000
+        else:
+            due_date = (due_date - self.EPOCH) // timedelta(microseconds=1)
+        self.due_dates.append(due_date)
+        self.recurrency_days.append(recurrency_days or 0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        "Materializa una sola fila como Task"
+        return Task(
+            id=self.ids[index],
+            user_id=self.user_ids[index],
+            description=self.descriptions[index],
+            completed=self.is_completed(index),
+            due_date=self.get_due_date(index),
+            priority=self.is_priority(index),
+            recurrency=self.is_recurrency(index),
+            recurrency_days=self.recurrency_days[index]
+        )
+
+    def __iter__(self):
+        for index in range(len(self.ids)):
+            yield self[index]
+
+    def get_id(self, index):
+        return self.ids[index]
+
+    def get_description(self, index):
+        return self.descriptions[index]
+
+    def is_completed(self, index):
+        return bool(self.flags[index] & self.COMPLETED)
+
+    def is_priority(self, index):
+        return bool(self.flags[index] & self.PRIORITY)
+
+    def is_recurrency(self, index):
+        return bool(self.flags[index] & self.RECURRENCY)
+
+    def get_due_date(self, index):
+        due_date = self.due_dates[index]
+        if due_date == self.NO_DUE_DATE:
+            return None
+        return self.EPOCH + timedelta(microseconds=due_date)
+
+
+class TaskSummary:
+    "Task counts of one user: pending, and among them overdue, priority and recurring; completed"
+    __slots__ = ('user_id', 'pending', 'overdue', 'priority', 'recurring', 'completed')
+
+    def __init__(self, user_id, pending=0, overdue=0, priority=0, recurring=0, completed=0):
+        self.user_id = user_id
+        self.pending = pending
+        self.overdue = overdue
+        self.priority = priority
+        self.recurring = recurring
+        self.completed = completed
+
+    @property
+    def total(self):
+        return self.pending + self.completed
+
+    def __eq__(self, other):
+        if not isinstance(other, TaskSummary):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        counts = ', '.join(f"{name}={getattr(self, name)}" for name in self.__slots__)
+        return f"TaskSummary({counts})"
+
     
 class TaskManager:
+    #Métodos que solo leen (los usan AsyncTaskManager y GroupCommitTaskManager para despachar)
+    READ_METHODS = (
+        'has_tasks', 'users_count', 'contains_user_by_id', 'contains_user_by_username', 'get_task_by_id_global',
+        'get_pending_tasks_by_user_id_global', 'get_overdue_tasks_by_user_id_global', 'get_pending_tasks_page_by_user_id_global',
+        'task_is_completed_global', 'tasks_count_by_user_id', 'contains_task_by_user_id', 'get_pending_tasks_for_user',
+        'get_pending_tasks_page_for_user', 'get_task_by_id_for_user', 'task_is_completed_for_user', 'get_user_name_by_id',
+        'get_user_id_by_username', 'search_tasks_for_user', 'get_user_task_summary', 'get_all_user_summaries',
+    )
+    #Métodos que escriben
+    WRITE_METHODS = (
+        'add_user', 'update_user_name_of', 'add_task_by_user_id_global', 'add_tasks_bulk_global', 'complete_task_global',
+        'change_task_priority_global', 'change_task_recurrency_global', 'update_task_due_date_global',
+        'update_task_description_global', 'remove_task_due_date_global', 'delete_task_global', 'sweep_recurring_tasks',
+        'add_task_for_user', 'add_tasks_bulk_for_user', 'change_task_priority_for_user', 'change_task_recurrency_for_user',
+        'update_task_description_for_user', 'complete_task_for_user', 'update_task_overdue_date_for_user',
+        'remove_task_due_date_for_user', 'delete_task_for_user', 'complete_tasks_bulk_for_user', 'delete_tasks_bulk_for_user',
+    )
+
     #1. Constructor
-    def __init__(self, repository):
+    def __init__(self, repository, recurrence_engine=None, overdue_scheduler=None):
         self.repository = repository
+        #Opcional: genera la siguiente ocurrencia al completar tareas recurrentes
+        self.recurrence_engine = recurrence_engine
+        #Opcional: vencidas en memoria. Se carga una vez y se mantiene con cada escritura
+        self.overdue_scheduler = overdue_scheduler
+        if overdue_scheduler is not None:
+            overdue_scheduler.load(repository.iter_pending_tasks())
+        #Callbacks (user_id, username) que se llaman al crear o renombrar usuarios
+        self._user_listeners = []
 
     def has_tasks(self):
         return self.repository.has_tasks()
+
+    def transaction(self):
+        "Agrupa varias operaciones en un único commit del repositorio"
+        return self.repository.transaction()
+
+    def get_query_stats(self):
+        "Snapshot of the repository QueryStats (per-statement counts, times, rows, commits, slow queries), or None if it is not instrumented"
+        query_stats = getattr(self.repository, 'query_stats', None)
+        return query_stats.snapshot() if query_stats is not None else None
     
     #2. Creación y gestión de usuarios
     def add_user(self, user_str):
         self.assert_username_do_not_exists(user_str)
-        return self.repository.add_user(user_str)
+        user_id = self.repository.add_user(user_str)
+        self._notify_user_changed(user_id, user_str)
+        return user_id
+
+    def add_user_listener(self, listener):
+        "listener(user_id, username) se llama cada vez que se crea o renombra un usuario"
+        self._user_listeners.append(listener)
+
+    def _notify_user_changed(self, user_id, username):
+        for listener in self._user_listeners:
+            listener(user_id, username)
     
     def users_count(self):
         return self.repository.users_count()
@@ -86,57 +254,125 @@ class TaskManager:
         return self.repository.contains_user_by_username(username)
 
     def update_user_name_of(self, user_id, new_username):
-        return self.repository.update_user_name_of(user_id, new_username)
+        result = self.repository.update_user_name_of(user_id, new_username)
+        self._notify_user_changed(user_id, new_username)
+        return result
     
     
     #3. CRUD De Tareas
     #3.1 Create
     def add_task_by_user_id_global(self, description, user_id, due_date = None, priority=False, recurrency=False, recurrency_days=0):
-        return self.repository.add_task_by_user_id_global(description, user_id, due_date, priority, recurrency, recurrency_days)
+        task_id = self.repository.add_task_by_user_id_global(description, user_id, due_date, priority, recurrency, recurrency_days)
+        if self.overdue_scheduler is not None:
+            self.overdue_scheduler.refresh(Task(task_id, user_id, description, False, due_date, priority, recurrency, recurrency_days))
+        return task_id
+
+    def add_tasks_bulk_global(self, tasks):
+        "tasks: tuplas (description, user_id, due_date, priority, recurrency, recurrency_days)"
+        count = self.repository.add_tasks_bulk(tasks)
+        self._load_new_scheduled_tasks()
+        return count
     #3.2 Read
     def get_task_by_id_global(self, task_id):
-        self.assert_is_valid_task_id_global(task_id)
-        return self.repository.get_task_by_id_global(task_id)
+        task = self.repository.get_task_by_id_global(task_id)
+        self.assert_task_was_found_global(task is not None, task_id)
+        return task
 
-    def get_pending_tasks_by_user_id_global(self, user_id):
-        return self.repository.get_pending_tasks_by_user_id_global(user_id)
+    def get_pending_tasks_by_user_id_global(self, user_id, as_batch=False):
+        return self.repository.get_pending_tasks_by_user_id_global(user_id, as_batch)
 
     def get_overdue_tasks_by_user_id_global(self, user_id):
+        if self.overdue_scheduler is not None:
+            return self.overdue_scheduler.get_overdue_tasks(user_id)
         return self.repository.get_overdue_tasks_by_user_id_global(user_id)
 
+    def get_pending_tasks_page_by_user_id_global(self, user_id, after_id=None, limit=50, order='asc'):
+        return self.repository.get_pending_tasks_page(user_id, after_id, limit, order)
+
+    def iter_pending_tasks(self, user_id=None, batch_size=500):
+        "Generator version of get_pending_tasks_by_user_id_global (constant memory)"
+        return self.repository.iter_pending_tasks(user_id, batch_size)
+
+    def iter_overdue_tasks(self, user_id=None, batch_size=500):
+        "Generator version of get_overdue_tasks_by_user_id_global (constant memory)"
+        return self.repository.iter_overdue_tasks(user_id, batch_size)
+
     #3.3 Update   
+    #Las escrituras devuelven si matchearon alguna fila: existencia y escritura en una sola consulta
     def complete_task_global(self, task_id):
-        self.assert_is_valid_task_id_global(task_id)
-        self.repository.complete_task_global(task_id)
+        with self.repository.transaction():
+            self.assert_task_was_found_global(self.repository.complete_task_global(task_id), task_id)
+            self._after_tasks_completed([task_id])
+        #complete_task alterna: puede volver a pendiente
+        self._refresh_scheduled_task(task_id)
+        self._load_new_scheduled_tasks()
 
     def change_task_priority_global(self, task_id):
-        self.assert_is_valid_task_id_global(task_id)
-        self.repository.change_task_priority_global(task_id)
+        self.assert_task_was_found_global(self.repository.change_task_priority_global(task_id), task_id)
+        self._refresh_scheduled_task(task_id, only_if_tracked=True)
 
     def change_task_recurrency_global(self, task_id):
-        self.assert_is_valid_task_id_global(task_id)
-        self.repository.change_task_recurrency_global(task_id)
+        self.assert_task_was_found_global(self.repository.change_task_recurrency_global(task_id), task_id)
+        self._refresh_scheduled_task(task_id, only_if_tracked=True)
 
     def update_task_due_date_global(self, task_id, new_due_date):
-        self.assert_is_valid_task_id_global(task_id)
-        self.repository.update_task_due_date_global(task_id, new_due_date)
+        self.assert_task_was_found_global(self.repository.update_task_due_date_global(task_id, new_due_date), task_id)
+        self._refresh_scheduled_task(task_id)
     
     def update_task_description_global(self, task_id, new_description):
-        self.assert_is_valid_task_id_global(task_id)
-        self.repository.update_task_description_global(task_id, new_description)
+        self.assert_task_was_found_global(self.repository.update_task_description_global(task_id, new_description), task_id)
+        self._refresh_scheduled_task(task_id, only_if_tracked=True)
     #3.4 Delete
     def remove_task_due_date_global(self, task_id):
-        self.assert_is_valid_task_id_global(task_id)
-        self.repository.update_task_due_date_global(task_id, None)
+        self.assert_task_was_found_global(self.repository.update_task_due_date_global(task_id, None), task_id)
+        self._discard_scheduled_tasks([task_id])
 
     def delete_task_global(self, task_id):
-        self.assert_is_valid_task_id_global(task_id)
-        self.repository.delete_task_global(task_id)
+        self.assert_task_was_found_global(self.repository.delete_task_global(task_id), task_id)
+        self._discard_scheduled_tasks([task_id])
+
+    #3.5 Recurrencias
+    def sweep_recurring_tasks(self):
+        "Genera la siguiente ocurrencia de todas las recurrentes completadas. Devuelve cuántas se crearon"
+        if self.recurrence_engine is None:
+            return 0
+        created = self.recurrence_engine.sweep()
+        self._load_new_scheduled_tasks()
+        return created
+
+    def _after_tasks_completed(self, task_ids):
+        #Misma transacción que el completado: o se guardan ambos o ninguno
+        if self.recurrence_engine is not None:
+            self.recurrence_engine.on_tasks_completed(task_ids)
+
+    #3.6 Vencidas en memoria (solo si hay overdue_scheduler)
+    #Se sincroniza después de que la escritura salió bien, nunca dentro de una transacción que puede volver atrás
+    def _refresh_scheduled_task(self, task_id, only_if_tracked=False):
+        if self.overdue_scheduler is None:
+            return
+        if only_if_tracked and task_id not in self.overdue_scheduler:
+            return
+        task = self.repository.get_task_by_id_global(task_id)
+        if task is None:
+            self.overdue_scheduler.discard(task_id)
+        else:
+            self.overdue_scheduler.refresh(task)
+
+    def _discard_scheduled_tasks(self, task_ids):
+        if self.overdue_scheduler is not None:
+            for task_id in task_ids:
+                self.overdue_scheduler.discard(task_id)
+
+    def _load_new_scheduled_tasks(self):
+        "Levanta las tareas creadas sin pasar por add_task (bloques, recurrencias)"
+        if self.overdue_scheduler is not None:
+            self.overdue_scheduler.load(self.repository.iter_pending_tasks(after_id=self.overdue_scheduler.last_task_id))
 
     #4. State
     def task_is_completed_global(self, task_id):
-        self.assert_is_valid_task_id_global(task_id)
-        return self.repository.task_is_completed_global(task_id)
+        completed = self.repository.task_is_completed_global(task_id)
+        self.assert_task_was_found_global(completed is not None, task_id)
+        return completed
     
     def tasks_count_by_user_id(self, user_id):
         return self.repository.tasks_count_by_user_id(user_id)
@@ -144,60 +380,114 @@ class TaskManager:
     def contains_task_by_user_id(self, user_id, task_id):
         return self.repository.contains_task_by_user_id(user_id, task_id)
 
+    def get_user_task_summary(self, user_id):
+        "Counts of every bucket (pending, overdue, priority, recurring, completed) in one query. Needs to valid user_id"
+        self.assert_is_valid_user_id(user_id)
+        return self.repository.get_user_task_summary(user_id)
+
+    def get_all_user_summaries(self):
+        "TaskSummary of every user with tasks, by user_id"
+        return self.repository.get_all_user_summaries()
+
 
     #SECURE METHODS (API)
+    #La pertenencia se chequea en la misma consulta (WHERE id = ? AND user_id = ?)
     def add_task_for_user(self, description, user_id, due_date = None, priority=False, recurrency = False, recurrency_days = 0):
         "Add task. Needs to valid user_id"
         self.assert_is_valid_user_id(user_id)
         return self.add_task_by_user_id_global(description, user_id, due_date, priority, recurrency, recurrency_days)
 
-    def get_pending_tasks_for_user(self, user_id):
-        "Returns pending tasks. Needs to valid user_id"
+    def add_tasks_bulk_for_user(self, tasks, user_id):
+        "Add many tasks in one commit. tasks: tuples (description, due_date, priority, recurrency, recurrency_days)"
+        self.assert_is_valid_user_id(user_id)
+        count = self.repository.add_tasks_bulk((task[0], user_id) + tuple(task[1:]) for task in tasks)
+        self._load_new_scheduled_tasks()
+        return count
+
+    def get_pending_tasks_for_user(self, user_id, as_batch=False):
+        "Returns pending tasks (a TaskBatch if as_batch). Needs to valid user_id"
         self.assert_is_valid_user_id(user_id)
-        return self.get_pending_tasks_by_user_id_global(user_id)
+        return self.get_pending_tasks_by_user_id_global(user_id, as_batch)
+
+    def get_pending_tasks_page_for_user(self, user_id, after_id=None, limit=50, order='asc'):
+        "Returns one page of pending tasks after after_id (keyset on id). Needs to valid user_id"
+        self.assert_is_valid_user_id(user_id)
+        return self.get_pending_tasks_page_by_user_id_global(user_id, after_id, limit, order)
+
+    def search_tasks_for_user(self, user_id, query, limit=50, offset=0):
+        "Returns the user's tasks whose description has every word of query, most relevant first. Needs to valid user_id"
+        self.assert_is_valid_user_id(user_id)
+        return self.repository.search_tasks(user_id, query, limit, offset)
 
     def change_task_priority_for_user(self, user_id, task_id):
-        self.assert_task_id_belongs_to_user(user_id, task_id)
-        self.repository.change_task_priority_global(task_id)
+        self.assert_task_was_found_for_user(self.repository.change_task_priority_global(task_id, user_id), user_id)
+        self._refresh_scheduled_task(task_id, only_if_tracked=True)
 
     def change_task_recurrency_for_user(self, user_id, task_id):
-        self.assert_task_id_belongs_to_user(user_id, task_id)
-        self.repository.change_task_recurrency_global(task_id)
+        self.assert_task_was_found_for_user(self.repository.change_task_recurrency_global(task_id, user_id), user_id)
+        self._refresh_scheduled_task(task_id, only_if_tracked=True)
 
     def get_task_by_id_for_user(self, task_id, user_id):
         "Return a Task. Needs to valid task_id with user_id"
-        self.assert_task_id_belongs_to_user(task_id, user_id)
-        return self.get_task_by_id_global(task_id)
+        task = self.repository.get_task_by_id_global(task_id, user_id)
+        self.assert_task_was_found_for_user(task is not None, user_id)
+        return task
 
     def task_is_completed_for_user(self, task_id, user_id):
         "Checks if task is completed. Needs to valid task_id with user_id"
-        self.assert_task_id_belongs_to_user(task_id, user_id)
-        return self.task_is_completed_global(task_id)
+        completed = self.repository.task_is_completed_global(task_id, user_id)
+        self.assert_task_was_found_for_user(completed is not None, user_id)
+        return completed
 
     def update_task_description_for_user(self, task_id, new_description, user_id):
         "Modify task description. Needs to valid task_id with user_id"
-        self.assert_task_id_belongs_to_user(task_id, user_id)
-        return self.update_task_description_global(task_id, new_description)
+        self.assert_task_was_found_for_user(self.repository.update_task_description_global(task_id, new_description, user_id), user_id)
+        self._refresh_scheduled_task(task_id, only_if_tracked=True)
 
     def complete_task_for_user(self, task_id, user_id):
         "Completes task. Needs to valid task_id with user_id"
-        self.assert_task_id_belongs_to_user(task_id, user_id)
-        return self.complete_task_global(task_id)
+        with self.repository.transaction():
+            self.assert_task_was_found_for_user(self.repository.complete_task_global(task_id, user_id), user_id)
+            self._after_tasks_completed([task_id])
+        self._refresh_scheduled_task(task_id)
+        self._load_new_scheduled_tasks()
 
     def update_task_overdue_date_for_user(self, task_id, new_due_date, user_id):
         "Modify task date. Needs to valid task_id with user_id"
-        self.assert_task_id_belongs_to_user(task_id, user_id)
-        return self.update_task_due_date_global(task_id, new_due_date)
+        self.assert_task_was_found_for_user(self.repository.update_task_due_date_global(task_id, new_due_date, user_id), user_id)
+        self._refresh_scheduled_task(task_id)
 
     def remove_task_due_date_for_user(self, task_id, user_id):
         "Remove task date. Needs to valid task_id with user_id"
-        self.assert_task_id_belongs_to_user(task_id, user_id)
-        return self.remove_task_due_date_global(task_id)
+        self.assert_task_was_found_for_user(self.repository.update_task_due_date_global(task_id, None, user_id), user_id)
+        self._discard_scheduled_tasks([task_id])
     
     def delete_task_for_user(self, task_id, user_id):
         "Remove task. Needs to valid task_id with user_id"
-        self.assert_task_id_belongs_to_user(task_id, user_id)
-        return self.delete_task_global(task_id)
+        self.assert_task_was_found_for_user(self.repository.delete_task_global(task_id, user_id), user_id)
+        self._discard_scheduled_tasks([task_id])
+
+    def complete_tasks_bulk_for_user(self, task_ids, user_id):
+        "Completes many tasks in one commit. All of them must belong to user_id"
+        task_ids = list(dict.fromkeys(task_ids))
+        with self.repository.transaction():
+            if self.repository.complete_tasks_bulk(task_ids, user_id) != len(task_ids):
+                #Alguna no era suya: se hace rollback de todas
+                raise AuthenticationError(user_id)
+            self._after_tasks_completed(task_ids)
+        self._discard_scheduled_tasks(task_ids)
+        self._load_new_scheduled_tasks()
+        return len(task_ids)
+
+    def delete_tasks_bulk_for_user(self, task_ids, user_id):
+        "Remove many tasks in one commit. All of them must belong to user_id"
+        task_ids = list(dict.fromkeys(task_ids))
+        with self.repository.transaction():
+            if self.repository.delete_tasks_bulk(task_ids, user_id) != len(task_ids):
+                #Alguna no era suya: se hace rollback de todas
+                raise AuthenticationError(user_id)
+        self._discard_scheduled_tasks(task_ids)
+        return len(task_ids)
 
     def get_user_name_by_id(self, user_id):
         self.assert_is_valid_user_id(user_id)
@@ -215,6 +505,14 @@ class TaskManager:
         if not self.repository.contains_task_by_user_id(task_id):
             raise TaskNotFoundError(task_id)
     
+    def assert_task_was_found_global(self, found, task_id):
+        if not found:
+            raise TaskNotFoundError(task_id)
+
+    def assert_task_was_found_for_user(self, found, user_id):
+        if not found:
+            raise AuthenticationError(user_id)
+
     def assert_is_valid_user_id(self, user_id):
         if not self.repository.contains_user_by_id(user_id):
             raise UserIdNotFoundError(user_id)
@@ -1,39 +1,122 @@
 #Patrón "REPOSITORY"
 import sqlite3
-from datetime import datetime
-from .task_manager import Task
+import json
+import re
+import calendar
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from .task_manager import Task, TaskBatch, TaskSummary, EPOCH
 from src.repository_interface import AbstractRepository
+from .migrations import (apply_migrations, convert_due_dates_to_epoch, uses_epoch_due_dates, enable_task_counters, uses_task_counters,
+                         TASKS_FTS_TABLE_NAME, TASK_COUNTERS_TABLE_NAME)
+from .connection_profiles import get_profile
+class _MeasuredCursor:
+    """Cursor de una lectura medida: las filas se siguen pidiendo a SQLite a medida que el llamador las lee.
+    Cuenta las filas entregadas y llama a record(filas) una sola vez: al agotarse, al cerrarse o al liberarse"""
+    __slots__ = ('_cursor', '_pending', '_rows', '_record')
+
+    def __init__(self, cursor, first_rows, record):
+        self._cursor = cursor
+        #Filas ya traídas para medir la primera: se entregan antes que las del cursor
+        self._pending = first_rows
+        self._rows = len(first_rows)
+        self._record = record
+        if not first_rows:
+            self._finish()
+
+    def _finish(self):
+        record, self._record = self._record, None
+        if record is not None:
+            record(self._rows)
+
+    def fetchone(self):
+        if self._pending:
+            return self._pending.pop()
+        row = self._cursor.fetchone()
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self._cursor.arraysize
+        rows, self._pending = self._pending[:size], self._pending[size:]
+        if len(rows) < size:
+            more = self._cursor.fetchmany(size - len(rows))
+            self._rows += len(more)
+            rows.extend(more)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows, self._pending = self._pending, []
+        more = self._cursor.fetchall()
+        self._rows += len(more)
+        rows.extend(more)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __del__(self):
+        #Lecturas que no se agotan (fetchone de una sola fila): se registran al soltar el cursor
+        self._finish()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
 class TaskRepository(AbstractRepository):
     # -- CONSTANTS -- 
     TABLE_NAME = 'tasks'
     USERS_TABLE_NAME = 'users'
+    #Filas por página en los iter_* (keyset sobre id)
+    STREAM_BATCH_SIZE = 500
+    #Columnas de una fila de tarea, en el orden que esperan create_task_by_row y create_task_batch_by_rows
+    TASK_COLUMNS = 'id, user_id, description, completed, due_date, priority, recurrency, recurrency_days'
+    #Lugar en la cache de sentencias preparadas para el SQL armado fuera del registro (migraciones, consultas ad hoc)
+    STATEMENT_CACHE_HEADROOM = 128
     # Constructor
-    def __init__(self, db_name, clock, memory = False):
-        #Conexión
-        if memory:
-            self.conn = sqlite3.connect(':memory:')
-        else:
-            self.conn = sqlite3.connect(db_name)
-        #Cursor
-        self.conn.row_factory = sqlite3.Row
-        self.cursor = self.conn.cursor()
-        #Inicializamos la tabla
-        self._create_table()
+    def __init__(self, db_name, clock, memory = False, profile = None, epoch_due_dates = False, query_stats = None, task_counters = False):
+        #Instrumentación opcional (QueryStats): None = sin costo extra por sentencia
+        self.query_stats = query_stats
+        #Perfil de conexión (None = defaults de SQLite); se valida antes de abrir
+        self.profile = get_profile(profile) if profile is not None else None
+        #La cache de sentencias preparadas de cada conexión entra todo el registro (más las ad hoc)
+        self.cached_statements = len(self._build_statements(epoch_due_dates, task_counters)) + self.STATEMENT_CACHE_HEADROOM
+        #Conexión (las escrituras y las transacciones van siempre por acá)
+        self.conn = self._open_connection(db_name, memory)
+        #Profundidad de transacciones explícitas abiertas (0 = commit por llamada)
+        self._transaction_depth = 0
+        #Inicializamos la tabla (epoch_due_dates convierte una base existente en el lugar, task_counters agrega los contadores)
+        self._create_table(epoch_due_dates, task_counters)
+        #Todo el SQL de las operaciones, armado una vez (el formato de fechas y los contadores ya los decidió la base)
+        self.statements = self._build_statements(self.epoch_due_dates, self.task_counters)
         #Guardamos el reloj
         self.clock = clock
 
     def has_tasks(self):
         #Contamos las tasks
-        sql = f"SELECT COUNT(*) FROM {self.TABLE_NAME}"
-        #Ejecutamos
-        self.cursor.execute(sql)
-        count = self.cursor.fetchone()[0]
+        count = self._execute(self.statements['count_tasks']).fetchone()[0]
         return count != 0
     
     #Create table method
-    def _create_table(self):   
+    def _create_table(self, epoch_due_dates=False, task_counters=False):   
         "Creamos la tabla si no existe"
-        self.cursor.execute(f"""
+        self.conn.execute(f"""
             CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER not NULL,
@@ -45,16 +128,274 @@ class TaskRepository(AbstractRepository):
                 recurrency_days INTEGER NULL
             )
         """)
-        self.cursor.execute(f"""
+        self.conn.execute(f"""
            CREATE TABLE IF NOT EXISTS {self.USERS_TABLE_NAME} (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 username TEXT NOT NULL UNIQUE                
             )                 
         """)
         self.conn.commit()
+        #Llevamos el esquema (nuevo o existente) a la última versión
+        apply_migrations(self.conn)
+        if epoch_due_dates:
+            convert_due_dates_to_epoch(self.conn)
+        #El formato lo decide la base, no el flag: una base ya convertida se sigue leyendo como epoch
+        self.epoch_due_dates = uses_epoch_due_dates(self.conn)
+        if task_counters:
+            enable_task_counters(self.conn)
+        #Igual con los contadores: una vez creados, los triggers los mantienen aunque no se pida el flag
+        self.task_counters = uses_task_counters(self.conn)
     #CLose connection
     def close(self):
         self.conn.close()
+
+    #Registro de sentencias
+    def _build_statements(self, epoch_due_dates, task_counters=False):
+        "Nombre -> SQL de cada sentencia fija del repositorio. Las que filtran por una tarea tienen una variante _for_user (id y dueño)"
+        tasks, users, columns = self.TABLE_NAME, self.USERS_TABLE_NAME, self.TASK_COLUMNS
+        statements = {
+            #Usuarios
+            'insert_user': f"INSERT INTO {users} (username) VALUES (?)",
+            'count_users': f"SELECT COUNT(*) FROM {users}",
+            'contains_user_id': f"SELECT COUNT(id) FROM {users} WHERE id = ?",
+            'contains_username': f"SELECT COUNT(id) FROM {users} WHERE username = ?",
+            'rename_user': f"UPDATE {users} SET username = ? WHERE id = ?",
+            'get_username': f"SELECT username FROM {users} WHERE id = ?",
+            'get_user_id': f"SELECT id FROM {users} WHERE username = ?",
+            'insert_users_with_ids': f"INSERT INTO {users} (id, username) VALUES (?, ?)",
+            'iter_users': f"SELECT id, username FROM {users} WHERE id > ? ORDER BY id LIMIT ?",
+            #Tareas
+            'count_tasks': f"SELECT COUNT(*) FROM {tasks}",
+            'count_tasks_by_user': f"SELECT COUNT(*) FROM {tasks} WHERE user_id = ?",
+            'insert_task': f"INSERT INTO {tasks} (user_id, description, completed, due_date, priority, recurrency, recurrency_days) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            'insert_tasks_with_ids': f"""INSERT INTO {tasks} (id, user_id, description, completed, due_date, priority, recurrency, recurrency_days, recurrence_parent_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            'pending': f"SELECT {columns} FROM {tasks} WHERE completed = 0 ORDER BY id",
+            'pending_by_user': f"SELECT {columns} FROM {tasks} WHERE completed = 0 AND user_id = ? ORDER BY id",
+            'overdue_by_user': f"""
+                SELECT {columns} FROM {tasks}
+                WHERE completed = 0
+                AND user_id = ?
+                AND due_date IS NOT NULL
+                AND due_date < ?
+                ORDER BY id
+            """,
+            'search': f"""
+                SELECT t.id, t.user_id, t.description, t.completed, t.due_date, t.priority, t.recurrency, t.recurrency_days
+                FROM {TASKS_FTS_TABLE_NAME} JOIN {tasks} AS t ON t.id = {TASKS_FTS_TABLE_NAME}.rowid
+                WHERE {TASKS_FTS_TABLE_NAME} MATCH ? AND t.user_id = ?
+                ORDER BY {TASKS_FTS_TABLE_NAME}.rank, t.id
+                LIMIT ? OFFSET ?
+            """,
+            'iter_completed_owners': f"SELECT id, user_id FROM {tasks} WHERE completed = 1 AND id > ? ORDER BY id LIMIT ?",
+            'recurrence_child_id': f"SELECT id FROM {tasks} WHERE recurrence_parent_id = ?",
+            'complete_tasks_bulk': f"UPDATE {tasks} SET completed = 1 WHERE id = ?",
+            'complete_tasks_bulk_for_user': f"UPDATE {tasks} SET completed = 1 WHERE id = ? AND user_id = ?",
+            'delete_tasks_bulk': f"DELETE FROM {tasks} WHERE id = ?",
+            'delete_tasks_bulk_for_user': f"DELETE FROM {tasks} WHERE id = ? AND user_id = ?",
+            #AUTOINCREMENT
+            'last_id': "SELECT seq FROM sqlite_sequence WHERE name = ?",
+            'delete_last_id': "DELETE FROM sqlite_sequence WHERE name = ?",
+            'insert_last_id': "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+        }
+        #Por una tarea: por id, o por id y dueño (chequeo fusionado en la misma consulta)
+        for name, prefix in (
+            ('get_task', f"SELECT {columns} FROM {tasks} WHERE "),
+            ('contains_task', f"SELECT COUNT(id) FROM {tasks} WHERE "),
+            ('task_is_completed', f"SELECT completed FROM {tasks} WHERE "),
+            ('complete_task', f"UPDATE {tasks} SET completed = NOT completed WHERE "),
+            ('toggle_priority', f"UPDATE {tasks} SET priority = NOT priority WHERE "),
+            ('toggle_recurrency', f"UPDATE {tasks} SET recurrency = NOT recurrency WHERE "),
+            ('update_due_date', f"UPDATE {tasks} SET due_date = ? WHERE "),
+            ('update_description', f"UPDATE {tasks} SET description = ? WHERE "),
+            ('delete_task', f"DELETE FROM {tasks} WHERE "),
+        ):
+            statements[name] = prefix + "id = ?"
+            statements[name + '_for_user'] = prefix + "id = ? AND user_id = ?"
+        #Páginas keyset de pendientes: asc/desc, primera página o después de un id
+        for order, after in (('asc', " AND id > ?"), ('desc', " AND id < ?")):
+            for suffix, condition in (('', ''), ('_after', after)):
+                statements[f'pending_page_{order}{suffix}'] = f"SELECT {columns} FROM {tasks} WHERE completed = 0 AND user_id = ?{condition} ORDER BY id {order.upper()} LIMIT ?"
+        #Streaming keyset (id > último visto)
+        for name, where in (
+            ('iter_pending', "completed = 0"),
+            ('iter_pending_by_user', "completed = 0 AND user_id = ?"),
+            ('iter_overdue', "completed = 0 AND due_date IS NOT NULL AND due_date < ?"),
+            ('iter_overdue_by_user', "completed = 0 AND due_date IS NOT NULL AND due_date < ? AND user_id = ?"),
+            ('iter_recurring_done', "completed = 1 AND recurrency = 1 AND recurrency_days > 0"),
+        ):
+            statements[name] = f"SELECT {columns} FROM {tasks} WHERE {where} AND id > ? ORDER BY id LIMIT ?"
+        statements.update(self._build_materialize_statements(epoch_due_dates))
+        statements.update(self._build_summary_statements(task_counters))
+        return statements
+
+    def _build_materialize_statements(self, epoch_due_dates):
+        "INSERT ... SELECT de las próximas ocurrencias y UPDATE de las que ya la generaron, con y sin filtro de ids"
+        tasks = self.TABLE_NAME
+        #Próxima fecha: due_date + k * recurrency_days, con el menor k >= 1 que la deja después de now.
+        #Sin due_date se cuenta desde now
+        if epoch_due_dates:
+            next_due_date = """COALESCE(due_date, :now) + 86400 * recurrency_days * MAX(1,
+                       (:now - COALESCE(due_date, :now)) / (86400 * recurrency_days) + 1)"""
+        else:
+            next_due_date = """datetime(COALESCE(due_date, :now), '+' || (recurrency_days * MAX(1,
+                       CAST((julianday(:now) - julianday(COALESCE(due_date, :now))) / recurrency_days AS INTEGER) + 1)) || ' days')"""
+        statements = {}
+        #Con ids, solo esas tareas (json_each evita armar un IN con miles de parámetros)
+        for suffix, id_filter in (('', ''), ('_ids', "AND id IN (SELECT value FROM json_each(:ids))")):
+            statements['materialize_insert' + suffix] = f"""
+                INSERT INTO {tasks} (user_id, description, completed, due_date, priority, recurrency, recurrency_days, recurrence_parent_id)
+                SELECT user_id, description, 0, {next_due_date},
+                       priority, 1, recurrency_days, id
+                FROM {tasks} AS parent
+                WHERE completed = 1 AND recurrency = 1 AND recurrency_days > 0 {id_filter}
+                  AND NOT EXISTS (SELECT 1 FROM {tasks} AS child WHERE child.recurrence_parent_id = parent.id)
+            """
+            #Las que ya generaron su ocurrencia salen del índice parcial: el próximo barrido no las vuelve a mirar
+            statements['materialize_update' + suffix] = f"""
+                UPDATE {tasks} SET recurrency = 0
+                WHERE completed = 1 AND recurrency = 1 AND recurrency_days > 0 {id_filter}
+                  AND EXISTS (SELECT 1 FROM {tasks} AS child WHERE child.recurrence_parent_id = {tasks}.id)
+            """
+        return statements
+
+    def _build_summary_statements(self, task_counters):
+        "Resumen de un usuario y de todos: parámetros (now, user_id) y (now,), con o sin la tabla de contadores"
+        tasks, counters = self.TABLE_NAME, TASK_COUNTERS_TABLE_NAME
+        overdue = "completed = 0 AND due_date IS NOT NULL AND due_date < ?"
+        if task_counters:
+            #Todo sale de la fila del usuario salvo las vencidas, que dependen del ahora: rango del índice (user_id, completed, due_date)
+            return {
+                'user_summary': f"""
+                    SELECT pending, (SELECT COUNT(*) FROM {tasks} WHERE {overdue} AND user_id = c.user_id),
+                           priority, recurring, completed
+                    FROM {counters} AS c WHERE user_id = ?
+                """,
+                'all_user_summaries': f"""
+                    SELECT c.user_id, c.pending, COALESCE(o.overdue, 0), c.priority, c.recurring, c.completed
+                    FROM {counters} AS c
+                    LEFT JOIN (SELECT user_id, COUNT(*) AS overdue FROM {tasks} WHERE {overdue} GROUP BY user_id) AS o
+                    ON o.user_id = c.user_id
+                    WHERE c.pending + c.completed > 0
+                    ORDER BY c.user_id
+                """,
+            }
+        #Sin contadores: todos los buckets en una sola pasada sobre las tareas
+        sums = f"""
+            SUM(CASE WHEN completed = 0 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN {overdue} THEN 1 ELSE 0 END),
+            SUM(CASE WHEN completed = 0 AND priority = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN completed = 0 AND recurrency = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN completed = 1 THEN 1 ELSE 0 END)
+        """
+        return {
+            'user_summary': f"SELECT {sums} FROM {tasks} WHERE user_id = ?",
+            'all_user_summaries': f"SELECT user_id, {sums} FROM {tasks} GROUP BY user_id ORDER BY user_id",
+        }
+
+    def _task_statement(self, name, task_id, user_id):
+        "Sentencia del registro sobre una tarea y sus parámetros: por id o, si se pasa user_id, por id y dueño"
+        if user_id == None:
+            return self.statements[name], (task_id,)
+        return self.statements[name + '_for_user'], (task_id, user_id)
+
+    #Conexiones y ejecución de SQL
+    #Todo el SQL pasa por _execute/_execute_write con un cursor nuevo por llamada, así ninguna
+    #llamada pisa el estado de otra. PooledTaskRepository redefine de qué conexión sale cada cursor
+    def _open_connection(self, db_name, memory):
+        conn = sqlite3.connect(':memory:' if memory else db_name, cached_statements=self.cached_statements)
+        if self.profile is not None:
+            self.profile.apply(conn)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _read_connection(self):
+        return self.conn
+
+    def _execute(self, sql, params=(), raw=False):
+        "Lectura. Con raw las filas son tuplas planas en vez de sqlite3.Row"
+        if self.query_stats is not None:
+            cursor = self._read_connection().cursor()
+            if raw:
+                cursor.row_factory = None
+            return self._execute_measured(cursor, sql, params)
+        #Camino directo: connection.execute arma el cursor en C (la row_factory se aplica recién al leer)
+        cursor = self._read_connection().execute(sql, params)
+        if raw:
+            cursor.row_factory = None
+        return cursor
+
+    def _execute_write(self, sql, params=(), many=False):
+        "Escritura: commit inmediato salvo dentro de transaction(). Devuelve el cursor (rowcount, lastrowid)"
+        if self.query_stats is not None:
+            cursor = self.conn.cursor()
+            self._execute_write_measured(cursor, sql, params, many)
+        elif many:
+            cursor = self.conn.executemany(sql, params)
+        else:
+            cursor = self.conn.execute(sql, params)
+        self._commit()
+        return cursor
+
+    #Instrumentación (solo con query_stats)
+    def _execute_measured(self, cursor, sql, params):
+        """Mide la ejecución más la primera fila (ahí SQLite hace el trabajo de ordenar o agregar).
+        El resto se lee como sin medir: las filas se cuentan en el cursor que se devuelve, sin traerlas todas"""
+        start = time.perf_counter()
+        first_rows = cursor.execute(sql, params).fetchmany(1)
+        elapsed = time.perf_counter() - start
+        plan = self._query_plan(cursor.connection, sql, params) if self.query_stats.is_slow(elapsed) else None
+        query_stats = self.query_stats
+        return _MeasuredCursor(cursor, first_rows, lambda rows: query_stats.record(sql, elapsed, rows, plan))
+
+    def _execute_write_measured(self, cursor, sql, params, many):
+        if many:
+            #executemany consume el iterable: lo fijamos para poder armar el plan con la primera fila
+            params = list(params)
+        start = time.perf_counter()
+        if many:
+            cursor.executemany(sql, params)
+        else:
+            cursor.execute(sql, params)
+        elapsed = time.perf_counter() - start
+        plan = None
+        if self.query_stats.is_slow(elapsed) and (params or not many):
+            plan = self._query_plan(self.conn, sql, params[0] if many else params)
+        self.query_stats.record(sql, elapsed, max(cursor.rowcount, 0), plan)
+
+    def _query_plan(self, conn, sql, params):
+        "Detalle de cada paso del EXPLAIN QUERY PLAN"
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    #Transactions
+    @contextmanager
+    def transaction(self):
+        "Agrupa todas las escrituras del bloque en un único commit. Anidada, se une a la exterior"
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.conn.rollback()
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            self._commit_now()
+
+    def _commit(self):
+        "Commit inmediato salvo que estemos dentro de transaction()"
+        if self._transaction_depth == 0:
+            self._commit_now()
+
+    def _commit_now(self):
+        if self.query_stats is None:
+            self.conn.commit()
+            return
+        start = time.perf_counter()
+        self.conn.commit()
+        self.query_stats.record_commit(time.perf_counter() - start)
+
     #Auxiliar methods to avoid repeated code
     def create_task_by_row(self, row):
         return Task(
@@ -63,110 +404,93 @@ class TaskRepository(AbstractRepository):
             description=row['description'],
             #Convertimos el 0/1 a True/False
             completed=(row['completed'] == 1),
-            due_date = self._from_db_format(row['due_date']),
+            #En modo epoch pasamos el int: Task arma el datetime solo si se lo piden
+            due_date = row['due_date'] if self.epoch_due_dates else self._from_db_format(row['due_date']),
             priority=(row['priority'] == 1),
             recurrency=(row['recurrency'] == 1),
             recurrency_days=row['recurrency_days']
         )
 
     def create_tasks_by_rows(self, rows):
-        tasks = []
-        for row in rows:
-            #Recordemos que usamos Row
-            task = self.create_task_by_row(row)
-            tasks.append(task)
-        return tasks
+        #Recordemos que usamos Row
+        return [self.create_task_by_row(row) for row in rows]
+
+    def create_task_batch_by_rows(self, rows):
+        "Arma un TaskBatch a partir de tuplas (id, user_id, description, completed, due_date, priority, recurrency, recurrency_days)"
+        batch = TaskBatch()
+        #TaskBatch acepta los segundos epoch directamente
+        from_db_format = (lambda due_date: due_date) if self.epoch_due_dates else self._from_db_format
+        for id, user_id, description, completed, due_date, priority, recurrency, recurrency_days in rows:
+            batch.append(id, user_id, description, completed == 1, from_db_format(due_date), priority == 1, recurrency == 1, recurrency_days)
+        return batch
 
     def _to_db_format(self, due_date_python):
+        "En modo epoch guarda segundos enteros: las fracciones de segundo se descartan (también en el now de las consultas)"
         if due_date_python is None:
             return None
+        if self.epoch_due_dates:
+            return calendar.timegm(due_date_python.utctimetuple())
         return due_date_python.isoformat(' ')
     
     def _from_db_format(self, due_date_db):
         if due_date_db is None:
             return None
+        if self.epoch_due_dates:
+            return EPOCH + timedelta(seconds=due_date_db)
         return datetime.fromisoformat(due_date_db)
 
     def _get_count_by_id(self, table_name, id):
         #Contamos las f{self.USERS_TABLE_NAME} totales
         sql = f"SELECT COUNT(*) FROM {table_name} WHERE id = ?"
         #Ejecutamos
-        self.cursor.execute(sql, (id,))
-        count = self.cursor.fetchone()[0]
+        count = self._execute(sql, (id,)).fetchone()[0]
         return count
 
     # USER CRUD
     def add_user(self, user_str):
-        #SQL
-        sql = f"INSERT INTO {self.USERS_TABLE_NAME} (username) VALUES (?)"
         try:
-            self.cursor.execute(sql, (user_str,))
+            #Guardamos
+            cursor = self._execute_write(self.statements['insert_user'], (user_str,))
         except sqlite3.Error as e:
             #Handleamos
             print(f"Error al insertar el usuario {e}")
             raise
-        #Guardamos
-        self.conn.commit()
         #Conseguimos el ID y lo devolvemos
-        generated_id = self.cursor.lastrowid
+        generated_id = cursor.lastrowid
         return generated_id
     
     def users_count(self):
-        #Contamos las f{self.USERS_TABLE_NAME} totales
-        sql = f"SELECT COUNT(*) FROM {self.USERS_TABLE_NAME}"
-        #Ejecutamos
-        self.cursor.execute(sql)
-        count = self.cursor.fetchone()[0]
+        #Contamos los usuarios totales
+        count = self._execute(self.statements['count_users']).fetchone()[0]
         return count
     
     def contains_user_by_id(self, user_id):
-        sql = f"SELECT COUNT(id) FROM {self.USERS_TABLE_NAME} WHERE id = ?"
         #Ejecutamos la consulta
-        self.cursor.execute(sql, (user_id,))
-        #Recuperamos lo obtenido
-        count = self.cursor.fetchone()[0]
+        count = self._execute(self.statements['contains_user_id'], (user_id,)).fetchone()[0]
         return count > 0
     
     def contains_user_by_username(self, username):
-        sql = f"SELECT COUNT(id) FROM {self.USERS_TABLE_NAME} WHERE username = ?"
         #Ejecutamos la consulta
-        self.cursor.execute(sql, (username,))
-        #Recuperamos lo obtenido
-        count = self.cursor.fetchone()[0]
+        count = self._execute(self.statements['contains_username'], (username,)).fetchone()[0]
         return count > 0
     
     def contains_user_by_username(self, username):
-        sql = f"SELECT COUNT(id) FROM {self.USERS_TABLE_NAME} WHERE username = ?"
         #Ejecutamos la consulta
-        self.cursor.execute(sql, (username,))
-        #Recuperamos lo obtenido
-        count = self.cursor.fetchone()[0]
+        count = self._execute(self.statements['contains_username'], (username,)).fetchone()[0]
         return count > 0
     
     def update_user_name_of(self, user_id, new_username):
-        #SQL
-        sql = f"UPDATE {self.USERS_TABLE_NAME} SET username = ? WHERE id = ?"
-        #Ejecutamos
-        self.cursor.execute(sql, (new_username, user_id))
-        #Guardamos los cambios
-        self.conn.commit()
+        #Ejecutamos y guardamos los cambios
+        self._execute_write(self.statements['rename_user'], (new_username, user_id))
     
     def get_user_name_by_id(self, user_id):
-        #SQL
-        sql = f"SELECT username FROM {self.USERS_TABLE_NAME} WHERE id = ?"
-        #Ejecutamos
-        self.cursor.execute(sql, (user_id,))
-        #Conseguimos el resultado
-        username = self.cursor.fetchone()[0]
+        #Ejecutamos y conseguimos el resultado
+        username = self._execute(self.statements['get_username'], (user_id,)).fetchone()[0]
         return username
     
     def get_user_id_by_username(self, username):
-        #SQL
-        sql = f"SELECT id FROM {self.USERS_TABLE_NAME} WHERE username = ?"
-        #Ejecutamos
-        self.cursor.execute(sql, (username,))
-        #Conseguimos el resultado
-        username = self.cursor.fetchone()[0]
+        #Ejecutamos y conseguimos el resultado
+        username = self._execute(self.statements['get_user_id'], (username,)).fetchone()[0]
         return username
 
     #CRUD DE TAREAS
@@ -174,39 +498,56 @@ class TaskRepository(AbstractRepository):
     def add_task_by_user_id_global(self, description, user_id, due_date=None, priority=False, recurrency=False, recurrency_days = 0):
         #La fecha nos vino como un datetime, tenemos que transformarla a ISO
         due_date_iso = self._to_db_format(due_date)
-        sql = f"INSERT INTO {self.TABLE_NAME} (user_id, description, completed, due_date, priority, recurrency, recurrency_days) VALUES (?, ?, ?, ?, ?, ?, ?)"
         try:
-            self.cursor.execute(sql, (user_id, description, 0, due_date_iso, priority, recurrency, recurrency_days))
+            #Guardamos los cambios
+            cursor = self._execute_write(self.statements['insert_task'], (user_id, description, 0, due_date_iso, priority, recurrency, recurrency_days))
         except sqlite3.Error as e:
             #Handleamos
             print(f"Error al insertar la tarea {e}")
             raise
-        #Guardamos los cambios
-        self.conn.commit()
         #Handleamos el id
-        generated_id = self.cursor.lastrowid
+        generated_id = cursor.lastrowid
         return generated_id
+
+    def add_tasks_bulk(self, tasks):
+        "Inserta muchas tareas con executemany. tasks: tuplas con los argumentos de add_task_by_user_id_global"
+        rows = (self._task_args_to_row(*task) for task in tasks)
+        try:
+            #Guardamos los cambios
+            cursor = self._execute_write(self.statements['insert_task'], rows, many=True)
+        except sqlite3.Error as e:
+            #Handleamos
+            print(f"Error al insertar las tareas {e}")
+            raise
+        #Cantidad de tareas insertadas
+        return cursor.rowcount
+
+    def _task_args_to_row(self, description, user_id, due_date=None, priority=False, recurrency=False, recurrency_days=0):
+        return (user_id, description, 0, self._to_db_format(due_date), priority, recurrency, recurrency_days)
     
     #2. Read
-    def get_task_by_id_global(self, task_id):
-        sql = f"SELECT id, user_id, description, completed, due_date, priority, recurrency, recurrency_days FROM {self.TABLE_NAME} WHERE id = ?"
-        #Ejecutamos
-        self.cursor.execute(sql, (task_id,))
-        #Fetcheamos el resultado obtenido
-        fetched_task = self.cursor.fetchone()
+    def get_task_by_id_global(self, task_id, user_id=None):
+        "Devuelve la tarea, o None si no existe (o no es de user_id)"
+        sql, params = self._task_statement('get_task', task_id, user_id)
+        #Ejecutamos y fetcheamos el resultado obtenido
+        fetched_task = self._execute(sql, params).fetchone()
+        if fetched_task is None:
+            return None
         #Construimos el objeto tarea a partir de esto
         task = self.create_task_by_row(fetched_task)
         return task
     
-    def get_pending_tasks_by_user_id_global(self, user_id=None):
+    def get_pending_tasks_by_user_id_global(self, user_id=None, as_batch=False):
+        "Tareas pendientes (de todos si user_id es None). Con as_batch devuelve un TaskBatch columnar"
         if user_id == None:
-            sql = f"SELECT id, description, completed, due_date, priority, recurrency, recurrency_days FROM {self.TABLE_NAME} WHERE completed = 0"    
-            self.cursor.execute(sql)
+            sql, params = self.statements['pending'], ()
         else:
-            sql = f"SELECT id, user_id, description, completed, due_date, priority, recurrency, recurrency_days FROM {self.TABLE_NAME} WHERE completed = 0 AND user_id = ?"
-            self.cursor.execute(sql, (user_id,))
+            sql, params = self.statements['pending_by_user'], (user_id,)
+        if as_batch:
+            #Tuplas planas: recorremos las filas sin fetchall ni sqlite3.Row
+            return self.create_task_batch_by_rows(self._execute(sql, params, raw=True))
         #Conseguimos todos los resultados
-        rows = self.cursor.fetchall()
+        rows = self._execute(sql, params).fetchall()
         pending_tasks = self.create_tasks_by_rows(rows)
         return pending_tasks
     
@@ -214,87 +555,223 @@ class TaskRepository(AbstractRepository):
         #Obtenemos el ahora y lo transformamos en db_format
         now_time = self.clock.now()
         now_str = self._to_db_format(now_time)
-
-        #sql
-        sql = f"""
-        SELECT id, user_id, description, completed, due_date, priority, recurrency, recurrency_days FROM {self.TABLE_NAME}
-        WHERE completed = 0
-        AND user_id = ?
-        AND due_date IS NOT NULL
-        AND due_date < ?
-        """
-        #Ejecutamos
-        self.cursor.execute(sql, (user_id, now_str))
-        #Obtenemos el resultado
-        rows = self.cursor.fetchall()
+        #Ejecutamos y obtenemos el resultado
+        rows = self._execute(self.statements['overdue_by_user'], (user_id, now_str)).fetchall()
         overdue_tasks = self.create_tasks_by_rows(rows)
         return overdue_tasks
 
+    def get_pending_tasks_page(self, user_id, after_id=None, limit=50, order='asc'):
+        "Una página de pendientes del usuario, keyset sobre id: las de id mayor (asc) o menor (desc) que after_id"
+        return self._get_tasks_page('pending_page', (user_id,), after_id, limit, order)
+
+    def _get_tasks_page(self, name, params, after_id, limit, order):
+        "name: prefijo en el registro de las cuatro variantes (asc/desc, con o sin after_id)"
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"order debe ser 'asc' o 'desc', no {order!r}")
+        if after_id != None:
+            sql = self.statements[f'{name}_{order}_after']
+            params += (after_id,)
+        else:
+            sql = self.statements[f'{name}_{order}']
+        rows = self._execute(sql, params + (limit,)).fetchall()
+        return self.create_tasks_by_rows(rows)
+
+    #2.0 Búsqueda
+    def search_tasks(self, user_id, query, limit=50, offset=0):
+        """Tasks of the user (pending or completed) whose description has every word of query,
+        each one as a prefix ("cap" finds "capítulo"). Most relevant first (FTS5 bm25)"""
+        match = self._fts_query(query)
+        if match is None:
+            return []
+        rows = self._execute(self.statements['search'], (match, user_id, limit, offset)).fetchall()
+        return self.create_tasks_by_rows(rows)
+
+    def _fts_query(self, query):
+        "Texto libre -> consulta FTS5: cada palabra entre comillas (sin operadores) y como prefijo. None si no hay palabras"
+        words = re.findall(r'\w+', query)
+        if not words:
+            return None
+        return ' '.join(f'"{word}"*' for word in words)
+
+    #2.1 Streaming
+    def iter_pending_tasks(self, user_id=None, batch_size=STREAM_BATCH_SIZE, after_id=0):
+        "Generador de tareas pendientes con id > after_id, de a batch_size por consulta: memoria constante"
+        if user_id == None:
+            return self._iter_tasks_by_keyset(self.statements['iter_pending'], (), batch_size, after_id)
+        return self._iter_tasks_by_keyset(self.statements['iter_pending_by_user'], (user_id,), batch_size, after_id)
+
+    def iter_overdue_tasks(self, user_id=None, batch_size=STREAM_BATCH_SIZE):
+        "Generador de tareas vencidas (respecto del ahora al empezar), de a batch_size por consulta"
+        now_str = self._to_db_format(self.clock.now())
+        if user_id == None:
+            return self._iter_tasks_by_keyset(self.statements['iter_overdue'], (now_str,), batch_size)
+        return self._iter_tasks_by_keyset(self.statements['iter_overdue_by_user'], (now_str, user_id), batch_size)
+
+    def _iter_tasks_by_keyset(self, sql, params, batch_size, after_id=0):
+        "sql termina en 'id > ? ORDER BY id LIMIT ?'. Cada página es una consulta nueva, así no hay un cursor abierto entre páginas"
+        last_id = after_id
+        while True:
+            rows = self._execute(sql, params + (last_id, batch_size)).fetchmany(batch_size)
+            for row in rows:
+                yield self.create_task_by_row(row)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]['id']
+
+    def iter_recurring_done_tasks(self, batch_size=STREAM_BATCH_SIZE):
+        "Generador de las recurrentes completadas (las que un barrido de recurrencias mira)"
+        return self._iter_tasks_by_keyset(self.statements['iter_recurring_done'], (), batch_size)
+
+    def iter_completed_task_owners(self, batch_size=STREAM_BATCH_SIZE):
+        "Generador de pares (task_id, user_id) de las tareas completadas, sin armar objetos Task"
+        return self._iter_pairs_by_keyset(self.statements['iter_completed_owners'], batch_size)
+
+    def iter_users(self, batch_size=STREAM_BATCH_SIZE):
+        "Generador de pares (user_id, username)"
+        return self._iter_pairs_by_keyset(self.statements['iter_users'], batch_size)
+
+    def _iter_pairs_by_keyset(self, sql, batch_size):
+        last_id = 0
+        while True:
+            rows = self._execute(sql, (last_id, batch_size), raw=True).fetchall()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def get_recurrence_child_id(self, task_id):
+        "Id de la ocurrencia que generó la tarea, o None"
+        row = self._execute(self.statements['recurrence_child_id'], (task_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def get_last_id(self, table_name):
+        "Último id que dio AUTOINCREMENT en la tabla (0 si nunca se insertó)"
+        row = self._execute(self.statements['last_id'], (table_name,)).fetchone()
+        return 0 if row is None else row[0]
+
+    #Copias desde otro repositorio (los ids ya vienen asignados)
+    def insert_users(self, users):
+        "users: pares (user_id, username)"
+        return self._execute_write(self.statements['insert_users_with_ids'], users, many=True).rowcount
+
+    def insert_tasks(self, tasks, parent_ids=None):
+        "Inserta objetos Task con su id. parent_ids: task_id -> recurrence_parent_id"
+        parent_ids = parent_ids or {}
+        rows = ((task.id, task.user_id, task.description, task.completed, self._to_db_format(task.get_due_date()), task.priority,
+                 task.recurrency, task.recurrency_days, parent_ids.get(task.id)) for task in tasks)
+        return self._execute_write(self.statements['insert_tasks_with_ids'], rows, many=True).rowcount
+
+    def set_last_id(self, table_name, last_id):
+        "Fija el próximo id de AUTOINCREMENT (last_id + 1), aunque las últimas filas se hayan borrado"
+        with self.transaction():
+            self._execute_write(self.statements['delete_last_id'], (table_name,))
+            self._execute_write(self.statements['insert_last_id'], (table_name, last_id))
+
     #3. Update
-    def complete_task_global(self, task_id):
-        sql = f"UPDATE {self.TABLE_NAME} SET completed = NOT completed WHERE id = ?"
-        self.cursor.execute(sql, (task_id,))
+    def complete_task_global(self, task_id, user_id=None):
+        sql, params = self._task_statement('complete_task', task_id, user_id)
         #Guardamos los cambios
-        self.conn.commit()
+        return self._execute_write(sql, params).rowcount > 0
         
-    def change_task_priority_global(self, task_id):
-        sql = f"UPDATE {self.TABLE_NAME} SET priority = NOT priority WHERE id = ?"
-        self.cursor.execute(sql, (task_id,))
+    def change_task_priority_global(self, task_id, user_id=None):
+        sql, params = self._task_statement('toggle_priority', task_id, user_id)
         #Guardamos los cambios
-        self.conn.commit()
+        return self._execute_write(sql, params).rowcount > 0
 
-    def change_task_recurrency_global(self, task_id):
-        sql = f"UPDATE {self.TABLE_NAME} SET recurrency = NOT recurrency WHERE id = ?"
-        self.cursor.execute(sql, (task_id,))
+    def change_task_recurrency_global(self, task_id, user_id=None):
+        sql, params = self._task_statement('toggle_recurrency', task_id, user_id)
         #Guardamos los cambios
-        self.conn.commit()
+        return self._execute_write(sql, params).rowcount > 0
 
-    def update_task_due_date_global(self, task_id, new_due_date):
-        #SQL
-        sql = f"UPDATE {self.TABLE_NAME} SET due_date = ? WHERE id = ?"
+    def complete_tasks_bulk(self, task_ids, user_id=None):
+        "Marca como completadas todas las tareas. Si se pasa user_id, solo las de ese usuario. Devuelve cuántas matchearon"
+        if user_id == None:
+            sql = self.statements['complete_tasks_bulk']
+            params = ((task_id,) for task_id in task_ids)
+        else:
+            sql = self.statements['complete_tasks_bulk_for_user']
+            params = ((task_id, user_id) for task_id in task_ids)
+        #Guardamos los cambios
+        return self._execute_write(sql, params, many=True).rowcount
+
+    def update_task_due_date_global(self, task_id, new_due_date, user_id=None):
+        sql, params = self._task_statement('update_due_date', task_id, user_id)
         #Conseguimos la fecha según formato correcto
         new_due_date_db = self._to_db_format(new_due_date)
-        self.cursor.execute(sql, (new_due_date_db, task_id))
         #Guardamos los cambios
-        self.conn.commit()
+        return self._execute_write(sql, (new_due_date_db,) + params).rowcount > 0
 
-    def update_task_description_global(self, task_id, new_description):
-        #SQL
-        sql = f"UPDATE {self.TABLE_NAME} SET description = ? WHERE id = ?"
-        self.cursor.execute(sql, (new_description, task_id))
+    def update_task_description_global(self, task_id, new_description, user_id=None):
+        sql, params = self._task_statement('update_description', task_id, user_id)
         #Guardamos los cambios
-        self.conn.commit()
+        return self._execute_write(sql, (new_description,) + params).rowcount > 0
 
     #4. Delete
-    def delete_task_global(self, task_id):
-        sql = f"DELETE FROM {self.TABLE_NAME} WHERE id = ?"
-        self.cursor.execute(sql, (task_id,))
+    def delete_task_global(self, task_id, user_id=None):
+        sql, params = self._task_statement('delete_task', task_id, user_id)
         #Guardamos los cambios
-        self.conn.commit()
+        return self._execute_write(sql, params).rowcount > 0
     
-    #State
-    def contains_task_by_user_id(self, task_id, user_id=None):
+    def delete_tasks_bulk(self, task_ids, user_id=None):
+        "Borra todas las tareas. Si se pasa user_id, solo las de ese usuario. Devuelve cuántas se borraron"
         if user_id == None:
-            sql = sql = f"SELECT COUNT(id) FROM {self.TABLE_NAME} WHERE id = ?"
-            self.cursor.execute(sql, (task_id,))
+            sql = self.statements['delete_tasks_bulk']
+            params = ((task_id,) for task_id in task_ids)
         else:
-            sql = f"SELECT COUNT(id) FROM {self.TABLE_NAME} WHERE id = ? AND user_id = ?"
-            self.cursor.execute(sql, (task_id, user_id))
+            sql = self.statements['delete_tasks_bulk_for_user']
+            params = ((task_id, user_id) for task_id in task_ids)
+        #Guardamos los cambios
+        return self._execute_write(sql, params, many=True).rowcount
+    
+    #Recurrencias
+    def materialize_recurring_tasks(self, now, task_ids=None):
+        """Creates the next occurrence of every completed recurring task in one INSERT ... SELECT.
+        The recurrence moves to the new task (the completed one stops being recurring). Returns how many were created"""
+        params = {'now': self._to_db_format(now)}
+        suffix = ''
+        if task_ids is not None:
+            #Solo esas tareas
+            suffix = '_ids'
+            params['ids'] = json.dumps(list(task_ids))
+        with self.transaction():
+            created = self._execute_write(self.statements['materialize_insert' + suffix], params).rowcount
+            self._execute_write(self.statements['materialize_update' + suffix], params)
+        return created
+
+    #State
+    def contains_task_by_user_id(self, task_id, user_id=None):
+        sql, params = self._task_statement('contains_task', task_id, user_id)
         #Recuperamos lo obtenido
-        count = self.cursor.fetchone()[0]
+        count = self._execute(sql, params).fetchone()[0]
         return count > 0
 
-    def task_is_completed_global(self, task_id):
-        sql = f"SELECT completed FROM {self.TABLE_NAME} WHERE id = ?"
-        self.cursor.execute(sql, (task_id,))
+    def task_is_completed_global(self, task_id, user_id=None):
+        "True/False, o None si la tarea no existe (o no es de user_id)"
+        sql, params = self._task_statement('task_is_completed', task_id, user_id)
         #Obtenemos el resultado (recordemos que el False se guarda como un 0)
-        completed_int  = self.cursor.fetchone()[0]
-        return completed_int == 1
+        row = self._execute(sql, params).fetchone()
+        if row is None:
+            return None
+        return row[0] == 1
 
     def tasks_count_by_user_id(self, user_id):
-        #Contamos las f{self.USERS_TABLE_NAME} totales
-        sql = f"SELECT COUNT(*) FROM {self.TABLE_NAME} WHERE user_id = ?"
-        #Ejecutamos
-        self.cursor.execute(sql, (user_id,))
-        count = self.cursor.fetchone()[0]
+        #Contamos las tareas del usuario
+        count = self._execute(self.statements['count_tasks_by_user'], (user_id,)).fetchone()[0]
         return count
+
+    #Resúmenes
+    def get_user_task_summary(self, user_id):
+        "TaskSummary del usuario en una sola consulta (ceros si no tiene tareas)"
+        now_str = self._to_db_format(self.clock.now())
+        row = self._execute(self.statements['user_summary'], (now_str, user_id), raw=True).fetchone()
+        if row is None:
+            #Con contadores: el usuario nunca tuvo tareas
+            return TaskSummary(user_id)
+        #Sin contadores y sin tareas, los SUM dan NULL
+        return TaskSummary(user_id, *(count or 0 for count in row))
+
+    def get_all_user_summaries(self):
+        "TaskSummary de cada usuario con tareas, ordenados por user_id, en una sola consulta"
+        now_str = self._to_db_format(self.clock.now())
+        rows = self._execute(self.statements['all_user_summaries'], (now_str,), raw=True)
+        return [TaskSummary(*row) for row in rows]
@@ -0,0 +1,161 @@
+#Trazas por operación: qué llamó a qué (fachada -> manager -> repositorio) y cuánto tardó cada paso
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+#Span abierto en el contexto actual (cada hilo y cada task de asyncio tiene el suyo)
+_current_span = ContextVar('task_manager_current_span', default=None)
+
+#Métodos del repositorio que también se trazan aunque sean privados: ahí está el tiempo en SQLite
+TRACED_PRIVATE_METHODS = ('_execute', '_execute_write', '_commit_now')
+#Helpers que corren una vez por fila: trazarlos solo agrega ruido
+UNTRACED_METHODS = ('create_task_by_row',)
+
+
+class Span:
+    __slots__ = ('name', 'path', 'children', 'seconds')
+
+    def __init__(self, name, parent):
+        self.name = name
+        self.path = parent.path + (name,) if parent is not None else (name,)
+        self.children = []
+        self.seconds = 0.0
+
+    def self_seconds(self):
+        "Tiempo propio, sin el de los spans hijos"
+        return self.seconds - sum(child.seconds for child in self.children)
+
+    def __repr__(self):
+        return f"Span({self.name!r}, {self.seconds * 1000:.3f} ms, {len(self.children)} children)"
+
+
+class Tracer:
+    """Collects spans while enabled. Spans nest through a ContextVar, so concurrent threads and
+    asyncio tasks each get their own call tree. Self time is aggregated per call path for
+    write_collapsed() (flame graph "collapsed stack" format); the last max_traces root spans are
+    kept with their children in traces. Disabled, a traced method costs one attribute check"""
+    def __init__(self, enabled=False, max_traces=100):
+        self.enabled = enabled
+        self.traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+        #path (tupla de nombres) -> segundos propios acumulados
+        self._self_seconds = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.traces.clear()
+            self._self_seconds.clear()
+
+    @contextmanager
+    def span(self, name):
+        "Span manual (por ejemplo, alrededor de un job de la GUI)"
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        span = Span(name, parent)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - start
+            _current_span.reset(token)
+            self._finish(span, parent)
+
+    def _finish(self, span, parent):
+        self_seconds = span.self_seconds()
+        with self._lock:
+            self._self_seconds[span.path] = self._self_seconds.get(span.path, 0.0) + self_seconds
+            if parent is None:
+                self.traces.append(span)
+            else:
+                parent.children.append(span)
+
+    def collapsed(self):
+        "Líneas 'a;b;c microsegundos' (tiempo propio por camino), de mayor a menor"
+        with self._lock:
+            totals = list(self._self_seconds.items())
+        totals.sort(key=lambda item: item[1], reverse=True)
+        return [f"{';'.join(path)} {round(seconds * 1e6)}" for path, seconds in totals]
+
+    def write_collapsed(self, path):
+        "Archivo para flamegraph.pl / speedscope / inferno"
+        with open(path, 'w') as file:
+            for line in self.collapsed():
+                file.write(line + '\n')
+
+
+def _traced(tracer, name, method):
+    @functools.wraps(method)
+    def traced(*args, **kwargs):
+        if not tracer.enabled:
+            return method(*args, **kwargs)
+        parent = _current_span.get()
+        span = Span(name, parent)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            span.seconds = time.perf_counter() - start
+            _current_span.reset(token)
+            tracer._finish(span, parent)
+    traced.__traced__ = method
+    return traced
+
+
+def _traced_method_names(obj):
+    for name, attribute in inspect.getmembers(type(obj)):
+        if name.startswith('_') and name not in TRACED_PRIVATE_METHODS:
+            continue
+        if name in UNTRACED_METHODS or not callable(attribute) or isinstance(attribute, type):
+            continue
+        #Generadores y context managers (iter_*, transaction) devuelven enseguida: el span no mediría su trabajo
+        if inspect.isgeneratorfunction(inspect.unwrap(attribute)):
+            continue
+        yield name
+
+
+def trace_object(obj, tracer, label=None):
+    """Wraps the public methods of obj (and _execute/_execute_write/_commit_now) with spans named
+    'label.method' (label defaults to the class name). Only this instance is affected: the methods
+    are set as instance attributes, so internal self.method() calls are traced too"""
+    label = label or type(obj).__name__
+    for name in _traced_method_names(obj):
+        method = getattr(obj, name)
+        if hasattr(method, '__traced__'):
+            continue
+        setattr(obj, name, _traced(tracer, f'{label}.{name}', method))
+    return obj
+
+
+def untrace_object(obj):
+    "Quita los wrappers que puso trace_object"
+    for name, attribute in list(vars(obj).items()):
+        if hasattr(attribute, '__traced__'):
+            delattr(obj, name)
+    return obj
+
+
+def trace_stack(facade, tracer):
+    "Traza la fachada, su manager y el repositorio del manager (y el store de los repositorios que envuelven a otro)"
+    trace_object(facade, tracer)
+    trace_object(facade.manager, tracer)
+    repository = facade.manager.repository
+    trace_object(repository, tracer)
+    for inner in ('repository', 'store'):
+        wrapped = vars(repository).get(inner)
+        if wrapped is not None:
+            trace_object(wrapped, tracer)
+    return facade
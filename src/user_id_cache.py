@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from datetime import timedelta
+from .clock_implementations import SystemClock
+
+class UserIdCache:
+    "Cache LRU con TTL de username -> user_id"
+    def __init__(self, max_size=1024, ttl_seconds=300, clock=None):
+        self.max_size = max_size
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.clock = clock if clock is not None else SystemClock()
+        #username -> (user_id, expira)
+        self._entries = OrderedDict()
+        #user_id -> username, para invalidar por id (renombres)
+        self._usernames_by_id = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username):
+        "Devuelve el user_id cacheado, o None si no está o expiró"
+        entry = self._entries.get(username)
+        if entry is None:
+            self.misses += 1
+            return None
+        user_id, expires_at = entry
+        if self.clock.now() >= expires_at:
+            self._remove(username)
+            self.misses += 1
+            return None
+        #Lo marcamos como el más reciente
+        self._entries.move_to_end(username)
+        self.hits += 1
+        return user_id
+
+    def put(self, username, user_id):
+        self._remove(username)
+        self._entries[username] = (user_id, self.clock.now() + self.ttl)
+        self._usernames_by_id[user_id] = username
+        #Desalojamos el menos usado
+        while len(self._entries) > self.max_size:
+            oldest_username = next(iter(self._entries))
+            self._remove(oldest_username)
+
+    def invalidate(self, user_id, username):
+        "Olvida todo lo que sepamos del usuario y del username (alta o renombre)"
+        self._remove(username)
+        old_username = self._usernames_by_id.get(user_id)
+        if old_username is not None:
+            self._remove(old_username)
+
+    def clear(self):
+        self._entries.clear()
+        self._usernames_by_id.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, username):
+        entry = self._entries.pop(username, None)
+        if entry is not None and self._usernames_by_id.get(entry[0]) == username:
+            del self._usernames_by_id[entry[0]]
@@ -0,0 +1,113 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import threading
+import sqlite3
+from src.task_manager import TaskManager, AuthenticationError
+from src.pooled_task_repository import PooledTaskRepository
+from src.async_task_repository import AsyncTaskRepository
+from src.async_task_manager import AsyncTaskManager
+from src.clock_implementations import MockClock
+from datetime import datetime
+class TestAsyncTaskManager(unittest.IsolatedAsyncioTestCase):
+    MAX_PENDING = 8
+    async def asyncSetUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.repository = PooledTaskRepository(os.path.join(tempfile.mkdtemp(), 'async.db'), self.mock_clock)
+        self.async_repository = AsyncTaskRepository(self.repository, read_workers=2, max_pending=self.MAX_PENDING)
+        self.manager = AsyncTaskManager(TaskManager(self.repository), self.async_repository)
+        self.user_id = await self.manager.add_user("jelias1203")
+        self.release = threading.Event()
+        #La escritura bloqueante ya está corriendo en el hilo del escritor
+        self.writer_blocked = threading.Event()
+        #Todo lo que se lanza con spawn se espera (o se cancela) antes de cerrar el escritor
+        self.futures = []
+
+    async def asyncTearDown(self):
+        self.release.set()
+        if self.futures:
+            done, not_done = await asyncio.wait(self.futures, timeout=5)
+            for future in not_done:
+                future.cancel()
+            await asyncio.gather(*self.futures, return_exceptions=True)
+        await self.manager.close()
+
+    def spawn(self, coroutine):
+        future = asyncio.ensure_future(coroutine)
+        self.futures.append(future)
+        return future
+
+    async def wait_until(self, condition, timeout=5):
+        "Espera (sin dormir un tiempo fijo) a que condition() sea cierta"
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not condition():
+            if asyncio.get_running_loop().time() > deadline:
+                self.fail(f"condition not met after {timeout}s")
+            await asyncio.sleep(0.001)
+
+    async def block_writer(self):
+        "Encola una escritura que frena al escritor hasta release.set() y espera a que el escritor la tome"
+        def blocking_write():
+            self.writer_blocked.set()
+            self.release.wait(5)
+        blocker = self.spawn(self.async_repository.run_write(blocking_write))
+        await self.wait_until(self.writer_blocked.is_set)
+        return blocker
+
+    async def test_mirrors_task_manager_api(self):
+        task_id = await self.manager.add_task_for_user("Leer", self.user_id)
+        await self.manager.complete_task_for_user(task_id, self.user_id)
+        other_task_id = await self.manager.add_task_for_user("Correr", self.user_id)
+        #Asserts
+        self.assertTrue(await self.manager.task_is_completed_for_user(task_id, self.user_id))
+        self.assertEqual([task.get_id() for task in await self.manager.get_pending_tasks_for_user(self.user_id)], [other_task_id])
+        with self.assertRaises(AuthenticationError):
+            await self.manager.delete_task_for_user(other_task_id, self.user_id + 1)
+
+    async def test_concurrent_writes_share_one_commit(self):
+        blocker = await self.block_writer()
+        commits = self.async_repository.commits
+        writes = [self.spawn(self.manager.add_task_for_user(f"Task {i}", self.user_id)) for i in range(self.MAX_PENDING - 1)]
+        #Todas encoladas detrás de la bloqueante antes de soltarla
+        await self.wait_until(lambda: self.async_repository.writer.pending() == self.MAX_PENDING - 1)
+        self.release.set()
+        task_ids = await asyncio.gather(*writes)
+        await blocker
+        #Asserts: el commit del bloqueante y uno solo para todas las que esperaban
+        self.assertEqual(sorted(task_ids), list(range(1, self.MAX_PENDING)))
+        self.assertEqual(self.async_repository.commits, commits + 2)
+        self.assertEqual(self.async_repository.writes, self.MAX_PENDING + 1)
+
+    async def test_failing_write_only_rolls_back_itself(self):
+        blocker = await self.block_writer()
+        first = self.spawn(self.manager.add_task_for_user("Ok 1", self.user_id))
+        duplicate = self.spawn(self.async_repository.add_user("jelias1203"))
+        second = self.spawn(self.manager.add_task_for_user("Ok 2", self.user_id))
+        await self.wait_until(lambda: self.async_repository.writer.pending() == 3)
+        self.release.set()
+        results = await asyncio.gather(first, duplicate, second, return_exceptions=True)
+        await blocker
+        #Asserts
+        self.assertIsInstance(results[1], sqlite3.IntegrityError)
+        self.assertEqual(await self.manager.tasks_count_by_user_id(self.user_id), 2)
+
+    async def test_backpressure_limits_in_flight_operations(self):
+        blocker = await self.block_writer()
+        writes = [self.spawn(self.manager.add_task_for_user(f"Task {i}", self.user_id)) for i in range(self.MAX_PENDING + 5)]
+        #Asserts: hay MAX_PENDING aceptadas (una en el escritor), el resto espera sin encolarse
+        await self.wait_until(lambda: self.async_repository.writer.pending() == self.MAX_PENDING - 1)
+        self.assertEqual(self.async_repository.in_flight, self.MAX_PENDING)
+        #Aunque el loop siga corriendo, ninguna más pasa el límite
+        for _ in range(10):
+            await asyncio.sleep(0)
+        self.assertEqual(self.async_repository.in_flight, self.MAX_PENDING)
+        self.assertEqual(self.async_repository.writer.pending(), self.MAX_PENDING - 1)
+        self.release.set()
+        await asyncio.gather(blocker, *writes)
+        self.assertEqual(self.async_repository.in_flight, 0)
+        self.assertEqual(await self.manager.tasks_count_by_user_id(self.user_id), self.MAX_PENDING + 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
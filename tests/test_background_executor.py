@@ -0,0 +1,52 @@
+import unittest
+import threading
+from src.background_executor import BackgroundExecutor
+class TestBackgroundExecutor(unittest.TestCase):
+    def setUp(self):
+        #El recurso registra el hilo en el que se creó
+        self.closed = []
+        self.release = threading.Event()
+        self.executor = BackgroundExecutor(lambda: {'thread': threading.get_ident()}, lambda resource: self.closed.append(resource))
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown()
+
+    def test_job_runs_on_worker_and_callback_runs_on_poll(self):
+        results = []
+        self.executor.submit(lambda resource: (resource['thread'], threading.get_ident()), results.append)
+        self.assertTrue(self.executor.is_busy())
+        self.executor.wait(timeout=5)
+        #Asserts
+        resource_thread, job_thread = results[0]
+        self.assertEqual(resource_thread, job_thread)
+        self.assertNotEqual(job_thread, threading.get_ident())
+        self.assertFalse(self.executor.is_busy())
+
+    def test_errors_are_delivered_to_on_error(self):
+        errors = []
+        self.executor.submit(lambda resource: 1 / 0, on_error=errors.append)
+        self.executor.wait(timeout=5)
+        #Asserts
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+
+    def test_newer_submit_with_same_key_discards_stale_result(self):
+        results = []
+        #Bloqueamos el worker para que las cargas se acumulen
+        self.executor.submit(lambda resource: self.release.wait(5))
+        self.executor.submit(lambda resource: 'old', results.append, key='task_list')
+        self.executor.submit(lambda resource: 'new', results.append, key='task_list')
+        self.release.set()
+        self.executor.wait(timeout=5)
+        #Asserts
+        self.assertEqual(results, ['new'])
+
+    def test_shutdown_closes_resource(self):
+        self.executor.submit(lambda resource: None)
+        self.executor.shutdown()
+        #Asserts
+        self.assertEqual(len(self.closed), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
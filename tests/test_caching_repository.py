@@ -0,0 +1,168 @@
+import unittest
+from src.task_manager import TaskManager
+from src.task_repository import TaskRepository
+from src.caching_repository import CachingRepository
+from src.recurrence_engine import RecurrenceEngine
+from src.clock_implementations import MockClock
+from datetime import datetime, timedelta
+from tests import test_task_manager
+class TestCachingRepository(unittest.TestCase):
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.inner = TaskRepository('test_tasks.db', self.mock_clock, True)
+        self.repository = CachingRepository(self.inner, max_users=2)
+        self.user_one = self.repository.add_user("jelias1203")
+        self.user_two = self.repository.add_user("martin195")
+
+    def tearDown(self):
+        self.repository.close()
+
+    def pending_ids(self, user_id):
+        return [task.get_id() for task in self.repository.get_pending_tasks_by_user_id_global(user_id)]
+
+    def test_second_read_is_a_hit(self):
+        task_id = self.repository.add_task_by_user_id_global("Tarea", self.user_one)
+        #Asserts
+        self.assertEqual(self.pending_ids(self.user_one), [task_id])
+        self.assertEqual(self.pending_ids(self.user_one), [task_id])
+        stats = self.repository.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_writes_invalidate_only_the_owner(self):
+        task_one = self.repository.add_task_by_user_id_global("Tarea 1", self.user_one)
+        task_two = self.repository.add_task_by_user_id_global("Tarea 2", self.user_two)
+        self.pending_ids(self.user_one)
+        self.pending_ids(self.user_two)
+        #Sin user_id: el dueño sale de las listas cacheadas
+        self.repository.complete_task_global(task_one)
+        #Asserts
+        self.assertEqual(self.pending_ids(self.user_one), [])
+        self.assertEqual(self.pending_ids(self.user_two), [task_two])
+        self.assertEqual(self.repository.stats()['misses'], 3)
+
+    def test_every_mutation_is_seen(self):
+        now = self.mock_clock.now()
+        task_id = self.repository.add_task_by_user_id_global("Tarea", self.user_one, now + timedelta(days=1))
+        self.assertEqual(self.repository.get_pending_tasks_by_user_id_global(self.user_one)[0].get_description(), "Tarea")
+        self.repository.update_task_description_global(task_id, "Otra")
+        self.assertEqual(self.repository.get_pending_tasks_by_user_id_global(self.user_one)[0].get_description(), "Otra")
+        self.repository.change_task_priority_global(task_id)
+        self.assertTrue(self.repository.get_pending_tasks_by_user_id_global(self.user_one)[0].is_priority())
+        self.assertEqual(self.repository.get_overdue_tasks_by_user_id_global(self.user_one), [])
+        self.repository.update_task_due_date_global(task_id, now - timedelta(days=1))
+        self.assertEqual(len(self.repository.get_overdue_tasks_by_user_id_global(self.user_one)), 1)
+        self.repository.delete_task_global(task_id)
+        self.assertEqual(self.pending_ids(self.user_one), [])
+
+    def test_uncompleting_a_task_that_was_not_cached(self):
+        task_id = self.repository.add_task_by_user_id_global("Tarea", self.user_one)
+        self.repository.complete_task_global(task_id)
+        self.assertEqual(self.pending_ids(self.user_one), [])
+        #Vuelve a pendiente: no estaba en ninguna lista cacheada
+        self.repository.complete_task_global(task_id)
+        #Asserts
+        self.assertEqual(self.pending_ids(self.user_one), [task_id])
+
+    def test_overdue_follows_the_clock_without_invalidation(self):
+        now = self.mock_clock.now()
+        task_id = self.repository.add_task_by_user_id_global("Tarea", self.user_one, now + timedelta(hours=1))
+        self.assertEqual(self.repository.get_overdue_tasks_by_user_id_global(self.user_one), [])
+        self.mock_clock.advance_time(hours=2)
+        #Asserts
+        self.assertEqual([task.get_id() for task in self.repository.get_overdue_tasks_by_user_id_global(self.user_one)], [task_id])
+        self.assertEqual(self.repository.stats()['misses'], 1)
+
+    def test_pages_are_cached_and_invalidated(self):
+        ids = [self.repository.add_task_by_user_id_global(f"Tarea {i}", self.user_one) for i in range(5)]
+        first_page = self.repository.get_pending_tasks_page(self.user_one, limit=2)
+        self.assertEqual([task.get_id() for task in first_page], ids[:2])
+        self.repository.get_pending_tasks_page(self.user_one, limit=2)
+        self.assertEqual(self.repository.stats()['hits'], 1)
+        self.repository.complete_tasks_bulk(ids[:1], self.user_one)
+        #Asserts
+        self.assertEqual([task.get_id() for task in self.repository.get_pending_tasks_page(self.user_one, limit=2)], ids[1:3])
+
+    def test_lru_evicts_least_recently_used_user(self):
+        user_three = self.repository.add_user("tercero")
+        for user_id in (self.user_one, self.user_two, self.user_one, user_three):
+            self.pending_ids(user_id)
+        #Asserts: max_users=2, se fue user_two
+        stats = self.repository.stats()
+        self.assertEqual((stats['users'], stats['evictions']), (2, 1))
+        self.pending_ids(self.user_one)
+        self.assertEqual(self.repository.stats()['hits'], 2)
+        self.pending_ids(self.user_two)
+        self.assertEqual(self.repository.stats()['misses'], 4)
+
+    def test_max_tasks_bounds_the_cache(self):
+        repository = CachingRepository(self.inner, max_tasks=3)
+        self.repository.add_tasks_bulk([("Tarea", self.user_one)] * 2 + [("Tarea", self.user_two)] * 2)
+        repository.get_pending_tasks_by_user_id_global(self.user_one)
+        repository.get_pending_tasks_by_user_id_global(self.user_two)
+        #Asserts
+        stats = repository.stats()
+        self.assertEqual((stats['users'], stats['tasks'], stats['evictions']), (1, 2, 1))
+
+    def test_rolled_back_transaction_keeps_untouched_users(self):
+        self.repository.add_task_by_user_id_global("Tarea", self.user_two)
+        self.pending_ids(self.user_two)
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.add_task_by_user_id_global("Tarea", self.user_one)
+                raise RuntimeError("rollback")
+        #Asserts (user_two no se escribió: sigue cacheado)
+        hits = self.repository.hits
+        self.pending_ids(self.user_two)
+        self.assertEqual(self.repository.hits, hits + 1)
+
+    def test_rolled_back_read_only_transaction_keeps_the_cache(self):
+        self.pending_ids(self.user_one)
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.pending_ids(self.user_one)
+                raise RuntimeError("rollback")
+        #Asserts
+        self.assertEqual(self.repository.stats()['users'], 1)
+
+    def test_rolled_back_write_of_unknown_owner_clears_the_cache(self):
+        task_id = self.repository.add_task_by_user_id_global("Tarea", self.user_one)
+        self.pending_ids(self.user_two)
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                #La tarea no está cacheada: no sabemos de quién es
+                self.repository.update_task_description_global(task_id, "Otra")
+                self.pending_ids(self.user_one)
+                raise RuntimeError("rollback")
+        #Asserts
+        self.assertEqual(self.repository.stats()['users'], 0)
+        self.assertEqual(self.repository.get_pending_tasks_by_user_id_global(self.user_one)[0].get_description(), "Tarea")
+
+    def test_rolled_back_transaction_clears_the_cache(self):
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.add_task_by_user_id_global("Tarea", self.user_one)
+                self.pending_ids(self.user_one)
+                raise RuntimeError("rollback")
+        #Asserts
+        self.assertEqual(self.pending_ids(self.user_one), [])
+
+    def test_materialized_occurrences_are_seen(self):
+        manager = TaskManager(self.repository, RecurrenceEngine(self.repository, self.mock_clock))
+        task_id = manager.add_task_by_user_id_global("Regar", self.user_one, self.mock_clock.now(), recurrency=True, recurrency_days=1)
+        self.assertEqual(self.pending_ids(self.user_one), [task_id])
+        manager.complete_task_global(task_id)
+        #Asserts
+        pending = self.repository.get_pending_tasks_by_user_id_global(self.user_one)
+        self.assertEqual(len(pending), 1)
+        self.assertNotEqual(pending[0].get_id(), task_id)
+
+
+class TestTaskManagerCaching(test_task_manager.TestTaskManager):
+    "Same suite through the caching decorator"
+    def create_repository(self):
+        return CachingRepository(super().create_repository())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 import os
 from src.task_manager import *
 from src.cli_facade import *
+from src.user_id_cache import UserIdCache
 from src.task_repository import TaskRepository
 from src.clock_implementations import MockClock
 from datetime import datetime, timedelta
@@ -149,6 +150,100 @@ class TestCliFacade(unittest.TestCase):
         #No debería haberse modificado
         self.assertEqual(self.manager.get_task_by_id_global(task_id).get_due_date(), due_date_original)
 
+    def test_user_can_import_and_complete_tasks_in_bulk(self):
+        #Importamos
+        self.facade.create_tasks_bulk(self.username_one, [("Task %d" % i,) for i in range(10)])
+        pending_tasks = self.facade.list_pending_tasks(self.username_one)
+        self.assertEqual(len(pending_tasks), 10)
+        #Completamos la mitad y borramos otra
+        self.facade.complete_tasks_bulk(self.username_one, [task.get_id() for task in pending_tasks[:5]])
+        self.facade.delete_tasks_bulk(self.username_one, [pending_tasks[-1].get_id()])
+        #Asserts
+        self.assertEqual(len(self.facade.list_pending_tasks(self.username_one)), 4)
+
+    def test_user_can_not_delete_other_user_tasks_in_bulk(self):
+        task_id = self.facade.create_task(self.username_one, self.task_description_1)
+        with self.assertRaises(AuthenticationError):
+            self.facade.delete_tasks_bulk(self.username_two, [task_id])
+        self.assertTrue(self.manager.contains_task_by_user_id(task_id, self.user_id_one))
+
+    def test_user_can_page_through_his_pending_tasks(self):
+        self.facade.create_tasks_bulk(self.username_one, [("Task %d" % i,) for i in range(5)])
+        self.facade.create_task(self.username_two, self.task_description_1)
+        #Recorremos de a 2
+        pages = []
+        page = self.facade.list_pending_tasks_page(self.username_one, limit=2)
+        while page:
+            pages.append([task.get_description() for task in page])
+            page = self.facade.list_pending_tasks_page(self.username_one, after_id=page[-1].get_id(), limit=2)
+        #Asserts
+        self.assertEqual(pages, [["Task 0", "Task 1"], ["Task 2", "Task 3"], ["Task 4"]])
+
+    ##User id cache tests
+    def test_steady_state_calls_do_not_look_up_the_user(self):
+        self.facade.create_task(self.username_one, self.task_description_1)
+        statements = []
+        self.repository.conn.set_trace_callback(statements.append)
+        self.facade.list_pending_tasks(self.username_one)
+        self.repository.conn.set_trace_callback(None)
+        #Asserts (solo la consulta de pendientes)
+        self.assertFalse([sql for sql in statements if 'users' in sql])
+        self.assertGreaterEqual(self.facade.user_id_cache.hits, 1)
+
+    def test_renamed_user_is_invalidated_from_cache(self):
+        self.facade.create_task(self.username_one, self.task_description_1)
+        #Renombramos por el manager
+        self.manager.update_user_name_of(self.user_id_one, "renamed")
+        #Asserts
+        with self.assertRaises(UsernameNotFoundError):
+            self.facade.list_pending_tasks(self.username_one)
+        self.assertEqual(len(self.facade.list_pending_tasks("renamed")), 1)
+
+    def test_user_can_search_his_tasks_page_by_page(self):
+        for i in range(5):
+            self.facade.create_task(self.username_one, f"Buy bread {i}")
+        self.facade.create_task(self.username_two, "Buy bread for the other user")
+        first_page = self.facade.search_tasks_for_user(self.username_one, "bread", limit=3)
+        second_page = self.facade.search_tasks_for_user(self.username_one, "bread", limit=3, offset=len(first_page))
+        #Asserts
+        self.assertEqual(len(first_page), 3)
+        self.assertEqual(len(second_page), 2)
+        self.assertEqual(len({task.get_id() for task in first_page + second_page}), 5)
+        self.assertEqual(self.facade.search_tasks_for_user(self.username_one, "milk"), [])
+
+    def test_user_sees_only_his_task_summary(self):
+        task_id = self.facade.create_task(self.username_one, self.task_description_1, self.mock_clock.now() - timedelta(days=1))
+        self.facade.create_task(self.username_one, "Pay the bills", priority=True)
+        self.facade.create_task(self.username_two, "Other user's task")
+        self.facade.complete_task(self.username_one, task_id)
+        #Asserts
+        self.assertEqual(self.facade.get_task_summary(self.username_one), TaskSummary(self.user_id_one, pending=1, priority=1, completed=1))
+        self.assertEqual(self.facade.get_task_summary(self.username_two).total, 1)
+        with self.assertRaises(UsernameNotFoundError):
+            self.facade.get_task_summary("nobody")
+
+    def test_cached_user_id_expires_after_ttl(self):
+        cache = UserIdCache(ttl_seconds=60, clock=self.mock_clock)
+        cache.put(self.username_one, self.user_id_one)
+        self.assertEqual(cache.get(self.username_one), self.user_id_one)
+        #Avanzamos el reloj
+        self.mock_clock.advance_time(minutes=2)
+        #Asserts
+        self.assertIsNone(cache.get(self.username_one))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_cache_evicts_least_recently_used_username(self):
+        cache = UserIdCache(max_size=2, clock=self.mock_clock)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        #Asserts
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
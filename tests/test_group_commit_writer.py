@@ -0,0 +1,86 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+import time
+from src.task_manager import TaskManager, AuthenticationError
+from src.pooled_task_repository import PooledTaskRepository
+from src.group_commit_writer import GroupCommitWriter, GroupCommitTaskManager
+from src.overdue_scheduler import OverdueScheduler
+from src.clock_implementations import MockClock
+from datetime import datetime
+class TestGroupCommitWriter(unittest.TestCase):
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.db_path = os.path.join(tempfile.mkdtemp(), 'group_commit.db')
+        self.repository = PooledTaskRepository(self.db_path, self.mock_clock)
+        self.user_id = TaskManager(self.repository).add_user("jelias1203")
+
+    def tearDown(self):
+        self.writer.close()
+        self.repository.close()
+
+    def create_manager(self, max_delay_ms, max_batch):
+        self.writer = GroupCommitWriter(self.repository, max_delay_ms, max_batch)
+        return GroupCommitTaskManager(TaskManager(self.repository), self.writer)
+
+    def test_writes_inside_the_window_share_one_commit(self):
+        manager = self.create_manager(max_delay_ms=10000, max_batch=1000)
+        futures = [manager.add_task_for_user(f"Task {i}", self.user_id) for i in range(5)]
+        #Write-behind: todavía no se ven
+        self.assertEqual(manager.tasks_count_by_user_id(self.user_id), 0)
+        manager.flush(timeout=5)
+        #Asserts
+        self.assertEqual([future.result(0) for future in futures], [1, 2, 3, 4, 5])
+        self.assertEqual((self.writer.writes, self.writer.commits), (5, 1))
+        self.assertEqual(manager.tasks_count_by_user_id(self.user_id), 5)
+
+    def test_group_is_committed_when_it_reaches_max_batch(self):
+        manager = self.create_manager(max_delay_ms=10000, max_batch=3)
+        futures = [manager.add_task_for_user(f"Task {i}", self.user_id) for i in range(3)]
+        #Asserts: sin flush y sin esperar los 10 s
+        self.assertEqual(futures[-1].result(timeout=5), 3)
+        self.assertEqual(self.writer.commits, 1)
+
+    def test_group_is_committed_after_max_delay(self):
+        manager = self.create_manager(max_delay_ms=30, max_batch=1000)
+        start = time.monotonic()
+        task_id = manager.add_task_for_user("Task", self.user_id).result(timeout=5)
+        #Asserts
+        self.assertGreaterEqual(time.monotonic() - start, 0.025)
+        #Resuelto = guardado: otra conexión ya lo ve
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("SELECT description FROM tasks WHERE id = ?", (task_id,)).fetchone()[0], "Task")
+
+    def test_failing_write_only_fails_its_future(self):
+        manager = self.create_manager(max_delay_ms=10000, max_batch=1000)
+        first = manager.add_task_for_user("Ok", self.user_id)
+        failing = manager.complete_task_for_user(99999, self.user_id)
+        second = manager.add_task_for_user("Ok too", self.user_id)
+        manager.flush(timeout=5)
+        #Asserts
+        self.assertIsInstance(failing.exception(0), AuthenticationError)
+        self.assertEqual((first.result(0), second.result(0)), (1, 2))
+        self.assertEqual(self.writer.commits, 1)
+
+    def test_close_commits_queued_writes(self):
+        manager = self.create_manager(max_delay_ms=10000, max_batch=1000)
+        future = manager.add_task_for_user("Task", self.user_id)
+        self.writer.close(timeout=5)
+        #Asserts
+        self.assertEqual(future.result(0), 1)
+        with self.assertRaises(RuntimeError):
+            manager.add_task_for_user("Late", self.user_id)
+
+
+    def test_overdue_scheduler_is_rejected(self):
+        self.writer = GroupCommitWriter(self.repository, 0, 10)
+        manager = TaskManager(self.repository, overdue_scheduler=OverdueScheduler(self.mock_clock))
+        #Asserts
+        with self.assertRaises(ValueError):
+            GroupCommitTaskManager(manager, self.writer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+from src.task_manager import TaskManager, AuthenticationError
+from src.task_repository import TaskRepository
+from src.pooled_task_repository import PooledTaskRepository
+from src.hybrid_task_repository import HybridTaskRepository
+from src.recurrence_engine import RecurrenceEngine
+from src.clock_implementations import MockClock
+from datetime import datetime, timedelta
+from tests import test_task_manager
+class TestHybridTaskRepository(unittest.TestCase):
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.db_path = os.path.join(tempfile.mkdtemp(), 'hybrid.db')
+        #Datos previos en la base
+        seed = TaskRepository(self.db_path, self.mock_clock)
+        self.user_one = seed.add_user("jelias1203")
+        self.user_two = seed.add_user("martin195")
+        self.pending_id = seed.add_task_by_user_id_global("Pendiente", self.user_one, self.mock_clock.now() - timedelta(days=1))
+        self.done_id = seed.add_task_by_user_id_global("Hecha", self.user_one)
+        seed.complete_task_global(self.done_id)
+        self.recurring_id = seed.add_task_by_user_id_global("Regar", self.user_two, self.mock_clock.now(), recurrency=True, recurrency_days=1)
+        seed.complete_task_global(self.recurring_id)
+        seed.close()
+
+    def open(self, write_behind=False):
+        store = PooledTaskRepository(self.db_path, self.mock_clock) if write_behind else TaskRepository(self.db_path, self.mock_clock)
+        return HybridTaskRepository(store, write_behind=write_behind)
+
+    def stored(self):
+        "Lo que quedó en la base, leído con una conexión nueva"
+        repository = TaskRepository(self.db_path, self.mock_clock)
+        tasks = {}
+        for user_id in (self.user_one, self.user_two):
+            for task_id in range(1, repository.get_last_id(repository.TABLE_NAME) + 1):
+                task = repository.get_task_by_id_global(task_id, user_id)
+                if task is not None:
+                    tasks[task_id] = (task.get_description(), task.is_completed(), task.is_priority(), task.get_due_date())
+        repository.close()
+        return tasks
+
+    def test_reads_are_answered_from_memory(self):
+        repository = self.open()
+        statements = []
+        repository.store.conn.set_trace_callback(statements.append)
+        #Asserts
+        self.assertEqual([task.get_id() for task in repository.get_pending_tasks_by_user_id_global(self.user_one)], [self.pending_id])
+        self.assertEqual([task.get_id() for task in repository.get_overdue_tasks_by_user_id_global(self.user_one)], [self.pending_id])
+        self.assertTrue(repository.contains_task_by_user_id(self.done_id, self.user_one))
+        self.assertFalse(repository.contains_task_by_user_id(self.done_id, self.user_two))
+        self.assertTrue(repository.task_is_completed_global(self.recurring_id))
+        self.assertEqual(repository.tasks_count_by_user_id(self.user_one), 2)
+        self.assertEqual(repository.get_user_id_by_username("martin195"), self.user_two)
+        self.assertTrue(repository.contains_user_by_username("jelias1203"))
+        self.assertEqual(statements, [])
+        #La fila completa de una completada sí sale de la base
+        self.assertEqual(repository.get_task_by_id_global(self.done_id).get_description(), "Hecha")
+        repository.close()
+
+    def test_writes_go_through_to_sqlite(self):
+        repository = self.open()
+        manager = TaskManager(repository, RecurrenceEngine(repository, self.mock_clock))
+        self.assertEqual(manager.sweep_recurring_tasks(), 1)
+        task_id = manager.add_task_for_user("Nueva", self.user_two)
+        manager.change_task_priority_for_user(self.user_two, task_id)
+        manager.update_task_description_for_user(self.pending_id, "Cambiada", self.user_one)
+        manager.complete_task_for_user(self.pending_id, self.user_one)
+        #La completada vuelve a pendiente
+        manager.complete_task_global(self.done_id)
+        manager.delete_task_for_user(self.done_id, self.user_one)
+        expected = {task_id: task for task_id, task in self.stored().items()}
+        repository.close()
+        #Asserts: lo que se ve en memoria es lo que quedó en la base
+        reopened = self.open()
+        self.assertEqual(expected, self.stored())
+        self.assertEqual(expected[task_id], ("Nueva", False, True, None))
+        self.assertNotIn(self.done_id, expected)
+        self.assertTrue(expected[self.pending_id][1])
+        self.assertEqual(len(reopened.get_pending_tasks_by_user_id_global(self.user_two)), 2)
+        self.assertEqual(reopened.materialize_recurring_tasks(self.mock_clock.now()), 0)
+        reopened.close()
+
+    def test_failed_transaction_leaves_memory_and_sqlite_unchanged(self):
+        for write_behind in (False, True):
+            repository = self.open(write_behind)
+            manager = TaskManager(repository)
+            before = self.stored()
+            with self.assertRaises(AuthenticationError):
+                manager.complete_tasks_bulk_for_user([self.pending_id, self.recurring_id], self.user_one)
+            repository.flush()
+            #Asserts
+            self.assertFalse(repository.task_is_completed_global(self.pending_id))
+            self.assertEqual(self.stored(), before)
+            repository.close()
+
+    def test_write_behind_is_durable_after_flush(self):
+        repository = self.open(write_behind=True)
+        manager = TaskManager(repository)
+        task_ids = [manager.add_task_for_user(f"Tarea {i}", self.user_one) for i in range(20)]
+        manager.complete_tasks_bulk_for_user(task_ids[:5], self.user_one)
+        manager.delete_task_for_user(task_ids[5], self.user_one)
+        #Se ve enseguida en memoria
+        self.assertEqual(repository.tasks_count_by_user_id(self.user_one), 21)
+        repository.flush()
+        stored = self.stored()
+        #Asserts
+        self.assertEqual(sum(1 for task_id in task_ids if task_id in stored), 19)
+        self.assertTrue(all(stored[task_id][1] for task_id in task_ids[:5]))
+        self.assertLess(repository.writer.commits, 27)
+        repository.close()
+
+    def test_write_behind_reads_its_writes_and_matches_sqlite_after_flush(self):
+        repository = self.open(write_behind=True)
+        manager = TaskManager(repository, RecurrenceEngine(repository, self.mock_clock))
+        self.assertEqual(manager.sweep_recurring_tasks(), 1)
+        task_id = manager.add_task_for_user("Nueva", self.user_two, self.mock_clock.now() + timedelta(days=1))
+        manager.add_tasks_bulk_for_user([("Bulk 1",), ("Bulk 2",)], self.user_two)
+        with manager.transaction():
+            manager.change_task_priority_for_user(self.user_two, task_id)
+            manager.update_task_overdue_date_for_user(task_id, self.mock_clock.now() - timedelta(hours=1), self.user_two)
+        manager.update_task_description_for_user(self.pending_id, "Cambiada", self.user_one)
+        manager.complete_task_for_user(self.pending_id, self.user_one)
+        manager.complete_tasks_bulk_for_user([task_id + 1], self.user_two)
+        #La completada vuelve a pendiente
+        manager.complete_task_global(self.done_id)
+        manager.delete_tasks_bulk_for_user([task_id + 2], self.user_two)
+        #Asserts: se ve enseguida en memoria, antes de que escriba la base
+        self.assertEqual([task.get_id() for task in manager.get_overdue_tasks_by_user_id_global(self.user_two)], [task_id])
+        self.assertEqual([task.get_id() for task in manager.get_pending_tasks_for_user(self.user_one)], [self.done_id])
+        repository.flush()
+        stored = self.stored()
+        in_memory = {}
+        for stored_id in stored:
+            task = repository.get_task_by_id_global(stored_id)
+            in_memory[stored_id] = (task.get_description(), task.is_completed(), task.is_priority(), task.get_due_date())
+        self.assertEqual(in_memory, stored)
+        self.assertEqual(stored[task_id], ("Nueva", False, True, self.mock_clock.now() - timedelta(hours=1)))
+        self.assertNotIn(task_id + 2, stored)
+        repository.close()
+
+    def test_failed_write_behind_is_raised_on_flush(self):
+        repository = self.open(write_behind=True)
+        #Otro escritor rompe la regla de "único escritor": el id que da la memoria ya existe en la base
+        other = TaskRepository(self.db_path, self.mock_clock)
+        other.add_task_by_user_id_global("Intrusa", self.user_one)
+        other.close()
+        repository.add_task_by_user_id_global("Nueva", self.user_one)
+        #Asserts
+        with self.assertRaises(sqlite3.IntegrityError):
+            repository.flush()
+        repository.close()
+
+
+class TestTaskManagerHybrid(test_task_manager.TestTaskManager):
+    "Same suite over the hybrid repository, writing through synchronously"
+    def create_repository(self):
+        return HybridTaskRepository(super().create_repository())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import os
+import random
+import tempfile
+from src.task_manager import TaskManager, AuthenticationError
+from src.task_repository import TaskRepository
+from src.in_memory_task_repository import InMemoryTaskRepository
+from src.recurrence_engine import RecurrenceEngine
+from src.clock_implementations import MockClock
+from datetime import datetime, timedelta
+from tests import test_task_manager
+class TestInMemoryTaskRepository(unittest.TestCase):
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.repository = InMemoryTaskRepository(self.mock_clock)
+        self.manager = TaskManager(self.repository)
+        self.user_one = self.manager.add_user("jelias1203")
+        self.user_two = self.manager.add_user("martin195")
+        self.db_path = os.path.join(tempfile.mkdtemp(), 'snapshot.db')
+
+    def ids(self, tasks):
+        return [task.get_id() for task in tasks]
+
+    def test_rolled_back_transaction_restores_indexes(self):
+        task_one = self.manager.add_task_for_user("Uno", self.user_one, self.mock_clock.now() - timedelta(days=1))
+        task_two = self.manager.add_task_for_user("Dos", self.user_two)
+        with self.assertRaises(AuthenticationError):
+            self.manager.complete_tasks_bulk_for_user([task_one, task_two], self.user_one)
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.add_task_by_user_id_global("Tres", self.user_one)
+                self.repository.update_task_due_date_global(task_one, None)
+                self.repository.update_task_description_global(task_one, "Cambiada")
+                self.repository.delete_task_global(task_two)
+                self.repository.update_user_name_of(self.user_one, "otro")
+                raise RuntimeError("rollback")
+        #Asserts
+        self.assertEqual(self.ids(self.repository.get_pending_tasks_by_user_id_global(self.user_one)), [task_one])
+        self.assertEqual(self.ids(self.repository.get_overdue_tasks_by_user_id_global(self.user_one)), [task_one])
+        self.assertEqual(self.repository.get_task_by_id_global(task_one).get_description(), "Uno")
+        self.assertTrue(self.repository.contains_task_by_user_id(task_two, self.user_two))
+        self.assertEqual(self.repository.get_user_id_by_username("jelias1203"), self.user_one)
+        #El id de la tarea que volvió atrás no se usa: la próxima sigue desde ahí, como en SQLite
+        self.assertEqual(self.manager.add_task_for_user("Tres", self.user_one), task_two + 1)
+
+    def test_reads_return_copies(self):
+        task_id = self.manager.add_task_for_user("Uno", self.user_one)
+        self.repository.get_task_by_id_global(task_id).description = "Pisada"
+        #Asserts
+        self.assertEqual(self.repository.get_task_by_id_global(task_id).get_description(), "Uno")
+
+    def test_pages_match_sql_repository(self):
+        sql_repository = TaskRepository('test_tasks.db', self.mock_clock, True)
+        sql_user = sql_repository.add_user("jelias1203")
+        for repository, user_id in ((self.repository, self.user_one), (sql_repository, sql_user)):
+            for i in range(10):
+                repository.add_task_by_user_id_global(f"Tarea {i}", user_id)
+            repository.complete_tasks_bulk([3, 4, 8], user_id)
+        #Asserts
+        for after_id, limit, order in ((None, 3, 'asc'), (4, 3, 'asc'), (None, 3, 'desc'), (6, 10, 'desc'), (10, 5, 'asc')):
+            self.assertEqual(self.ids(self.repository.get_pending_tasks_page(self.user_one, after_id, limit, order)),
+                             self.ids(sql_repository.get_pending_tasks_page(sql_user, after_id, limit, order)))
+        sql_repository.close()
+
+    def test_random_operations_match_sql_repository(self):
+        rng = random.Random(7)
+        sql_repository = TaskRepository('test_tasks.db', self.mock_clock, True)
+        repositories = (self.repository, sql_repository)
+        for repository in repositories[1:]:
+            repository.add_user("jelias1203")
+            repository.add_user("martin195")
+        now = self.mock_clock.now()
+        for step in range(400):
+            operation = rng.choice(('add', 'add', 'complete', 'due', 'priority', 'delete', 'recurrency'))
+            task_id = rng.randint(1, max(1, step // 2))
+            user_id = rng.choice((None, self.user_one, self.user_two))
+            due_date = rng.choice((None, now + timedelta(hours=rng.randint(-48, 48))))
+            for repository in repositories:
+                if operation == 'add':
+                    repository.add_task_by_user_id_global(f"Tarea {step}", user_id or self.user_one, due_date, recurrency=step % 3 == 0, recurrency_days=2)
+                elif operation == 'complete':
+                    repository.complete_task_global(task_id, user_id)
+                elif operation == 'due':
+                    repository.update_task_due_date_global(task_id, now + timedelta(hours=step % 50 - 25), user_id)
+                elif operation == 'priority':
+                    repository.change_task_priority_global(task_id, user_id)
+                elif operation == 'recurrency':
+                    repository.materialize_recurring_tasks(now)
+                else:
+                    repository.delete_task_global(task_id, user_id)
+            if step % 10 == 0:
+                self.mock_clock.advance_time(hours=1)
+        #Asserts
+        for user_id in (self.user_one, self.user_two):
+            for read in ('get_pending_tasks_by_user_id_global', 'get_overdue_tasks_by_user_id_global'):
+                expected = [(task.get_id(), task.is_priority(), task.get_due_date(), task.is_recurrency()) for task in getattr(sql_repository, read)(user_id)]
+                actual = [(task.get_id(), task.is_priority(), task.get_due_date(), task.is_recurrency()) for task in getattr(self.repository, read)(user_id)]
+                self.assertEqual(actual, expected, read)
+            self.assertEqual(self.repository.tasks_count_by_user_id(user_id), sql_repository.tasks_count_by_user_id(user_id))
+        sql_repository.close()
+
+    def test_snapshot_round_trip_keeps_ids_and_sequences(self):
+        manager = TaskManager(self.repository, RecurrenceEngine(self.repository, self.mock_clock))
+        due_date = datetime(2025, 12, 15, 9, 00, 00)
+        task_id = manager.add_task_for_user("Regar", self.user_one, due_date, recurrency=True, recurrency_days=7)
+        manager.complete_task_for_user(task_id, self.user_one)
+        last_id = manager.add_task_for_user("Borrada", self.user_two)
+        manager.delete_task_for_user(last_id, self.user_two)
+        self.repository.save_snapshot(self.db_path)
+        #La base la puede abrir TaskRepository
+        sql_repository = TaskRepository(self.db_path, self.mock_clock)
+        self.assertEqual([task.get_due_date() for task in sql_repository.get_pending_tasks_by_user_id_global(self.user_one)], [due_date + timedelta(days=7)])
+        self.assertEqual(sql_repository.add_task_by_user_id_global("Nueva", self.user_two), last_id + 1)
+        sql_repository.close()
+        loaded = InMemoryTaskRepository.load_snapshot(self.db_path, self.mock_clock)
+        #Asserts
+        self.assertEqual(loaded.users_count(), 2)
+        self.assertEqual(loaded.get_user_id_by_username("martin195"), self.user_two)
+        self.assertEqual(self.ids(loaded.get_pending_tasks_by_user_id_global(self.user_one)), [task_id + 1])
+        self.assertTrue(loaded.task_is_completed_global(task_id))
+        #La ocurrencia ya generada no se vuelve a generar
+        self.assertEqual(loaded.materialize_recurring_tasks(self.mock_clock.now()), 0)
+        self.assertEqual(loaded.add_task_by_user_id_global("Otra", self.user_one), last_id + 2)
+
+    def test_snapshot_loads_epoch_databases(self):
+        sql_repository = TaskRepository(self.db_path, self.mock_clock, epoch_due_dates=True)
+        user_id = sql_repository.add_user("jelias1203")
+        due_date = datetime(2025, 12, 1, 8, 30, 00)
+        sql_repository.add_task_by_user_id_global("Vencida", user_id, due_date)
+        sql_repository.close()
+        loaded = InMemoryTaskRepository.load_snapshot(self.db_path, self.mock_clock)
+        #Asserts
+        self.assertEqual([task.get_due_date() for task in loaded.get_overdue_tasks_by_user_id_global(user_id)], [due_date])
+
+
+class TestTaskManagerInMemory(test_task_manager.TestTaskManager):
+    "Same suite over the in-memory engine"
+    def create_repository(self):
+        return InMemoryTaskRepository(self.mock_clock)
+
+    def test_complete_task_for_user_checks_ownership_in_a_single_statement(self):
+        self.skipTest("No SQL in the in-memory repository")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from src.task_manager import Task
+from src.overdue_scheduler import OverdueScheduler
+from src.clock_implementations import MockClock
+from datetime import datetime, timedelta
+class TestOverdueScheduler(unittest.TestCase):
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.scheduler = OverdueScheduler(self.mock_clock)
+        self.events = []
+        self.scheduler.add_listener(lambda task: self.events.append(task.get_id()))
+
+    def task(self, task_id, user_id, due_date, completed=False):
+        return Task(task_id, user_id, f"Task {task_id}", completed, due_date)
+
+    def overdue_ids(self, user_id):
+        return [task.get_id() for task in self.scheduler.get_overdue_tasks(user_id)]
+
+    def test_tasks_become_overdue_as_clock_advances(self):
+        now = self.mock_clock.now()
+        self.scheduler.load([
+            self.task(1, 1, now - timedelta(hours=1)),
+            self.task(2, 1, now + timedelta(days=1)),
+            self.task(3, 2, now + timedelta(days=2)),
+            self.task(4, 1, None),
+        ])
+        #Asserts
+        self.assertEqual(self.overdue_ids(1), [1])
+        self.assertEqual(self.overdue_ids(2), [])
+        self.mock_clock.advance_time(days=1, minutes=1)
+        self.assertEqual(self.overdue_ids(1), [1, 2])
+        self.assertEqual(self.overdue_ids(2), [])
+        self.mock_clock.advance_time(days=1)
+        self.assertEqual(self.overdue_ids(2), [3])
+        #Cada tarea avisa una sola vez
+        self.scheduler.advance()
+        self.assertEqual(self.events, [1, 2, 3])
+
+    def test_due_exactly_now_is_not_overdue(self):
+        self.scheduler.refresh(self.task(1, 1, self.mock_clock.now()))
+        #Asserts
+        self.assertEqual(self.overdue_ids(1), [])
+        self.mock_clock.advance_time(minutes=1)
+        self.assertEqual(self.overdue_ids(1), [1])
+
+    def test_refresh_moves_due_date_and_discards_completed(self):
+        now = self.mock_clock.now()
+        self.scheduler.load([self.task(1, 1, now - timedelta(days=1)), self.task(2, 1, now - timedelta(days=1))])
+        self.assertEqual(self.overdue_ids(1), [1, 2])
+        #Se pospone una y se completa la otra
+        self.scheduler.refresh(self.task(1, 1, now + timedelta(days=3)))
+        self.scheduler.refresh(self.task(2, 1, now - timedelta(days=1), completed=True))
+        #Asserts
+        self.assertEqual(self.overdue_ids(1), [])
+        self.assertNotIn(2, self.scheduler)
+        self.assertFalse(self.scheduler.is_overdue(1))
+        self.mock_clock.advance_time(days=4)
+        self.assertTrue(self.scheduler.is_overdue(1))
+        self.assertEqual(self.events, [1, 2, 1])
+
+    def test_discard_removes_task(self):
+        self.scheduler.refresh(self.task(1, 1, self.mock_clock.now() + timedelta(hours=1)))
+        self.scheduler.discard(1)
+        self.mock_clock.advance_time(hours=2)
+        #Asserts
+        self.assertEqual(self.overdue_ids(1), [])
+        self.assertEqual(self.events, [])
+        self.assertEqual(len(self.scheduler), 0)
+
+
+    def test_overdue_tasks_are_kept_in_id_order(self):
+        now = self.mock_clock.now()
+        #Vencen en orden inverso a su id
+        self.scheduler.load([self.task(task_id, 1, now + timedelta(hours=10 - task_id)) for task_id in range(1, 6)])
+        self.mock_clock.advance_time(hours=7, minutes=1)
+        self.assertEqual(self.overdue_ids(1), [3, 4, 5])
+        self.mock_clock.advance_time(hours=3)
+        self.scheduler.discard(4)
+        #Asserts
+        self.assertEqual(self.overdue_ids(1), [1, 2, 3, 5])
+        self.assertEqual(self.events, [5, 4, 3, 2, 1])
+
+    def test_heap_is_compacted_as_due_dates_change(self):
+        now = self.mock_clock.now()
+        self.scheduler.load([self.task(task_id, 1, now + timedelta(days=1)) for task_id in range(1, 11)])
+        for hours in range(1000):
+            self.scheduler.refresh(self.task(hours % 10 + 1, 1, now + timedelta(days=2, hours=hours)))
+        #Asserts: las entradas viejas no se acumulan
+        self.assertLessEqual(len(self.scheduler._heap), OverdueScheduler.COMPACT_FACTOR * 10 + OverdueScheduler.COMPACT_MIN_SIZE)
+        self.mock_clock.advance_time(days=60)
+        self.assertEqual(self.overdue_ids(1), list(range(1, 11)))
+
+
+if __name__ == '__main__':
+    unittest.main()
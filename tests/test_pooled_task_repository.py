@@ -0,0 +1,110 @@
+import unittest
+import os
+import tempfile
+import threading
+import sqlite3
+from src.task_manager import TaskManager
+from src.pooled_task_repository import PooledTaskRepository
+from src.clock_implementations import MockClock
+from datetime import datetime, timedelta
+from tests import test_task_manager
+class TestPooledTaskRepository(unittest.TestCase):
+    THREADS = 8
+    OPERATIONS = 150
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.db_path = os.path.join(tempfile.mkdtemp(), 'pooled.db')
+        self.repository = PooledTaskRepository(self.db_path, self.mock_clock)
+        self.manager = TaskManager(self.repository)
+
+    def tearDown(self):
+        self.repository.close()
+
+    def run_threads(self, worker):
+        errors = []
+        def run(index):
+            try:
+                worker(index)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        return errors
+
+    def test_reads_and_writes_from_many_threads(self):
+        user_ids = [self.manager.add_user(f"user{index}") for index in range(self.THREADS)]
+        def worker(index):
+            user_id = user_ids[index]
+            created = []
+            for i in range(self.OPERATIONS):
+                created.append(self.manager.add_task_for_user(f"Task {i}", user_id, self.mock_clock.now() - timedelta(days=1)))
+                if i % 3 == 0:
+                    self.manager.complete_task_for_user(created[-1], user_id)
+                #Lecturas intercaladas: cada hilo tiene que ver siempre sus propias escrituras
+                pending = self.manager.get_pending_tasks_for_user(user_id)
+                assert len(pending) == len(created) - (i // 3 + 1), (len(pending), i)
+                self.manager.get_overdue_tasks_by_user_id_global(user_id)
+            with self.manager.transaction():
+                self.manager.delete_tasks_bulk_for_user(created[:10], user_id)
+        #Asserts
+        self.assertEqual(self.run_threads(worker), [])
+        for user_id in user_ids:
+            self.assertEqual(self.manager.tasks_count_by_user_id(user_id), self.OPERATIONS - 10)
+        #Las lectoras de los hilos que terminaron ya se cerraron; queda la del hilo principal
+        self.assertEqual(len(self.repository._readers), 1)
+
+    def test_transaction_is_isolated_from_other_threads(self):
+        user_id = self.manager.add_user("isolated")
+        inside = threading.Event()
+        release = threading.Event()
+        seen = []
+        def writer():
+            with self.repository.transaction():
+                self.repository.add_task_by_user_id_global("Uncommitted", user_id)
+                #El propio hilo ve lo que escribió
+                seen.append(('writer', self.repository.tasks_count_by_user_id(user_id)))
+                inside.set()
+                release.wait(5)
+        thread = threading.Thread(target=writer)
+        thread.start()
+        inside.wait(5)
+        #Otro hilo lee sin bloquearse y no ve la escritura sin commit
+        seen.append(('reader', self.repository.tasks_count_by_user_id(user_id)))
+        release.set()
+        thread.join(5)
+        #Asserts
+        self.assertEqual(seen, [('writer', 1), ('reader', 0)])
+        self.assertEqual(self.repository.tasks_count_by_user_id(user_id), 1)
+
+    def test_reader_is_closed_when_its_thread_exits(self):
+        user_id = self.manager.add_user("reader")
+        main_readers = list(self.repository._readers)
+        readers = []
+        def read():
+            self.manager.tasks_count_by_user_id(user_id)
+            readers.append(self.repository._read_connection())
+        for _ in range(3):
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join(30)
+        #Asserts (cada hilo abrió su lectora y se cerró al terminar)
+        self.assertEqual(len(readers), 3)
+        self.assertEqual(self.repository._readers, main_readers)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            readers[0].execute("SELECT 1")
+
+    def test_uses_wal(self):
+        self.assertEqual(self.repository.conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+
+
+class TestTaskManagerPooled(test_task_manager.TestTaskManager):
+    "Same suite over PooledTaskRepository"
+    def create_repository(self):
+        return PooledTaskRepository(os.path.join(tempfile.mkdtemp(), self.DB_TEST_NAME), self.mock_clock)
+
+
+if __name__ == '__main__':
+    unittest.main()
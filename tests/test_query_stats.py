@@ -0,0 +1,183 @@
+import unittest
+import os
+import json
+import logging
+import tempfile
+from src.task_manager import TaskManager
+from src.task_repository import TaskRepository
+from src.in_memory_task_repository import InMemoryTaskRepository
+from src.query_stats import QueryStats, LoggingSink, HistogramSink, JsonDumpSink
+from src.recurrence_engine import RecurrenceEngine
+from src.clock_implementations import MockClock
+from datetime import datetime, timedelta
+class TestQueryStats(unittest.TestCase):
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.histogram = HistogramSink()
+        self.query_stats = QueryStats(sinks=[self.histogram])
+        self.repository = TaskRepository(":memory:", self.mock_clock, True, query_stats=self.query_stats)
+        self.manager = TaskManager(self.repository)
+        self.user_id = self.manager.add_user("jelias1203")
+
+    def statement(self, snapshot, fragment):
+        "La única sentencia del snapshot que contiene fragment"
+        matches = [stats for stats in snapshot['statements'] if fragment in stats['sql']]
+        self.assertEqual(len(matches), 1, [stats['sql'] for stats in snapshot['statements']])
+        return matches[0]
+
+    def test_counts_time_and_rows_per_statement(self):
+        for i in range(3):
+            self.manager.add_task_for_user(f"Tarea {i}", self.user_id, self.mock_clock.now() - timedelta(days=1))
+        self.query_stats.reset()
+        self.manager.get_pending_tasks_for_user(self.user_id)
+        self.manager.get_pending_tasks_for_user(self.user_id)
+        self.manager.complete_task_for_user(1, self.user_id)
+        snapshot = self.manager.get_query_stats()
+        #Asserts
+        pending = self.statement(snapshot, "completed = 0 AND user_id = ? ORDER BY")
+        self.assertEqual(pending['count'], 2)
+        self.assertEqual(pending['rows'], 6)
+        self.assertGreater(pending['total_ms'], 0)
+        self.assertGreaterEqual(pending['max_ms'], pending['mean_ms'])
+        #Las filas de una escritura son las afectadas
+        self.assertEqual(self.statement(snapshot, "SET completed = NOT completed")['rows'], 1)
+        #El SQL queda normalizado (sin saltos de línea ni espacios repetidos)
+        self.assertTrue(all('\n' not in stats['sql'] and '  ' not in stats['sql'] for stats in snapshot['statements']))
+        self.assertEqual(snapshot['commits']['count'], 1)
+        self.assertEqual(snapshot['slow_queries'], [])
+
+    def test_commits_are_measured_once_per_transaction(self):
+        self.query_stats.reset()
+        self.manager.add_tasks_bulk_for_user([(f"Tarea {i}",) for i in range(5)], self.user_id)
+        with self.manager.transaction():
+            self.manager.add_task_for_user("Una", self.user_id)
+            self.manager.add_task_for_user("Otra", self.user_id)
+        #Asserts
+        commits = self.manager.get_query_stats()['commits']
+        self.assertEqual(commits['count'], 2)
+        self.assertGreater(commits['total_ms'], 0)
+        #El sink no se resetea: también tiene el commit del add_user del setUp
+        self.assertEqual(sum(count for _, count in self.histogram.histogram('COMMIT')), 3)
+
+    def test_slow_queries_capture_their_query_plan(self):
+        self.query_stats.slow_query_ms = 0
+        self.query_stats.add_sink(LoggingSink(kinds=('slow_query',)))
+        logger = logging.getLogger('taskmanager.queries')
+        with self.assertLogs(logger, logging.WARNING) as logs:
+            self.manager.get_overdue_tasks_by_user_id_global(self.user_id)
+        snapshot = self.manager.get_query_stats()
+        overdue = self.statement(snapshot, "due_date < ?")
+        #Asserts
+        self.assertTrue(any('USING' in detail and 'INDEX' in detail for detail in overdue['plan']), overdue['plan'])
+        self.assertEqual(snapshot['slow_queries'][-1]['sql'], overdue['sql'])
+        self.assertIn("slow query", logs.output[-1])
+        self.assertIn("INDEX", logs.output[-1])
+
+    def test_fast_queries_have_no_plan(self):
+        self.query_stats.slow_query_ms = 10000
+        self.manager.get_pending_tasks_for_user(self.user_id)
+        #Asserts
+        snapshot = self.manager.get_query_stats()
+        self.assertIsNone(self.statement(snapshot, "completed = 0 AND user_id = ? ORDER BY")['plan'])
+        self.assertEqual(snapshot['slow_queries'], [])
+
+    def test_histogram_and_json_sinks(self):
+        path = os.path.join(tempfile.mkdtemp(), 'queries.jsonl')
+        dump = JsonDumpSink(path, kinds=('commit',))
+        self.query_stats.add_sink(dump)
+        self.manager.add_task_for_user("Tarea", self.user_id)
+        self.manager.add_task_for_user("Otra", self.user_id)
+        dump.close()
+        with open(path) as file:
+            events = [json.loads(line) for line in file]
+        snapshot_path = os.path.join(tempfile.mkdtemp(), 'snapshot.json')
+        self.query_stats.dump_json(snapshot_path)
+        with open(snapshot_path) as file:
+            snapshot = json.load(file)
+        #Asserts
+        self.assertEqual([event['kind'] for event in events], ['commit', 'commit'])
+        insert = self.statement(snapshot, "INSERT INTO tasks")
+        self.assertEqual(sum(count for _, count in self.histogram.histogram(insert['sql'])), insert['count'])
+        self.assertEqual(self.histogram.histogram(insert['sql'])[-1][0], None)
+
+    def test_reads_stay_lazy_and_count_rows_as_they_are_fetched(self):
+        for i in range(5):
+            self.manager.add_task_for_user(f"Tarea {i}", self.user_id)
+        self.query_stats.reset()
+        cursor = self.repository._execute(self.repository.statements['pending_by_user'], (self.user_id,))
+        first, second = cursor.fetchone(), cursor.fetchone()
+        #Asserts: nada se trajo por adelantado y la sentencia se registra recién al soltar el cursor
+        self.assertEqual([first['id'], second['id']], [1, 2])
+        self.assertEqual(self.manager.get_query_stats()['statements'], [])
+        del cursor
+        self.assertEqual(self.statement(self.manager.get_query_stats(), "completed = 0 AND user_id = ? ORDER BY")['rows'], 2)
+
+    def test_streaming_reads_are_measured_page_by_page(self):
+        for i in range(5):
+            self.manager.add_task_for_user(f"Tarea {i}", self.user_id)
+        self.query_stats.reset()
+        tasks = list(self.repository.iter_pending_tasks(self.user_id, batch_size=2))
+        #Asserts: una consulta por página y todas las filas contadas
+        page = self.statement(self.manager.get_query_stats(), "id > ? ORDER BY id LIMIT ?")
+        self.assertEqual(len(tasks), 5)
+        self.assertEqual((page['count'], page['rows']), (3, 5))
+
+    def test_uninstrumented_repositories_report_none(self):
+        self.assertIsNone(TaskManager(TaskRepository(":memory:", self.mock_clock, True)).get_query_stats())
+        self.assertIsNone(TaskManager(InMemoryTaskRepository(self.mock_clock)).get_query_stats())
+
+
+class TestTaskManagerInstrumented(unittest.TestCase):
+    "query_stats solo envuelve la ejecución: los mismos pasos dan lo mismo con y sin medir, con todo tomado como lento (planes capturados)"
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.query_stats = QueryStats(slow_query_ms=0, sinks=[HistogramSink()])
+        self.repositories = [TaskRepository(":memory:", self.mock_clock, True), TaskRepository(":memory:", self.mock_clock, True, query_stats=self.query_stats)]
+
+    def tearDown(self):
+        for repository in self.repositories:
+            repository.close()
+
+    def run_steps(self, repository):
+        manager = TaskManager(repository, RecurrenceEngine(repository, self.mock_clock))
+        user_id = manager.add_user("jelias1203")
+        now = self.mock_clock.now()
+        results = [manager.get_user_id_by_username("jelias1203")]
+        task_id = manager.add_task_for_user("Pagar la factura", user_id, now - timedelta(days=1), recurrency=True, recurrency_days=7)
+        manager.add_tasks_bulk_for_user([(f"Tarea {i}", now + timedelta(days=i), i % 2 == 0) for i in range(6)], user_id)
+        with manager.transaction():
+            manager.change_task_priority_for_user(user_id, task_id + 1)
+            manager.update_task_description_for_user(task_id + 2, "Pagar el alquiler", user_id)
+        #Completar la recurrente materializa la siguiente (parámetros con nombre)
+        manager.complete_task_for_user(task_id, user_id)
+        manager.complete_tasks_bulk_for_user([task_id + 3, task_id + 4], user_id)
+        manager.delete_tasks_bulk_for_user([task_id + 5], user_id)
+        batch = manager.get_pending_tasks_for_user(user_id, as_batch=True)
+        results += [
+            [(task.get_id(), task.get_description(), task.get_due_date(), task.is_priority()) for task in manager.get_pending_tasks_for_user(user_id)],
+            [batch.get_id(i) for i in range(len(batch))],
+            [task.get_id() for task in manager.get_pending_tasks_page_for_user(user_id, after_id=task_id + 1, limit=2, order='desc')],
+            [task.get_id() for task in manager.iter_pending_tasks(user_id, batch_size=2)],
+            [task.get_id() for task in manager.get_overdue_tasks_by_user_id_global(user_id)],
+            [task.get_id() for task in manager.search_tasks_for_user(user_id, "pagar")],
+            manager.get_user_task_summary(user_id),
+            manager.get_all_user_summaries(),
+            manager.tasks_count_by_user_id(user_id),
+            manager.contains_task_by_user_id(task_id + 5, user_id),
+            manager.task_is_completed_global(task_id),
+        ]
+        return results
+
+    def test_instrumented_repository_gives_the_same_results(self):
+        plain, instrumented = (self.run_steps(repository) for repository in self.repositories)
+        #Asserts
+        self.assertEqual(instrumented, plain)
+        snapshot = TaskManager(self.repositories[1]).get_query_stats()
+        self.assertTrue(snapshot['statements'])
+        #Un INSERT ... VALUES no tiene plan; todo lo que lee sí
+        self.assertEqual([stats['sql'] for stats in snapshot['statements'] if 'SELECT' in stats['sql'] and not stats['plan']], [])
+        self.assertEqual(len(snapshot['slow_queries']), sum(stats['count'] for stats in snapshot['statements']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from src.task_manager import Task
+from src.task_list_view_model import TaskListViewModel
+class TestTaskListViewModel(unittest.TestCase):
+    def setUp(self):
+        self.view_model = TaskListViewModel(lambda task: f"[{task.get_id()}] {task.get_description()}")
+        #Simulamos la Listbox con una lista
+        self.listbox = []
+
+    def apply(self, operations):
+        for operation in operations:
+            if operation[0] == 'delete':
+                del self.listbox[operation[1]]
+            elif operation[0] == 'insert':
+                self.listbox.insert(operation[1], operation[2])
+            else:
+                self.listbox[operation[1]] = operation[2]
+        return operations
+
+    def tasks(self, *pairs):
+        return [Task(task_id, 1, description) for task_id, description in pairs]
+
+    def test_first_load_inserts_every_row(self):
+        operations = self.apply(self.view_model.replace(self.tasks((1, "a"), (2, "b"))))
+        #Asserts
+        self.assertEqual(operations, [('insert', 0, "[1] a"), ('insert', 1, "[2] b")])
+        self.assertEqual(self.view_model.task_id_at(1), 2)
+
+    def test_reload_only_touches_changed_rows(self):
+        self.apply(self.view_model.replace(self.tasks((1, "a"), (2, "b"), (3, "c"), (4, "d"))))
+        #Se completó la 2, se editó la 3 y apareció la 5
+        operations = self.apply(self.view_model.replace(self.tasks((1, "a"), (3, "c!"), (4, "d"), (5, "e"))))
+        #Asserts
+        self.assertEqual(operations, [('delete', 1), ('update', 1, "[3] c!"), ('insert', 3, "[5] e")])
+        self.assertEqual(self.listbox, ["[1] a", "[3] c!", "[4] d", "[5] e"])
+        self.assertEqual(self.view_model.index_of(4), 2)
+        self.assertIsNone(self.view_model.index_of(2))
+
+    def test_append_adds_next_page_at_the_end(self):
+        self.apply(self.view_model.replace(self.tasks((1, "a"), (2, "b"))))
+        operations = self.apply(self.view_model.append(self.tasks((3, "c"))))
+        #Asserts
+        self.assertEqual(operations, [('insert', 2, "[3] c")])
+        self.assertEqual(len(self.view_model), 3)
+
+    def test_append_only_formats_the_new_page(self):
+        formatted = []
+        self.view_model.format_row = lambda task: formatted.append(task.get_id()) or f"[{task.get_id()}] {task.get_description()}"
+        self.apply(self.view_model.replace(self.tasks(*((task_id, "x") for task_id in range(1, 101)))))
+        formatted.clear()
+        #La 100 vuelve a venir (cambió mientras tanto) junto con la página siguiente
+        operations = self.apply(self.view_model.append(self.tasks((100, "y"), (101, "z"), (102, "z"))))
+        #Asserts
+        self.assertEqual(formatted, [100, 101, 102])
+        self.assertEqual(operations, [('update', 99, "[100] y"), ('insert', 100, "[101] z"), ('insert', 101, "[102] z")])
+        self.assertEqual(self.listbox[99:], ["[100] y", "[101] z", "[102] z"])
+        self.assertEqual(self.view_model.index_of(102), 101)
+        self.assertEqual(self.view_model.get_task(100).get_description(), "y")
+
+    def test_reordered_rows_are_rebuilt(self):
+        self.apply(self.view_model.replace(self.tasks((1, "a"), (2, "b"), (3, "c"))))
+        self.apply(self.view_model.replace(self.tasks((3, "c"), (1, "a"))))
+        #Asserts
+        self.assertEqual(self.listbox, ["[3] c", "[1] a"])
+        self.assertEqual([self.view_model.task_id_at(index) for index in range(2)], [3, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,13 +3,15 @@ import os
 from src.task_manager import *
 from src.task_repository import TaskRepository
 from src.clock_implementations import MockClock
+from src.recurrence_engine import RecurrenceEngine
+from src.overdue_scheduler import OverdueScheduler
 from datetime import datetime, timedelta
 class TestTaskManager(unittest.TestCase):
     DB_TEST_NAME = 'test_tasks.db'
     def setUp(self):
         #Creamos el repository
         self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
-        self.repository = TaskRepository(self.DB_TEST_NAME, self.mock_clock, True)
+        self.repository = self.create_repository()
         #Creamos el task manager
         self.manager = TaskManager(self.repository)
         #Tareas genéricas
@@ -26,6 +28,10 @@ class TestTaskManager(unittest.TestCase):
     
     def tearDown(self):
         self.repository.close()
+
+    def create_repository(self):
+        "Hook: las subclases corren toda la suite contra otro repositorio o configuración"
+        return TaskRepository(self.DB_TEST_NAME, self.mock_clock, True)
         
     def test_can_list_only_pending_tasks(self):
         #Agregamos 3 tareas
@@ -348,7 +354,368 @@ class TestTaskManager(unittest.TestCase):
         task = self.manager.get_task_by_id_for_user(task_id, self.user_id_one)
         self.assertTrue(task.is_priority())
     
-    
+
+    def test_can_add_tasks_bulk_for_user(self):
+        tasks = [(self.generic_task_description_one,), (self.generic_task_description_two, None, True)]
+        #Asserts
+        self.assertEqual(self.manager.add_tasks_bulk_for_user(tasks, self.user_id_one), 2)
+        self.assertEqual(self.manager.tasks_count_by_user_id(self.user_id_one), 2)
+
+    def test_can_complete_tasks_bulk_of_my_tasks(self):
+        task_id_one = self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_one)
+        task_id_two = self.manager.add_task_for_user(self.generic_task_description_two, self.user_id_one)
+        #Complete
+        self.manager.complete_tasks_bulk_for_user([task_id_one, task_id_two], self.user_id_one)
+        self.assertFalse(self.manager.get_pending_tasks_for_user(self.user_id_one))
+
+    def test_cannot_complete_tasks_bulk_with_task_of_other_user(self):
+        task_id_one = self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_one)
+        task_id_two = self.manager.add_task_for_user(self.generic_task_description_two, self.user_id_two)
+        #Assert
+        with self.assertRaises(AuthenticationError):
+            self.manager.complete_tasks_bulk_for_user([task_id_one, task_id_two], self.user_id_one)
+        #Rollback: ninguna quedó completada
+        self.assertFalse(self.manager.task_is_completed_global(task_id_one))
+        self.assertFalse(self.manager.task_is_completed_global(task_id_two))
+
+    def test_cannot_delete_tasks_bulk_with_task_of_other_user(self):
+        task_id_one = self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_one)
+        task_id_two = self.manager.add_task_for_user(self.generic_task_description_two, self.user_id_two)
+        #Assert
+        with self.assertRaises(AuthenticationError):
+            self.manager.delete_tasks_bulk_for_user([task_id_one, task_id_two], self.user_id_one)
+        self.assertEqual(self.manager.tasks_count_by_user_id(self.user_id_one), 1)
+
+    def test_complete_task_for_user_checks_ownership_in_a_single_statement(self):
+        task_id = self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_one)
+        statements = []
+        self.repository.conn.set_trace_callback(statements.append)
+        self.manager.complete_task_for_user(task_id, self.user_id_one)
+        self.repository.conn.set_trace_callback(None)
+        #Los triggers (contadores) reportan sus pasos ("-- ...") y repiten la sentencia que los disparó
+        statements = list(dict.fromkeys(sql for sql in statements if not sql.startswith('--')))
+        #Solo el UPDATE (sin contar BEGIN/COMMIT)
+        queries = [sql.split()[0] for sql in statements if sql.split()[0] not in ('BEGIN', 'COMMIT')]
+        self.assertEqual(queries, ['UPDATE'])
+        self.assertTrue(self.manager.task_is_completed_global(task_id))
+
+    def test_secure_methods_on_non_existent_task_raise_authentication_error(self):
+        non_existent_id = 99999
+        #Asserts
+        with self.assertRaises(AuthenticationError):
+            self.manager.complete_task_for_user(non_existent_id, self.user_id_one)
+        with self.assertRaises(AuthenticationError):
+            self.manager.task_is_completed_for_user(non_existent_id, self.user_id_one)
+
+    """Search tests"""
+    def search_ids(self, user_id, query, limit=50, offset=0):
+        return [task.get_id() for task in self.manager.search_tasks_for_user(user_id, query, limit, offset)]
+
+    def test_search_matches_every_word_as_prefix_ignoring_accents(self):
+        task_id_one = self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_one)
+        task_id_two = self.manager.add_task_for_user(self.generic_task_description_two, self.user_id_one)
+        self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_two)
+        #Asserts
+        self.assertEqual(self.search_ids(self.user_id_one, "capitulo"), [task_id_one])
+        self.assertEqual(self.search_ids(self.user_id_one, "LEER cap"), [task_id_one])
+        self.assertEqual(sorted(self.search_ids(self.user_id_one, "5")), [task_id_one, task_id_two])
+        self.assertEqual(self.search_ids(self.user_id_one, "leer minutos"), [])
+
+    def test_search_follows_description_changes_completion_and_deletes(self):
+        task_id = self.manager.add_task_for_user(self.generic_task_description_three, self.user_id_one)
+        other_task_id = self.manager.add_task_for_user(self.generic_task_description_two, self.user_id_one)
+        self.manager.update_task_description_for_user(task_id, "Nadar 30 minutos", self.user_id_one)
+        self.manager.complete_task_for_user(other_task_id, self.user_id_one)
+        #Asserts: también encuentra las completadas
+        self.assertEqual(self.search_ids(self.user_id_one, "correr"), [])
+        self.assertEqual(sorted(self.search_ids(self.user_id_one, "minutos")), [task_id, other_task_id])
+        self.manager.delete_task_for_user(task_id, self.user_id_one)
+        self.assertEqual(self.search_ids(self.user_id_one, "minutos"), [other_task_id])
+
+    def test_search_is_paginated_and_ignores_query_syntax(self):
+        task_ids = [self.manager.add_task_for_user(f"Informe {i}", self.user_id_one) for i in range(5)]
+        pages = [self.search_ids(self.user_id_one, "informe", 2, offset) for offset in (0, 2, 4)]
+        #Asserts
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sorted(sum(pages, [])), task_ids)
+        #Los operadores de FTS5 se toman como palabras comunes
+        self.assertEqual(self.search_ids(self.user_id_one, 'informe" OR NOT *'), [])
+        self.assertEqual(self.search_ids(self.user_id_one, "  ?! "), [])
+        with self.assertRaises(UserIdNotFoundError):
+            self.manager.search_tasks_for_user(9999, "informe")
+
+    """Summary tests"""
+    def test_user_task_summary_counts_every_bucket(self):
+        now = self.mock_clock.now()
+        self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_one, now - timedelta(days=1), priority=True)
+        self.manager.add_task_for_user(self.generic_task_description_two, self.user_id_one, now + timedelta(days=1), recurrency=True, recurrency_days=7)
+        completed_id = self.manager.add_task_for_user(self.generic_task_description_three, self.user_id_one, now - timedelta(days=2), priority=True)
+        self.manager.complete_task_for_user(completed_id, self.user_id_one)
+        self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_two)
+        #Asserts: prioritarias, recurrentes y vencidas se cuentan entre las pendientes
+        self.assertEqual(self.manager.get_user_task_summary(self.user_id_one), TaskSummary(self.user_id_one, pending=2, overdue=1, priority=1, recurring=1, completed=1))
+        self.assertEqual(self.manager.get_user_task_summary(self.user_id_one).total, self.manager.tasks_count_by_user_id(self.user_id_one))
+        #Vence la segunda con el paso del tiempo
+        self.mock_clock.advance_time(days=2)
+        self.assertEqual(self.manager.get_user_task_summary(self.user_id_one).overdue, 2)
+
+    def test_user_task_summary_follows_writes(self):
+        task_id = self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_one, self.mock_clock.now() - timedelta(days=1))
+        other_task_id = self.manager.add_task_for_user(self.generic_task_description_two, self.user_id_one)
+        self.manager.change_task_priority_for_user(self.user_id_one, other_task_id)
+        self.manager.change_task_recurrency_for_user(self.user_id_one, other_task_id)
+        self.manager.complete_tasks_bulk_for_user([task_id], self.user_id_one)
+        self.assertEqual(self.manager.get_user_task_summary(self.user_id_one), TaskSummary(self.user_id_one, 1, 0, 1, 1, 1))
+        #Volver a pendiente, borrar
+        self.manager.complete_task_global(task_id)
+        self.manager.delete_task_for_user(other_task_id, self.user_id_one)
+        #Asserts
+        self.assertEqual(self.manager.get_user_task_summary(self.user_id_one), TaskSummary(self.user_id_one, 1, 1, 0, 0, 0))
+        self.manager.delete_task_for_user(task_id, self.user_id_one)
+        self.assertEqual(self.manager.get_user_task_summary(self.user_id_one), TaskSummary(self.user_id_one))
+
+    def test_user_task_summary_of_invalid_user_raises_error(self):
+        self.assertEqual(self.manager.get_user_task_summary(self.user_id_two), TaskSummary(self.user_id_two))
+        with self.assertRaises(UserIdNotFoundError):
+            self.manager.get_user_task_summary(9999)
+
+    def test_all_user_summaries_match_each_user_summary(self):
+        now = self.mock_clock.now()
+        user_id_three = self.manager.add_user("sofia88")
+        self.manager.add_tasks_bulk_for_user([("Vencida", now - timedelta(hours=1), True), ("Sin fecha",)], self.user_id_one)
+        task_id = self.manager.add_task_for_user(self.generic_task_description_two, user_id_three, recurrency=True, recurrency_days=1)
+        self.manager.complete_task_for_user(task_id, user_id_three)
+        #Asserts: solo los usuarios con tareas, por user_id
+        summaries = self.manager.get_all_user_summaries()
+        self.assertEqual([summary.user_id for summary in summaries], [self.user_id_one, user_id_three])
+        self.assertEqual(summaries, [self.manager.get_user_task_summary(summary.user_id) for summary in summaries])
+        self.assertEqual(summaries[0], TaskSummary(self.user_id_one, pending=2, overdue=1, priority=1))
+        self.manager.delete_task_for_user(task_id, user_id_three)
+        self.assertEqual([summary.user_id for summary in self.manager.get_all_user_summaries()], [self.user_id_one])
+
+    """Recurrence tests"""
+    def recurring_manager(self):
+        return TaskManager(self.repository, RecurrenceEngine(self.repository, self.mock_clock))
+
+    def test_completing_recurring_task_creates_next_occurrence(self):
+        manager = self.recurring_manager()
+        due_date = datetime(2025, 12, 15, 9, 00, 00)
+        task_id = manager.add_task_for_user(self.generic_task_description_two, self.user_id_one, due_date, recurrency=True, recurrency_days=7)
+        manager.complete_task_for_user(task_id, self.user_id_one)
+        pending_tasks = manager.get_pending_tasks_for_user(self.user_id_one)
+        #Asserts
+        self.assertEqual(len(pending_tasks), 1)
+        self.assertEqual(pending_tasks[0].get_description(), self.generic_task_description_two)
+        self.assertEqual(pending_tasks[0].get_due_date(), due_date + timedelta(days=7))
+        self.assertTrue(pending_tasks[0].is_recurrency())
+        #La completada ya no es recurrente: la recurrencia pasó a la nueva
+        self.assertFalse(manager.get_task_by_id_global(task_id).is_recurrency())
+
+    def test_late_completion_skips_to_next_future_occurrence(self):
+        manager = self.recurring_manager()
+        task_id = manager.add_task_for_user(self.generic_task_description_two, self.user_id_one, datetime(2025, 12, 1, 9, 00, 00), recurrency=True, recurrency_days=7)
+        #Pasaron dos semanas y media
+        self.mock_clock.advance_time(days=4)
+        manager.complete_task_for_user(task_id, self.user_id_one)
+        #Asserts: 1/12 + 3 * 7 días es la primera fecha posterior al 18/12
+        self.assertEqual(manager.get_pending_tasks_for_user(self.user_id_one)[0].get_due_date(), datetime(2025, 12, 22, 9, 00, 00))
+
+    def test_sweep_is_idempotent_and_covers_tasks_completed_without_engine(self):
+        task_ids = [self.manager.add_task_for_user(f"Task {i}", self.user_id_one, datetime(2025, 12, 15), recurrency=True, recurrency_days=1) for i in range(3)]
+        self.manager.complete_tasks_bulk_for_user(task_ids, self.user_id_one)
+        manager = self.recurring_manager()
+        #Asserts
+        self.assertEqual(manager.sweep_recurring_tasks(), 3)
+        self.assertEqual(manager.sweep_recurring_tasks(), 0)
+        self.assertEqual(len(manager.get_pending_tasks_for_user(self.user_id_one)), 3)
+
+    def test_non_recurring_and_failed_completions_do_not_create_tasks(self):
+        manager = self.recurring_manager()
+        task_id = manager.add_task_for_user(self.generic_task_description_one, self.user_id_one, datetime(2025, 12, 15))
+        other_task_id = manager.add_task_for_user(self.generic_task_description_two, self.user_id_two, datetime(2025, 12, 15), recurrency=True, recurrency_days=3)
+        manager.complete_task_for_user(task_id, self.user_id_one)
+        with self.assertRaises(AuthenticationError):
+            manager.complete_tasks_bulk_for_user([task_id, other_task_id], self.user_id_one)
+        #Asserts
+        self.assertEqual(self.manager.tasks_count_by_user_id(self.user_id_one), 1)
+        self.assertEqual(self.manager.tasks_count_by_user_id(self.user_id_two), 1)
+        self.assertFalse(manager.task_is_completed_global(other_task_id))
+
+    """Overdue scheduler tests"""
+    def scheduled_manager(self, recurrence_engine=None):
+        return TaskManager(self.repository, recurrence_engine, OverdueScheduler(self.mock_clock))
+
+    def overdue_ids(self, manager, user_id):
+        return [task.get_id() for task in manager.get_overdue_tasks_by_user_id_global(user_id)]
+
+    def test_scheduler_is_loaded_from_repository_and_matches_sql(self):
+        now = self.mock_clock.now()
+        self.manager.add_task_for_user(self.generic_task_description_one, self.user_id_one, now - timedelta(days=1))
+        self.manager.add_task_for_user(self.generic_task_description_two, self.user_id_one, now + timedelta(days=1))
+        self.manager.add_task_for_user(self.generic_task_description_three, self.user_id_two, now - timedelta(hours=1))
+        manager = self.scheduled_manager()
+        self.mock_clock.advance_time(days=2)
+        #Asserts
+        for user_id in (self.user_id_one, self.user_id_two):
+            expected = [task.get_id() for task in self.repository.get_overdue_tasks_by_user_id_global(user_id)]
+            self.assertEqual(self.overdue_ids(manager, user_id), expected)
+
+    def test_scheduler_follows_writes(self):
+        manager = self.scheduled_manager()
+        now = self.mock_clock.now()
+        task_id = manager.add_task_for_user(self.generic_task_description_one, self.user_id_one, now + timedelta(hours=1))
+        other_task_id = manager.add_task_for_user(self.generic_task_description_two, self.user_id_one)
+        manager.add_tasks_bulk_for_user([("Bulk", now + timedelta(hours=2))], self.user_id_one)
+        self.mock_clock.advance_time(hours=3)
+        self.assertEqual(self.overdue_ids(manager, self.user_id_one), [task_id, other_task_id + 1])
+        #Fecha nueva, descripción nueva, completar y volver a pendiente, borrar
+        manager.update_task_overdue_date_for_user(other_task_id, now, self.user_id_one)
+        manager.update_task_description_for_user(task_id, "Renamed", self.user_id_one)
+        self.assertEqual([task.get_description() for task in manager.get_overdue_tasks_by_user_id_global(self.user_id_one)], ["Renamed", self.generic_task_description_two, "Bulk"])
+        manager.complete_task_for_user(task_id, self.user_id_one)
+        manager.delete_task_for_user(other_task_id + 1, self.user_id_one)
+        manager.remove_task_due_date_for_user(other_task_id, self.user_id_one)
+        self.assertEqual(self.overdue_ids(manager, self.user_id_one), [])
+        manager.complete_task_global(task_id)
+        #Asserts
+        self.assertEqual(self.overdue_ids(manager, self.user_id_one), [task_id])
+
+    def test_scheduler_tracks_generated_recurrences(self):
+        manager = self.scheduled_manager(RecurrenceEngine(self.repository, self.mock_clock))
+        task_id = manager.add_task_for_user(self.generic_task_description_two, self.user_id_one, self.mock_clock.now(), recurrency=True, recurrency_days=1)
+        manager.complete_task_for_user(task_id, self.user_id_one)
+        self.mock_clock.advance_time(days=1, minutes=1)
+        #Asserts
+        self.assertEqual(self.overdue_ids(manager, self.user_id_one), [task_id + 1])
+
+
+
+class TestTaskManagerEpochDueDates(unittest.TestCase):
+    "epoch_due_dates solo cambia cómo se guarda due_date: cada escenario da lo mismo con fechas ISO y epoch"
+    def setUp(self):
+        self.now = datetime(2025, 12, 14, 17, 00, 00)
+        #Un reloj por base: cada escenario avanza el suyo
+        self.clocks = {epoch: MockClock(self.now) for epoch in (False, True)}
+        self.repositories = {epoch: TaskRepository(':memory:', self.clocks[epoch], True, epoch_due_dates=epoch) for epoch in (False, True)}
+        self.assertTrue(self.repositories[True].epoch_due_dates)
+
+    def tearDown(self):
+        for repository in self.repositories.values():
+            repository.close()
+
+    def assertSameOnBothFormats(self, scenario):
+        "Corre scenario(manager, user_id, clock) en las dos bases y compara lo que devuelve"
+        results = {}
+        for epoch, repository in self.repositories.items():
+            manager = TaskManager(repository, RecurrenceEngine(repository, self.clocks[epoch]))
+            results[epoch] = scenario(manager, manager.add_user("jelias1203"), self.clocks[epoch])
+        self.assertEqual(results[True], results[False])
+        return results[True]
+
+    def test_due_dates_round_trip(self):
+        due_date = datetime(2025, 12, 31, 23, 59, 59)
+        def scenario(manager, user_id, clock):
+            task_id = manager.add_task_for_user("Con fecha", user_id, due_date)
+            other_task_id = manager.add_task_for_user("Otra", user_id, due_date)
+            manager.update_task_overdue_date_for_user(task_id, due_date + timedelta(days=1), user_id)
+            manager.remove_task_due_date_for_user(other_task_id, user_id)
+            batch = manager.get_pending_tasks_for_user(user_id, as_batch=True)
+            return [task.get_due_date() for task in manager.get_pending_tasks_for_user(user_id)], [batch.get_due_date(i) for i in range(len(batch))]
+        #Asserts
+        self.assertEqual(self.assertSameOnBothFormats(scenario), ([due_date + timedelta(days=1), None],) * 2)
+
+    def test_overdue_listings_follow_the_clock(self):
+        def scenario(manager, user_id, clock):
+            now = clock.now()
+            for days in (-1, 3, 3, 10):
+                manager.add_task_for_user(f"Vence en {days} días", user_id, now + timedelta(days=days))
+            manager.add_task_for_user("Sin fecha", user_id)
+            manager.complete_task_for_user(1, user_id)
+            #Vence justo ahora: todavía no está vencida
+            manager.add_task_for_user("Ahora", user_id, now + timedelta(days=4))
+            clock.advance_time(days=4)
+            overdue = [task.get_description() for task in manager.get_overdue_tasks_by_user_id_global(user_id)]
+            streamed = [task.get_description() for task in manager.iter_overdue_tasks(user_id, batch_size=1)]
+            return overdue, streamed, manager.get_user_task_summary(user_id).overdue
+        #Asserts
+        self.assertEqual(self.assertSameOnBothFormats(scenario), (["Vence en 3 días"] * 2, ["Vence en 3 días"] * 2, 2))
+
+    def test_recurring_occurrences_get_the_same_due_dates(self):
+        def scenario(manager, user_id, clock):
+            now = clock.now()
+            on_time = manager.add_task_for_user("A tiempo", user_id, now + timedelta(hours=1), recurrency=True, recurrency_days=7)
+            late = manager.add_task_for_user("Tarde", user_id, now - timedelta(days=10), recurrency=True, recurrency_days=3)
+            undated = manager.add_task_for_user("Sin fecha", user_id, recurrency=True, recurrency_days=1)
+            manager.complete_tasks_bulk_for_user([on_time, late, undated], user_id)
+            return [(task.get_description(), task.get_due_date()) for task in manager.get_pending_tasks_for_user(user_id)]
+        #Asserts: la atrasada salta a la primera fecha posterior a ahora; sin fecha cuenta desde ahora
+        now = self.now
+        self.assertEqual(self.assertSameOnBothFormats(scenario), [
+            ("A tiempo", now + timedelta(days=7, hours=1)),
+            ("Tarde", now - timedelta(days=10) + timedelta(days=12)),
+            ("Sin fecha", now + timedelta(days=1)),
+        ])
+
+
+class TestTaskManagerTaskCounters(unittest.TestCase):
+    "task_counters cambia de dónde salen los resúmenes: después de cada escritura tienen que coincidir con el recuento sobre tasks"
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.repository = TaskRepository(':memory:', self.mock_clock, True, task_counters=True)
+        self.manager = TaskManager(self.repository, RecurrenceEngine(self.repository, self.mock_clock))
+        self.user_id_one = self.manager.add_user("jelias1203")
+        self.user_id_two = self.manager.add_user("martin195")
+        #Las sentencias sin contadores, sobre la misma conexión
+        self.scan_statements = self.repository._build_summary_statements(False)
+
+    def tearDown(self):
+        self.repository.close()
+
+    def assertCountersMatchScan(self, step):
+        now_str = self.repository._to_db_format(self.mock_clock.now())
+        expected = [TaskSummary(*row) for row in self.repository.conn.execute(self.scan_statements['all_user_summaries'], (now_str,))]
+        with self.subTest(step=step):
+            self.assertEqual(self.manager.get_all_user_summaries(), expected)
+            for user_id in (self.user_id_one, self.user_id_two):
+                row = self.repository.conn.execute(self.scan_statements['user_summary'], (now_str, user_id)).fetchone()
+                self.assertEqual(self.manager.get_user_task_summary(user_id), TaskSummary(user_id, *(count or 0 for count in row)))
+
+    def test_counters_follow_every_write(self):
+        now = self.mock_clock.now()
+        user_id = self.user_id_one
+        task_id = self.manager.add_task_for_user("Vencida", user_id, now - timedelta(days=1))
+        self.assertCountersMatchScan("add")
+        bulk_ids = [task_id + 1, task_id + 2, task_id + 3]
+        self.manager.add_tasks_bulk_for_user([("Bulk", now + timedelta(days=1), True), ("Bulk", None, False, True, 1), ("Bulk",)], user_id)
+        self.manager.add_task_for_user("Otra", self.user_id_two, priority=True)
+        self.assertCountersMatchScan("bulk add")
+        self.manager.change_task_priority_for_user(user_id, task_id)
+        self.manager.change_task_recurrency_for_user(user_id, task_id)
+        self.assertCountersMatchScan("toggles")
+        self.manager.update_task_overdue_date_for_user(bulk_ids[0], now - timedelta(hours=1), user_id)
+        self.manager.update_task_description_for_user(bulk_ids[0], "Renombrada", user_id)
+        self.assertCountersMatchScan("due date and description")
+        #Completar una recurrente materializa la siguiente
+        self.manager.complete_task_for_user(bulk_ids[1], user_id)
+        self.manager.complete_tasks_bulk_for_user([task_id, bulk_ids[2]], user_id)
+        self.assertCountersMatchScan("complete")
+        self.manager.complete_task_global(bulk_ids[2])
+        self.assertCountersMatchScan("back to pending")
+        self.manager.delete_task_for_user(bulk_ids[0], user_id)
+        self.manager.delete_tasks_bulk_for_user([task_id, bulk_ids[2]], user_id)
+        self.assertCountersMatchScan("delete")
+        self.mock_clock.advance_time(days=2)
+        self.assertCountersMatchScan("time passes")
+
+    def test_user_without_tasks_leaves_all_user_summaries(self):
+        task_id = self.manager.add_task_for_user("Única", self.user_id_two)
+        self.manager.complete_task_for_user(task_id, self.user_id_two)
+        self.manager.delete_task_for_user(task_id, self.user_id_two)
+        #Asserts: su fila de contadores queda en cero y no se lista
+        self.assertEqual(self.manager.get_all_user_summaries(), [])
+        self.assertEqual(self.manager.get_user_task_summary(self.user_id_two), TaskSummary(self.user_id_two))
+        self.assertCountersMatchScan("empty")
+
 
 if __name__ == '__main__':
     unittest.main()
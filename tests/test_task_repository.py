@@ -0,0 +1,374 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+from src.task_repository import TaskRepository
+from src.task_manager import Task, TaskBatch, TaskSummary
+from src.migrations import *
+from src.connection_profiles import ConnectionProfile, PROFILES
+from src.clock_implementations import MockClock
+from datetime import datetime, timedelta
+class TestTaskRepository(unittest.TestCase):
+    DB_TEST_NAME = 'test_task_repository.db'
+    def setUp(self):
+        #Creamos el repository
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.repository = TaskRepository(self.DB_TEST_NAME, self.mock_clock, True)
+        self.user_id_one = self.repository.add_user("jelias1203")
+        self.user_id_two = self.repository.add_user("martin195")
+
+    def tearDown(self):
+        self.repository.close()
+
+    def index_names(self, conn):
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    def query_plan(self, sql, params):
+        return ' '.join(row[3] for row in self.repository.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+    """Migration tests"""
+    def test_new_database_is_at_latest_schema_version(self):
+        self.assertEqual(get_schema_version(self.repository.conn), LATEST_VERSION)
+        self.assertTrue({USER_PENDING_DUE_INDEX, PENDING_DUE_INDEX} <= self.index_names(self.repository.conn))
+
+    def test_per_user_queries_use_index(self):
+        pending_plan = self.query_plan("SELECT * FROM tasks WHERE completed = 0 AND user_id = ?", (self.user_id_one,))
+        count_plan = self.query_plan("SELECT COUNT(*) FROM tasks WHERE user_id = ?", (self.user_id_one,))
+        #Asserts
+        self.assertIn(USER_PENDING_DUE_INDEX, pending_plan)
+        self.assertIn(f"COVERING INDEX {USER_PENDING_DUE_INDEX}", count_plan)
+
+    def test_legacy_database_is_migrated_in_place(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'legacy.db')
+        #Base creada por la versión sin migraciones
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER not NULL, description TEXT NOT NULL, completed BOOLEAN NOT NULL DEFAULT 0, due_date TEXT NULL, priority BOOLEAN NOT NULL DEFAULT 0, recurrency BOOLEAN NOT NULL DEFAULT 0, recurrency_days INTEGER NULL)")
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE)")
+        conn.execute("INSERT INTO users (username) VALUES ('legacy')")
+        conn.execute("INSERT INTO tasks (user_id, description, due_date) VALUES (1, 'Old task', '2025-12-01 10:00:00')")
+        conn.commit()
+        conn.close()
+        #Abrimos con el repositorio
+        repository = TaskRepository(db_path, self.mock_clock)
+        self.addCleanup(repository.close)
+        #Asserts
+        self.assertEqual(get_schema_version(repository.conn), LATEST_VERSION)
+        self.assertTrue({USER_PENDING_DUE_INDEX, PENDING_DUE_INDEX, PENDING_USER_INDEX, RECURRENCE_PARENT_INDEX} <= self.index_names(repository.conn))
+        overdue_tasks = repository.get_overdue_tasks_by_user_id_global(1)
+        self.assertEqual([task.get_description() for task in overdue_tasks], ['Old task'])
+
+    def test_apply_migrations_is_idempotent(self):
+        version = apply_migrations(self.repository.conn)
+        #Asserts
+        self.assertEqual(version, LATEST_VERSION)
+        self.assertEqual(apply_migrations(self.repository.conn), LATEST_VERSION)
+
+    def test_existing_descriptions_are_indexed_for_search(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'search.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER not NULL, description TEXT NOT NULL, completed BOOLEAN NOT NULL DEFAULT 0, due_date TEXT NULL, priority BOOLEAN NOT NULL DEFAULT 0, recurrency BOOLEAN NOT NULL DEFAULT 0, recurrency_days INTEGER NULL)")
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE)")
+        conn.execute("INSERT INTO users (username) VALUES ('legacy')")
+        conn.execute("INSERT INTO tasks (user_id, description) VALUES (1, 'Pagar la factura de luz')")
+        conn.commit()
+        apply_migrations(conn, 3)
+        conn.close()
+        #La v4 indexa lo que ya estaba
+        repository = TaskRepository(db_path, self.mock_clock)
+        self.addCleanup(repository.close)
+        #Asserts
+        self.assertEqual([task.get_id() for task in repository.search_tasks(1, "factura")], [1])
+
+    def test_search_ranks_by_relevance_and_uses_fts(self):
+        self.repository.add_task_by_user_id_global("Comprar pan, leche y huevos para el desayuno del domingo", self.user_id_one)
+        self.repository.add_task_by_user_id_global("Comprar pan", self.user_id_one)
+        self.repository.add_task_by_user_id_global("Pan pan pan", self.user_id_one)
+        plan = self.query_plan(f"SELECT rowid FROM {TASKS_FTS_TABLE_NAME} WHERE {TASKS_FTS_TABLE_NAME} MATCH ?", ('"pan"*',))
+        #Asserts: bm25 prefiere más apariciones y descripciones cortas
+        self.assertEqual([task.get_id() for task in self.repository.search_tasks(self.user_id_one, "pan")], [3, 2, 1])
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
+
+    def test_epoch_conversion_keeps_search_in_sync(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'epoch_search.db')
+        repository = TaskRepository(db_path, self.mock_clock)
+        user_id = repository.add_user("epoch_user")
+        repository.add_task_by_user_id_global("Regar las plantas", user_id)
+        repository.close()
+        repository = TaskRepository(db_path, self.mock_clock, epoch_due_dates=True)
+        self.addCleanup(repository.close)
+        repository.add_task_by_user_id_global("Regar el jardín", user_id)
+        repository.update_task_description_global(1, "Podar las plantas")
+        #Asserts: los triggers se recrearon sobre la tabla nueva
+        self.assertEqual([task.get_id() for task in repository.search_tasks(user_id, "regar")], [2])
+        self.assertEqual([task.get_id() for task in repository.search_tasks(user_id, "plantas")], [1])
+
+    """Transaction and bulk tests"""
+    def test_transaction_commits_once_at_exit(self):
+        with self.repository.transaction():
+            self.repository.add_task_by_user_id_global("Task one", self.user_id_one)
+            self.repository.add_task_by_user_id_global("Task two", self.user_id_one)
+            #Todavía no se hizo el commit
+            self.assertTrue(self.repository.conn.in_transaction)
+        #Asserts
+        self.assertFalse(self.repository.conn.in_transaction)
+        self.assertEqual(self.repository.tasks_count_by_user_id(self.user_id_one), 2)
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.add_task_by_user_id_global("Task one", self.user_id_one)
+                raise RuntimeError("boom")
+        #Asserts
+        self.assertFalse(self.repository.has_tasks())
+
+    def test_add_tasks_bulk(self):
+        due_date = self.mock_clock.now() + timedelta(days=1)
+        tasks = [("Task one", self.user_id_one), ("Task two", self.user_id_one, due_date, True), ("Task three", self.user_id_two)]
+        #Asserts
+        self.assertEqual(self.repository.add_tasks_bulk(tasks), 3)
+        pending_tasks = self.repository.get_pending_tasks_by_user_id_global(self.user_id_one)
+        self.assertEqual([task.get_due_date() for task in pending_tasks], [None, due_date])
+        self.assertTrue(pending_tasks[1].is_priority())
+
+    def test_complete_and_delete_tasks_bulk_only_match_tasks_of_user(self):
+        self.repository.add_tasks_bulk([("Task one", self.user_id_one), ("Task two", self.user_id_one), ("Task three", self.user_id_two)])
+        #Asserts
+        self.assertEqual(self.repository.complete_tasks_bulk([1, 2, 3], self.user_id_one), 2)
+        self.assertEqual(len(self.repository.get_pending_tasks_by_user_id_global(self.user_id_two)), 1)
+        self.assertEqual(self.repository.delete_tasks_bulk([1, 3], self.user_id_two), 1)
+        self.assertEqual(self.repository.tasks_count_by_user_id(self.user_id_two), 0)
+        self.assertEqual(self.repository.tasks_count_by_user_id(self.user_id_one), 2)
+
+    """Task representation tests"""
+    def test_task_has_no_instance_dict(self):
+        task_id = self.repository.add_task_by_user_id_global("Task one", self.user_id_one)
+        task = self.repository.get_task_by_id_global(task_id)
+        #Asserts
+        self.assertFalse(hasattr(task, '__dict__'))
+
+    def test_pending_tasks_as_batch_match_task_list(self):
+        due_date = self.mock_clock.now() + timedelta(days=2, microseconds=5)
+        self.repository.add_tasks_bulk([("Task one", self.user_id_one, due_date, True), ("Task two", self.user_id_one, None, False, True, 3), ("Task three", self.user_id_two)])
+        tasks = self.repository.get_pending_tasks_by_user_id_global(self.user_id_one)
+        batch = self.repository.get_pending_tasks_by_user_id_global(self.user_id_one, as_batch=True)
+        #Asserts
+        self.assertIsInstance(batch, TaskBatch)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.get_id(0), tasks[0].get_id())
+        self.assertTrue(batch.is_priority(0))
+        self.assertEqual(batch.get_due_date(0), due_date)
+        self.assertIsNone(batch.get_due_date(1))
+        for batch_task, task in zip(batch, tasks):
+            self.assertEqual([getattr(batch_task, slot) for slot in Task.__slots__], [getattr(task, slot) for slot in Task.__slots__])
+
+    def test_pending_tasks_of_all_users(self):
+        self.repository.add_tasks_bulk([("Task one", self.user_id_one), ("Task two", self.user_id_two)])
+        #Asserts
+        self.assertEqual([task.user_id for task in self.repository.get_pending_tasks_by_user_id_global()], [self.user_id_one, self.user_id_two])
+        self.assertEqual(len(self.repository.get_pending_tasks_by_user_id_global(as_batch=True)), 2)
+
+    """Streaming tests"""
+    def test_iter_pending_tasks_pages_through_all_pending_tasks(self):
+        self.repository.add_tasks_bulk([("Task %d" % i, self.user_id_one) for i in range(7)] + [("Other", self.user_id_two)])
+        self.repository.complete_tasks_bulk([2])
+        #Asserts
+        streamed = [task.get_id() for task in self.repository.iter_pending_tasks(self.user_id_one, batch_size=2)]
+        listed = [task.get_id() for task in self.repository.get_pending_tasks_by_user_id_global(self.user_id_one)]
+        self.assertEqual(streamed, listed)
+        self.assertEqual(len(list(self.repository.iter_pending_tasks(batch_size=3))), 7)
+
+    def test_iter_overdue_tasks_allows_writes_between_pages(self):
+        due_date = self.mock_clock.now() - timedelta(days=1)
+        self.repository.add_tasks_bulk([("Task %d" % i, self.user_id_one, due_date) for i in range(4)] + [("Future", self.user_id_one, self.mock_clock.now() + timedelta(days=1))])
+        #Completamos mientras recorremos
+        for task in self.repository.iter_overdue_tasks(self.user_id_one, batch_size=1):
+            self.repository.complete_task_global(task.get_id())
+        #Asserts
+        self.assertEqual(self.repository.get_overdue_tasks_by_user_id_global(self.user_id_one), [])
+        self.assertEqual(len(self.repository.get_pending_tasks_by_user_id_global(self.user_id_one)), 1)
+
+    def test_get_pending_tasks_page_in_both_orders(self):
+        self.repository.add_tasks_bulk([("Task %d" % i, self.user_id_one) for i in range(5)])
+        self.repository.complete_tasks_bulk([3])
+        #Asserts
+        self.assertEqual([task.get_id() for task in self.repository.get_pending_tasks_page(self.user_id_one, limit=2)], [1, 2])
+        self.assertEqual([task.get_id() for task in self.repository.get_pending_tasks_page(self.user_id_one, after_id=2, limit=2)], [4, 5])
+        self.assertEqual([task.get_id() for task in self.repository.get_pending_tasks_page(self.user_id_one, limit=2, order='desc')], [5, 4])
+        self.assertEqual([task.get_id() for task in self.repository.get_pending_tasks_page(self.user_id_one, after_id=4, order='desc')], [2, 1])
+        with self.assertRaises(ValueError):
+            self.repository.get_pending_tasks_page(self.user_id_one, order='sideways')
+
+    """Connection profile tests"""
+    def test_balanced_profile_sets_pragmas(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'profile.db')
+        repository = TaskRepository(db_path, self.mock_clock, profile='balanced')
+        self.addCleanup(repository.close)
+        conn = repository.conn
+        #Asserts
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1) # NORMAL
+        self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], PROFILES['balanced'].cache_size)
+        self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2) # MEMORY
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+        #Sigue funcionando como cualquier repositorio
+        user_id = repository.add_user("wal_user")
+        repository.add_task_by_user_id_global("Task", user_id)
+        self.assertEqual(len(repository.get_pending_tasks_by_user_id_global(user_id)), 1)
+
+    def test_custom_profile_object(self):
+        profile = ConnectionProfile('custom', 'DELETE', 'OFF', 0, -1000, 'FILE', 250)
+        repository = TaskRepository(self.DB_TEST_NAME, self.mock_clock, True, profile=profile)
+        self.addCleanup(repository.close)
+        #Asserts
+        self.assertEqual(repository.conn.execute("PRAGMA synchronous").fetchone()[0], 0)
+        self.assertEqual(repository.conn.execute("PRAGMA busy_timeout").fetchone()[0], 250)
+
+    def test_unknown_profile_raises(self):
+        with self.assertRaises(ValueError):
+            TaskRepository(self.DB_TEST_NAME, self.mock_clock, True, profile='turbo')
+
+    def test_statement_registry_prepares_and_fits_the_statement_cache(self):
+        for epoch_due_dates, task_counters in ((False, False), (True, False), (False, True)):
+            repository = TaskRepository(self.DB_TEST_NAME, self.mock_clock, True, epoch_due_dates=epoch_due_dates, task_counters=task_counters)
+            #Asserts: toda sentencia del registro es SQL válido para este esquema, y entran todas en la cache
+            for name, sql in repository.statements.items():
+                with self.subTest(name=name, epoch_due_dates=epoch_due_dates, task_counters=task_counters):
+                    repository.conn.execute(f"EXPLAIN {sql}", {'now': 0, 'ids': '[]'} if ':now' in sql or ':ids' in sql else (None,) * sql.count('?'))
+            self.assertGreaterEqual(repository.cached_statements, len(repository.statements) + repository.STATEMENT_CACHE_HEADROOM)
+            repository.close()
+
+    """Summary tests"""
+    def summary_statements(self, repository, fn, *args):
+        statements = []
+        repository.conn.set_trace_callback(statements.append)
+        result = fn(*args)
+        repository.conn.set_trace_callback(None)
+        return result, statements
+
+    def test_summary_is_one_aggregate_query(self):
+        self.repository.add_tasks_bulk([("Task %d" % i, self.user_id_one, datetime(2025, 12, 10), i % 2 == 0, i % 3 == 0, 1) for i in range(30)])
+        self.repository.complete_tasks_bulk(range(1, 11))
+        summary, statements = self.summary_statements(self.repository, self.repository.get_user_task_summary, self.user_id_one)
+        summaries, all_statements = self.summary_statements(self.repository, self.repository.get_all_user_summaries)
+        #Asserts
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(len(all_statements), 1)
+        self.assertIn("SUM(CASE", statements[0])
+        self.assertEqual((summary.pending, summary.overdue, summary.priority, summary.recurring, summary.completed), (20, 20, 10, 6, 10))
+        self.assertEqual(summaries, [summary])
+        self.assertEqual(self.repository.get_user_task_summary(self.user_id_two), TaskSummary(self.user_id_two))
+
+    def test_task_counters_are_filled_from_existing_tasks_and_read_in_one_row(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'counters.db')
+        repository = TaskRepository(db_path, self.mock_clock)
+        user_id = repository.add_user("counters_user")
+        repository.add_task_by_user_id_global("Overdue", user_id, datetime(2025, 12, 1), priority=True)
+        repository.add_task_by_user_id_global("Done", user_id, recurrency=True, recurrency_days=1)
+        repository.complete_task_global(2)
+        expected = repository.get_user_task_summary(user_id)
+        repository.close()
+        #Reabrimos pidiendo contadores
+        repository = TaskRepository(db_path, self.mock_clock, task_counters=True)
+        summary, statements = self.summary_statements(repository, repository.get_user_task_summary, user_id)
+        plan = ' '.join(row[3] for row in repository.conn.execute(f"EXPLAIN QUERY PLAN {repository.statements['user_summary']}", ('', user_id)))
+        #Asserts: la fila de contadores por clave primaria, las vencidas por el índice
+        self.assertTrue(uses_task_counters(repository.conn))
+        self.assertEqual(summary, expected)
+        self.assertEqual(len(statements), 1)
+        self.assertIn(TASK_COUNTERS_TABLE_NAME, statements[0])
+        self.assertIn("INTEGER PRIMARY KEY", plan)
+        self.assertIn(f"COVERING INDEX {USER_PENDING_DUE_INDEX}", plan)
+        repository.close()
+        #Sin el flag la base los sigue manteniendo, también después de convertir las fechas (la tabla tasks se recrea)
+        repository = TaskRepository(db_path, self.mock_clock, epoch_due_dates=True)
+        self.addCleanup(repository.close)
+        self.assertTrue(repository.task_counters)
+        repository.add_task_by_user_id_global("New", user_id, datetime(2025, 12, 2))
+        repository.complete_task_global(2)
+        self.assertEqual(repository.get_user_task_summary(user_id), TaskSummary(user_id, pending=3, overdue=2, priority=1, recurring=1, completed=0))
+        self.assertEqual(tuple(repository.conn.execute(f"SELECT pending, completed FROM {TASK_COUNTERS_TABLE_NAME}").fetchone()), (3, 0))
+
+    """Recurrence tests"""
+    def test_materialize_recurring_tasks_is_one_statement(self):
+        self.repository.add_tasks_bulk([("Task %d" % i, self.user_id_one, datetime(2025, 12, 10), False, True, 2) for i in range(100)])
+        self.repository.complete_tasks_bulk(range(1, 101))
+        statements = []
+        self.repository.conn.set_trace_callback(statements.append)
+        created = self.repository.materialize_recurring_tasks(self.mock_clock.now())
+        self.repository.conn.set_trace_callback(None)
+        #Los triggers del índice de búsqueda reportan sus pasos ("-- ...") y repiten la sentencia que los disparó
+        statements = list(dict.fromkeys(sql for sql in statements if not sql.startswith('--')))
+        queries = [sql.split()[0] for sql in statements if sql.split()[0] not in ('BEGIN', 'COMMIT')]
+        #Asserts: un INSERT ... SELECT y un UPDATE, sin importar cuántas tareas
+        self.assertEqual(created, 100)
+        self.assertEqual(queries, ['INSERT', 'UPDATE'])
+        self.assertEqual(self.repository.get_pending_tasks_by_user_id_global(self.user_id_one)[0].get_due_date(), datetime(2025, 12, 16))
+
+    def test_recurrence_parent_is_unique(self):
+        self.repository.add_task_by_user_id_global("Task", self.user_id_one, recurrency=True, recurrency_days=1)
+        self.repository.complete_task_global(1)
+        self.repository.materialize_recurring_tasks(self.mock_clock.now())
+        #Asserts
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.repository.conn.execute("INSERT INTO tasks (user_id, description, recurrence_parent_id) VALUES (?, 'dup', 1)", (self.user_id_one,))
+
+    """Epoch due date tests"""
+    def test_existing_database_is_converted_to_epoch_in_place(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'epoch.db')
+        repository = TaskRepository(db_path, self.mock_clock)
+        user_id = repository.add_user("epoch_user")
+        repository.add_task_by_user_id_global("Overdue", user_id, datetime(2025, 12, 1, 10, 30, 00))
+        repository.add_task_by_user_id_global("Future", user_id, datetime(2026, 1, 1))
+        repository.add_task_by_user_id_global("No date", user_id)
+        repository.add_task_by_user_id_global("Deleted", user_id)
+        repository.delete_task_global(4)
+        repository.close()
+        #Reabrimos pidiendo epoch
+        repository = TaskRepository(db_path, self.mock_clock, epoch_due_dates=True)
+        #Asserts
+        self.assertTrue(uses_epoch_due_dates(repository.conn))
+        self.assertEqual(repository.conn.execute("SELECT due_date FROM tasks WHERE id = 1").fetchone()[0], 1764585000)
+        self.assertEqual([task.get_description() for task in repository.get_overdue_tasks_by_user_id_global(user_id)], ["Overdue"])
+        self.assertEqual(repository.get_task_by_id_global(2).get_due_date(), datetime(2026, 1, 1))
+        self.assertIsNone(repository.get_task_by_id_global(3).get_due_date())
+        self.assertTrue({USER_PENDING_DUE_INDEX, PENDING_DUE_INDEX, PENDING_USER_INDEX, RECURRENCE_PARENT_INDEX} <= self.index_names(repository.conn))
+        #No se reutiliza el id de la tarea borrada
+        self.assertEqual(repository.add_task_by_user_id_global("New", user_id), 5)
+        repository.close()
+        #Sin el flag, la base convertida se sigue leyendo como epoch
+        repository = TaskRepository(db_path, self.mock_clock)
+        self.addCleanup(repository.close)
+        self.assertTrue(repository.epoch_due_dates)
+        self.assertEqual(repository.get_task_by_id_global(1).get_due_date(), datetime(2025, 12, 1, 10, 30, 00))
+
+    def test_epoch_due_date_is_converted_lazily(self):
+        repository = TaskRepository(self.DB_TEST_NAME, self.mock_clock, True, epoch_due_dates=True)
+        self.addCleanup(repository.close)
+        user_id = repository.add_user("lazy")
+        repository.add_task_by_user_id_global("Task", user_id, datetime(2025, 12, 20, 8, 00, 00))
+        task = repository.get_pending_tasks_by_user_id_global(user_id)[0]
+        batch = repository.get_pending_tasks_by_user_id_global(user_id, as_batch=True)
+        #Asserts: hasta pedir la fecha solo hay un int
+        self.assertIsInstance(task._due_date, int)
+        self.assertEqual(task.get_due_date(), datetime(2025, 12, 20, 8, 00, 00))
+        self.assertIsInstance(task._due_date, datetime)
+        self.assertEqual(batch.get_due_date(0), datetime(2025, 12, 20, 8, 00, 00))
+
+    def test_epoch_due_date_drops_sub_second_precision(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'epoch_precision.db')
+        repository = TaskRepository(db_path, self.mock_clock)
+        user_id = repository.add_user("precision")
+        repository.add_task_by_user_id_global("Converted", user_id, datetime(2025, 12, 20, 8, 00, 00, 999999))
+        repository.close()
+        #Reabrimos en el mismo segundo del vencimiento
+        repository = TaskRepository(db_path, MockClock(datetime(2025, 12, 20, 8, 00, 00, 900000)), epoch_due_dates=True)
+        self.addCleanup(repository.close)
+        repository.add_task_by_user_id_global("Stored", user_id, datetime(2025, 12, 20, 8, 00, 00, 500000))
+        #Asserts: tanto la conversión como las altas truncan al segundo
+        self.assertEqual([task.get_due_date() for task in repository.get_pending_tasks_by_user_id_global(user_id)], [datetime(2025, 12, 20, 8, 00, 00)] * 2)
+        #Vence en el mismo segundo que now: no está vencida
+        self.assertEqual(repository.get_overdue_tasks_by_user_id_global(user_id), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
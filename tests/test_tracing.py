@@ -0,0 +1,182 @@
+import unittest
+import os
+import asyncio
+import tempfile
+import threading
+from src.task_manager import TaskManager, AuthenticationError, UserIdNotFoundError
+from src.task_repository import TaskRepository
+from src.caching_repository import CachingRepository
+from src.cli_facade import TaskManagerCliFacade
+from src.recurrence_engine import RecurrenceEngine
+from src.tracing import Tracer, trace_object, untrace_object, trace_stack
+from src.clock_implementations import MockClock
+from datetime import datetime, timedelta
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.repository = TaskRepository(":memory:", self.mock_clock, True)
+        self.facade = TaskManagerCliFacade(TaskManager(self.repository))
+        self.facade.create_user("jelias1203")
+        self.task_id = self.facade.create_task("jelias1203", "Tarea")
+        self.tracer = Tracer()
+        trace_stack(self.facade, self.tracer)
+
+    def tree(self, span):
+        return (span.name, [self.tree(child) for child in span.children])
+
+    def test_nothing_is_recorded_while_disabled(self):
+        self.facade.complete_task("jelias1203", self.task_id)
+        #Asserts
+        self.assertEqual(list(self.tracer.traces), [])
+        self.assertEqual(self.tracer.collapsed(), [])
+
+    def test_complete_task_call_tree(self):
+        #Sin el username en cache, para ver también la resolución del user_id
+        self.facade.user_id_cache.clear()
+        self.tracer.enable()
+        self.facade.complete_task("jelias1203", self.task_id)
+        #Asserts
+        self.assertEqual(len(self.tracer.traces), 1)
+        root = self.tracer.traces[0]
+        self.assertEqual(self.tree(root), ('TaskManagerCliFacade.complete_task', [
+            ('TaskManagerCliFacade.get_user_id', [
+                ('TaskManager.get_user_id_by_username', [
+                    ('TaskManager.assert_username_exists', [
+                        ('TaskRepository.contains_user_by_username', [('TaskRepository._execute', [])]),
+                    ]),
+                    ('TaskRepository.get_user_id_by_username', [('TaskRepository._execute', [])]),
+                ]),
+            ]),
+            ('TaskManager.complete_task_for_user', [
+                ('TaskRepository.complete_task_global', [('TaskRepository._execute_write', [])]),
+                ('TaskManager.assert_task_was_found_for_user', []),
+                ('TaskRepository._commit_now', []),
+            ]),
+        ]))
+        self.assertGreaterEqual(root.seconds, sum(child.seconds for child in root.children))
+        self.assertGreaterEqual(root.self_seconds(), 0)
+
+    def test_collapsed_stacks_aggregate_self_time_per_path(self):
+        self.tracer.enable()
+        for _ in range(3):
+            self.facade.list_pending_tasks("jelias1203")
+        path = os.path.join(tempfile.mkdtemp(), 'trace.collapsed')
+        self.tracer.write_collapsed(path)
+        with open(path) as file:
+            lines = file.read().splitlines()
+        #Asserts: "frame;frame;frame microsegundos", un camino por línea
+        stacks = dict(line.rsplit(' ', 1) for line in lines)
+        self.assertEqual(len(stacks), len(lines))
+        self.assertIn('TaskManagerCliFacade.list_pending_tasks;TaskManager.get_pending_tasks_by_user_id_global;'
+                      'TaskRepository.get_pending_tasks_by_user_id_global;TaskRepository._execute', stacks)
+        self.assertTrue(all(value.isdigit() for value in stacks.values()))
+        self.assertEqual(len(self.tracer.traces), 3)
+
+    def test_exceptions_close_their_spans(self):
+        self.facade.create_user("martin195")
+        self.tracer.enable()
+        with self.assertRaises(AuthenticationError):
+            self.facade.complete_task("martin195", self.task_id)
+        self.facade.list_pending_tasks("jelias1203")
+        #Asserts: la operación siguiente es una raíz nueva, no hija de la que falló
+        self.assertEqual([span.name for span in self.tracer.traces], ['TaskManagerCliFacade.complete_task', 'TaskManagerCliFacade.list_pending_tasks'])
+
+    def test_threads_and_tasks_get_separate_trees(self):
+        self.tracer.enable()
+        with self.tracer.span('main'):
+            def in_thread():
+                with self.tracer.span('thread'):
+                    pass
+            thread = threading.Thread(target=in_thread)
+            thread.start()
+            thread.join()
+            async def job(name):
+                with self.tracer.span(name):
+                    await asyncio.sleep(0)
+                    with self.tracer.span(name + '.inner'):
+                        await asyncio.sleep(0)
+            async def both():
+                await asyncio.gather(job('a'), job('b'))
+            asyncio.run(both())
+        #Asserts: el span del otro hilo es una raíz propia, no un hijo de 'main'
+        self.assertEqual(sorted(span.name for span in self.tracer.traces), ['main', 'thread'])
+        main = [span for span in self.tracer.traces if span.name == 'main'][0]
+        self.assertEqual(sorted(self.tree(child) for child in main.children), [('a', [('a.inner', [])]), ('b', [('b.inner', [])])])
+
+    def test_untrace_restores_the_class_methods(self):
+        untrace_object(self.facade.manager)
+        untrace_object(self.repository)
+        #Asserts
+        self.assertNotIn('complete_task_global', vars(self.repository))
+        self.tracer.enable()
+        self.facade.complete_task("jelias1203", self.task_id)
+        self.assertEqual(self.tree(self.tracer.traces[0]), ('TaskManagerCliFacade.complete_task', [('TaskManagerCliFacade.get_user_id', [])]))
+
+    def test_trace_stack_reaches_the_wrapped_repository(self):
+        repository = CachingRepository(TaskRepository(":memory:", self.mock_clock, True))
+        facade = trace_stack(TaskManagerCliFacade(TaskManager(repository)), self.tracer)
+        facade.create_user("jelias1203")
+        self.tracer.enable()
+        facade.list_pending_tasks("jelias1203")
+        #Asserts
+        names = {line.rsplit(' ', 1)[0].split(';')[-1] for line in self.tracer.collapsed()}
+        self.assertIn('CachingRepository.get_pending_tasks_by_user_id_global', names)
+        self.assertIn('TaskRepository.get_pending_tasks_by_user_id_global', names)
+
+
+class TestTaskManagerTraced(unittest.TestCase):
+    "Los wrappers de trace_object no cambian lo que devuelven ni lo que lanzan los métodos: los mismos pasos dan lo mismo con y sin trazar"
+    def setUp(self):
+        self.mock_clock = MockClock(datetime(2025, 12, 14, 17, 00, 00))
+        self.tracer = Tracer(enabled=True)
+
+    def run_steps(self, traced):
+        repository = TaskRepository(":memory:", self.mock_clock, True)
+        manager = TaskManager(repository, RecurrenceEngine(repository, self.mock_clock))
+        if traced:
+            trace_object(manager, self.tracer)
+            trace_object(repository, self.tracer)
+        user_id = manager.add_user("jelias1203")
+        other_user_id = manager.add_user("martin195")
+        now = self.mock_clock.now()
+        task_id = manager.add_task_for_user("Regar", user_id, now - timedelta(days=1), recurrency=True, recurrency_days=2)
+        manager.add_tasks_bulk_for_user([(f"Tarea {i}", now + timedelta(days=i)) for i in range(4)], user_id)
+        with manager.transaction():
+            manager.change_task_priority_for_user(user_id, task_id + 1)
+        #Las excepciones salen igual y el rollback se hace igual
+        errors = []
+        for failing in (lambda: manager.complete_task_for_user(task_id, other_user_id), lambda: manager.get_user_task_summary(9999)):
+            try:
+                failing()
+            except Exception as e:
+                errors.append(type(e))
+        try:
+            with manager.transaction():
+                manager.delete_task_for_user(task_id + 2, user_id)
+                raise RuntimeError("rollback")
+        except RuntimeError:
+            pass
+        manager.complete_task_for_user(task_id, user_id)
+        results = [
+            errors,
+            [(task.get_id(), task.get_due_date(), task.is_priority()) for task in manager.get_pending_tasks_for_user(user_id)],
+            [task.get_id() for task in manager.iter_pending_tasks(user_id, batch_size=2)],
+            [task.get_id() for task in manager.get_overdue_tasks_by_user_id_global(user_id)],
+            manager.get_user_task_summary(user_id),
+            manager.tasks_count_by_user_id(user_id),
+        ]
+        repository.close()
+        return results
+
+    def test_traced_manager_and_repository_give_the_same_results(self):
+        plain = self.run_steps(False)
+        traced = self.run_steps(True)
+        #Asserts
+        self.assertEqual(traced, plain)
+        self.assertEqual(plain[0], [AuthenticationError, UserIdNotFoundError])
+        roots = {span.name for span in self.tracer.traces}
+        self.assertTrue({'TaskManager.add_task_for_user', 'TaskManager.transaction', 'TaskManager.iter_pending_tasks'} <= roots, roots)
+
+
+if __name__ == '__main__':
+    unittest.main()